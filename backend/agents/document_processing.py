@@ -1,22 +1,29 @@
-from typing import List
+from typing import Any, Awaitable, Callable, Iterator, List, Optional, Tuple
+import asyncio
 import os
 import base64
 import io
-from tempfile import TemporaryDirectory
+import hashlib
+import random
 import requests
 
 from dotenv import load_dotenv
 from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
 from PIL import Image
-from PIL.PpmImagePlugin import PpmImageFile
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from pypdf import PdfReader
 from agno.agent import Agent
 from agno.models.azure import AzureOpenAI
 import cloudinary
 import cloudinary.uploader
 
 from backend.models.response.files import DoucmentParseResponse
-from backend.settings import StorageConfig, get_app_settings
+from backend.settings import (
+    DocumentProcessingConfig,
+    StorageConfig,
+    get_app_settings,
+)
 from backend.utils.llm import get_model
 from agno.document import Document
 
@@ -24,16 +31,53 @@ from backend.utils.logger import get_logger
 
 LOG = get_logger("DocProcessingEngine")
 
+# PowerPoint sizes are in English Metric Units
+EMU_PER_INCH = 914400
+
+# Pictures smaller than this on the slide are icons, bullets and logos
+MIN_PICTURE_EMU = EMU_PER_INCH
+
+# Picture formats the vision model can be sent, vector formats like EMF are not
+RASTER_FORMATS = {"PNG", "JPEG", "MPO", "GIF", "BMP", "TIFF", "WEBP"}
+
+# Legacy binary .ppt files cannot be read by python-pptx and are not accepted
+SUPPORTED_EXTENSIONS = (".pdf", ".pptx")
+UNSUPPORTED_FILE_MESSAGE = (
+    "Unsupported file type. Only PDF and PPTX are supported, save .ppt files as .pptx."
+)
+
+# Called with each extracted page, and its document or None when it has no content
+OnPage = Callable[[int, Optional[Document]], Awaitable[None]]
+
+# Punctuation common in business documents, on top of letters, digits and spaces
+TEXT_LAYER_PUNCTUATION = set(".,;:!?%$€£¥()[]-–—/&'\"•*+=#@")
+
 
 class DocumentProcessingEngine:
     """
     Engine to extract text from PDF or PPTX files using an LLM with vision (e.g., GPT-4o via phidata).
     """
 
-    def __init__(self, model: AzureOpenAI, storage_config: StorageConfig):
+    def __init__(
+        self,
+        model: AzureOpenAI,
+        storage_config: StorageConfig,
+        document_processing_config: Optional[DocumentProcessingConfig] = None,
+    ):
         self.model = model
-        self.agent = Agent(
-            model=model,
+        self.storage_config = storage_config
+        self.config = document_processing_config or DocumentProcessingConfig()
+        # Set Cloudinary config for upload/download
+        cloudinary.config(
+            cloud_name=self.storage_config.cloud_name,
+            api_key=self.storage_config.api_key,
+            api_secret=self.storage_config.api_secret,
+        )
+
+    def _create_agent(self) -> Agent:
+        # Agents hold per-run state, so every extraction gets its own
+        return Agent(
+            model=self.model,
             markdown=True,
             instructions="""
             You are a document parser engine. For the given page, output strictly:
@@ -43,70 +87,452 @@ class DocumentProcessingEngine:
             """,
             response_model=DoucmentParseResponse,
         )
-        self.storage_config = storage_config
-        # Set Cloudinary config for upload/download
-        cloudinary.config(
-            cloud_name=self.storage_config.cloud_name,
-            api_key=self.storage_config.api_key,
-            api_secret=self.storage_config.api_secret,
+
+    def _iter_pages(
+        self, file_path: str, skip_pages: frozenset[int] = frozenset()
+    ) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        Rasterize the pages of the PDF one at a time, so only the pages being worked
+        on are ever held in memory. Pages in skip_pages, already read from the text
+        layer, are not rasterized.
+        """
+        page_count = pdfinfo_from_path(file_path)["Pages"]
+        for page_number in range(1, page_count + 1):
+            if page_number in skip_pages:
+                continue
+            (image,) = convert_from_path(
+                file_path,
+                dpi=self.config.dpi,
+                first_page=page_number,
+                last_page=page_number,
+            )
+            yield page_number, image
+
+    @staticmethod
+    def _iter_shapes(shapes) -> Iterator:
+        """Shapes in reading order, top to bottom then left to right, ungrouped"""
+        for shape in sorted(shapes, key=lambda s: (s.top or 0, s.left or 0)):
+            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+                yield from DocumentProcessingEngine._iter_shapes(shape.shapes)
+            else:
+                yield shape
+
+    @staticmethod
+    def _shape_text(shape) -> List[str]:
+        """Lines of text of a text frame, table or chart"""
+        lines = []
+        if shape.has_text_frame:
+            lines.extend(p.text.strip() for p in shape.text_frame.paragraphs)
+        elif shape.has_table:
+            for row in shape.table.rows:
+                lines.append(" | ".join(cell.text.strip() for cell in row.cells))
+        elif shape.has_chart:
+            chart = shape.chart
+            if chart.has_title and chart.chart_title.has_text_frame:
+                lines.append(chart.chart_title.text_frame.text.strip())
+            for plot in chart.plots:
+                categories = list(plot.categories)
+                for series in plot.series:
+                    points = ", ".join(
+                        f"{category}: {value}"
+                        for category, value in zip(categories, series.values)
+                    )
+                    lines.append(f"{series.name} - {points}")
+        return [line for line in lines if line]
+
+    def _read_slides(
+        self, file_path: str
+    ) -> Tuple[dict[int, str], dict[int, Tuple[str, List[bytes]]]]:
+        """
+        Read the text frames, tables and charts of every slide natively, along with
+        its embedded pictures. Returns the text, possibly empty, of the slides
+        without pictures, and
+        the text and pictures of the others, which need the vision model, both keyed
+        by slide number. Pictures repeated across slides, such as logos, are only
+        kept the first time.
+        """
+        prs = Presentation(file_path)
+        seen = set()
+        text_slides, picture_slides = {}, {}
+        for slide_number, slide in enumerate(prs.slides, start=1):
+            lines, pictures = [], []
+            for shape in self._iter_shapes(slide.shapes):
+                lines.extend(self._shape_text(shape))
+                if shape.shape_type != MSO_SHAPE_TYPE.PICTURE:
+                    continue
+                if max(shape.width or 0, shape.height or 0) < MIN_PICTURE_EMU:
+                    continue
+                try:
+                    # Raises for linked pictures, which are not embedded in the file
+                    blob = shape.image.blob
+                    with Image.open(io.BytesIO(blob)) as img:
+                        if img.format not in RASTER_FORMATS:
+                            continue
+                except Exception as e:
+                    LOG.warning(f"Skipping a picture on slide {slide_number}: {e!r}")
+                    continue
+                digest = hashlib.sha1(blob).digest()
+                if digest not in seen:
+                    seen.add(digest)
+                    pictures.append(blob)
+            if slide.has_notes_slide:
+                notes = slide.notes_slide.notes_text_frame.text.strip()
+                if notes:
+                    lines.append(f"Notes: {notes}")
+
+            text = "\n".join(lines)
+            if pictures:
+                picture_slides[slide_number] = (text, pictures)
+            else:
+                # Empty slides are kept, so every slide is accounted for
+                text_slides[slide_number] = text
+        LOG.info(
+            f"Read {len(prs.slides)} slides of {os.path.basename(file_path)}, "
+            f"{len(picture_slides)} with pictures for the vision model"
+        )
+        return text_slides, picture_slides
+
+    def _usable_text(self, text: str, image_count: int) -> bool:
+        """
+        Whether a page's text layer can stand in for the vision model. Scanned and
+        image-only pages have little or no text, broken font encodings extract as
+        symbols, and charts extract as scattered labels and numbers.
+        """
+        chars = len(text)
+        if chars < self.config.text_layer_min_chars:
+            return False
+        readable = sum(
+            c.isalnum() or c.isspace() or c in TEXT_LAYER_PUNCTUATION for c in text
+        )
+        if readable / chars < 0.9:
+            return False
+        words = text.split()
+        wordlike = sum(
+            1 for w in words if len(w) <= 30 and sum(c.isalpha() for c in w) >= 2
+        )
+        if wordlike / len(words) < 0.6:
+            return False
+        # Pictures and charts need describing, unless the text dominates the page
+        return not image_count or chars >= self.config.text_layer_dense_chars
+
+    def _read_text_layer(self, file_path: str) -> dict[int, str]:
+        """
+        Read the embedded text of the PDF pages whose text layer is usable, keyed by
+        page number. The other pages are left to the vision model.
+        """
+        if (
+            not self.config.text_layer
+            or os.path.splitext(file_path)[1].lower() != ".pdf"
+        ):
+            return {}
+        try:
+            reader = PdfReader(file_path)
+            pages = list(reader.pages)
+        except Exception as e:
+            LOG.warning(f"Could not read the text layer of {file_path}: {e!r}")
+            return {}
+
+        text_pages = {}
+        for page_number, page in enumerate(pages, start=1):
+            try:
+                text = (page.extract_text() or "").strip()
+                image_count = len(page.images)
+            except Exception as e:
+                LOG.warning(f"Could not read the text of page {page_number}: {e!r}")
+                continue
+            if self._usable_text(text, image_count):
+                text_pages[page_number] = text
+        LOG.info(
+            f"Read {len(text_pages)} of {len(pages)} pages from the text layer of "
+            f"{os.path.basename(file_path)}"
+        )
+        return text_pages
+
+    @staticmethod
+    def _to_rgb(img: Image.Image) -> Image.Image:
+        """
+        Flatten the image onto a white background. Converting an image with alpha
+        straight to RGB drops the alpha, which turns transparent areas black.
+        """
+        if img.mode == "RGB":
+            return img
+        if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, "white")
+            background.paste(img, mask=img.getchannel("A"))
+            return background
+        return img.convert("RGB")
+
+    def _image_content(self, img: Image.Image) -> dict:
+        img = self._to_rgb(img)
+        # Scale down to what the vision model actually looks at
+        long_side, short_side = max(img.size), min(img.size)
+        scale = min(
+            1.0,
+            self.config.image_long_side / long_side,
+            self.config.image_short_side / short_side,
+        )
+        if scale < 1.0:
+            img = img.resize(
+                (round(img.width * scale), round(img.height * scale)),
+                Image.Resampling.LANCZOS,
+            )
+
+        image_format = self.config.image_format
+        buffer = io.BytesIO()
+        if image_format == "png":
+            img.save(buffer, format="PNG", optimize=True)
+        else:
+            img.save(
+                buffer, format=image_format.upper(), quality=self.config.image_quality
+            )
+        img_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+        img_data_url = f"data:image/{image_format};base64,{img_base64}"
+        return {"type": "image_url", "image_url": {"url": img_data_url}}
+
+    def _page_prompt(self, img: Image.Image, company_name: str) -> list:
+        return [
+            {
+                "type": "text",
+                "text": f"Extract text from this slide for the company {company_name}",
+            },
+            self._image_content(img),
+        ]
+
+    def _slide_prompt(self, slide: Tuple[str, List[bytes]], company_name: str) -> list:
+        text, pictures = slide
+        prompt = [
+            {
+                "type": "text",
+                "text": f"Extract text from this slide for the company {company_name}. "
+                "The text of the slide is below, describe the pictures on it and "
+                f"combine both.\n\n{text}",
+            }
+        ]
+        for blob in pictures:
+            with Image.open(io.BytesIO(blob)) as img:
+                prompt.append(self._image_content(img))
+        return prompt
+
+    @staticmethod
+    def _page_document(
+        response, file_name: str, company_name: str, page_number: int
+    ) -> Optional[Document]:
+        heading = response.content.heading.strip()
+        content = response.content.content.strip()
+        # Blank pages and slides without text or pictures come back empty
+        if not heading and not content:
+            return None
+        return Document(
+            content=f"Heading: {heading}\nContent: {content}",
+            name=file_name,
+            meta_data={
+                "company": company_name,
+                "file_name": file_name,
+                "page_number": page_number,
+                "extraction": "vision",
+            },
         )
 
+    @staticmethod
+    def _text_documents(
+        text_pages: dict[int, str],
+        file_name: str,
+        company_name: str,
+        extraction: str = "text_layer",
+    ) -> List[Document]:
+        """Documents for pages read without the vision model, headed by their first line"""
+        documents = []
+        for page_number, text in text_pages.items():
+            if not text:
+                continue
+            heading = text.splitlines()[0].strip()[:200]
+            if company_name:
+                heading = f"{company_name} - {heading}"
+            documents.append(
+                Document(
+                    content=f"Heading: {heading}\nContent: {text}",
+                    name=file_name,
+                    meta_data={
+                        "company": company_name,
+                        "file_name": file_name,
+                        "page_number": page_number,
+                        "extraction": extraction,
+                    },
+                )
+            )
+        return documents
+
+    @staticmethod
+    def _merge_pages(*documents: List[Document]) -> List[Document]:
+        return sorted(
+            (doc for docs in documents for doc in docs),
+            key=lambda doc: doc.meta_data["page_number"],
+        )
+
+    @staticmethod
+    def page_count(file_path: str) -> int:
+        """Number of pages or slides in the file"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext == ".pdf":
+            return len(PdfReader(file_path).pages)
+        if file_ext == ".pptx":
+            return len(Presentation(file_path).slides)
+        raise ValueError(UNSUPPORTED_FILE_MESSAGE)
+
+    def _split_pages(
+        self, file_path: str, skip_pages: frozenset[int] = frozenset()
+    ) -> Tuple[dict[int, str], str, Iterator[Tuple[int, Any]], Callable[..., list]]:
+        """
+        Split the file into the pages read natively, and the pages left for the
+        vision model along with how to prompt for them. PDF pages are read from their
+        text layer where it is usable and rasterized otherwise. Slides are read with
+        python-pptx, and only their embedded pictures go to the vision model.
+        Pages in skip_pages are left out altogether.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext == ".pdf":
+            text_pages = {
+                page_number: text
+                for page_number, text in self._read_text_layer(file_path).items()
+                if page_number not in skip_pages
+            }
+            vision_pages = self._iter_pages(
+                file_path, skip_pages | frozenset(text_pages)
+            )
+            return text_pages, "text_layer", vision_pages, self._page_prompt
+        if file_ext == ".pptx":
+            text_slides, picture_slides = self._read_slides(file_path)
+            text_slides = {n: t for n, t in text_slides.items() if n not in skip_pages}
+            picture_slides = (
+                (n, slide) for n, slide in picture_slides.items() if n not in skip_pages
+            )
+            return text_slides, "pptx", picture_slides, self._slide_prompt
+        raise ValueError(UNSUPPORTED_FILE_MESSAGE)
+
     def extract_text(
         self, file_path: str, file_name: str = None, company_name: str = None
     ) -> List[Document]:
-        file_ext = os.path.splitext(file_path)[1].lower()
-        images = []
         if not file_name:
             file_name = os.path.basename(file_path)
-        with TemporaryDirectory() as tmpdir:
-            if file_ext == ".pdf":
-                images = convert_from_path(file_path, dpi=300, output_folder=tmpdir)
-            elif file_ext in [".ppt", ".pptx"]:
-                prs = Presentation(file_path)
-                for i, slide in enumerate(prs.slides):
-                    width = prs.slide_width
-                    height = prs.slide_height
-                    img = Image.new("RGB", (width, height), "white")
-                    img_path = os.path.join(tmpdir, f"slide_{i + 1}.png")
-                    img.save(img_path)
-                    images.append(Image.open(img_path))
-            else:
-                raise ValueError(
-                    "Unsupported file type. Only PDF and PPTX are supported."
+        text_pages, extraction, vision_pages, prompt = self._split_pages(file_path)
+        agent = self._create_agent()
+        documents = []
+        for page_number, page in vision_pages:
+            response = agent.run(prompt(page, company_name))
+            LOG.info(f"Parsed page {page_number} text")
+            doc = self._page_document(response, file_name, company_name, page_number)
+            if doc is not None:
+                documents.append(doc)
+        return self._merge_pages(
+            self._text_documents(text_pages, file_name, company_name, extraction),
+            documents,
+        )
+
+    async def aextract_text(
+        self,
+        file_path: str,
+        file_name: str = None,
+        company_name: str = None,
+        skip_pages: frozenset[int] = frozenset(),
+        on_page: Optional[OnPage] = None,
+    ) -> List[Document]:
+        """
+        Async version of extract_text. Pages left for the vision model are prepared
+        one at a time in a worker thread and sent concurrently, up to
+        page_concurrency at a time, which also bounds the pages held in memory.
+        The documents are returned in page order.
+
+        Pages in skip_pages, e.g. extracted by an earlier attempt, are not extracted
+        again. on_page is awaited with every page extracted, and None for pages
+        without content, but not for pages that failed.
+        """
+        if not file_name:
+            file_name = os.path.basename(file_path)
+        text_pages, extraction, vision_pages, prompt = await asyncio.to_thread(
+            self._split_pages, file_path, skip_pages
+        )
+        text_documents = self._text_documents(
+            text_pages, file_name, company_name, extraction
+        )
+        if on_page is not None:
+            by_page = {doc.meta_data["page_number"]: doc for doc in text_documents}
+            for page_number in text_pages:
+                await on_page(page_number, by_page.get(page_number))
+        documents = await self._extract_pages(
+            vision_pages, file_name, company_name, prompt, on_page
+        )
+        return self._merge_pages(text_documents, documents)
+
+    async def _extract_pages(
+        self,
+        pages: Iterator[Tuple[int, Any]],
+        file_name: str,
+        company_name: str,
+        make_prompt: Optional[Callable[..., list]] = None,
+        on_page: Optional[OnPage] = None,
+    ) -> List[Document]:
+        semaphore = asyncio.Semaphore(self.config.page_concurrency)
+        make_prompt = make_prompt or self._page_prompt
+
+        async def extract(page_number: int, page: Any) -> Optional[Document]:
+            try:
+                prompt = await asyncio.to_thread(make_prompt, page, company_name)
+                # Only the much smaller encoded page is kept from here on
+                del page
+                for attempt in range(self.config.page_retries + 1):
+                    try:
+                        response = await asyncio.wait_for(
+                            self._create_agent().arun(prompt),
+                            timeout=self.config.page_timeout_seconds,
+                        )
+                        break
+                    except Exception as e:
+                        if attempt == self.config.page_retries:
+                            LOG.error(
+                                f"Skipping page {page_number} of {file_name} after "
+                                f"{attempt + 1} attempts: {e!r}"
+                            )
+                            return None
+                        delay = random.uniform(0, 2**attempt)
+                        LOG.warning(
+                            f"Page {page_number} of {file_name} failed with {e!r}, "
+                            f"retrying in {delay:.2f}s"
+                        )
+                        await asyncio.sleep(delay)
+                LOG.info(f"Parsed page {page_number} text")
+                doc = self._page_document(
+                    response, file_name, company_name, page_number
                 )
+                if on_page is not None:
+                    await on_page(page_number, doc)
+                return doc
+            finally:
+                semaphore.release()
 
-            documents = []
-            for i, img in enumerate(images):
-                if isinstance(img, PpmImageFile):
-                    img = img.convert("RGB")
-                buffer = io.BytesIO()
-                img.save(buffer, format="PNG")
-                img_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-                img_data_url = f"data:image/png;base64,{img_base64}"
-
-                prompt = [
-                    {
-                        "type": "text",
-                        "text": f"Extract text from this slide for the company {company_name}",
-                    },
-                    {"type": "image_url", "image_url": {"url": img_data_url}},
-                ]
-                response = self.agent.run(prompt)
-                text = f"Heading: {response.content.heading}\nContent: {response.content.content}"
-                LOG.info(f"Parsed page {i + 1} text")
-                text = text.strip()
-                if text:
-                    doc = Document(
-                        content=text,
-                        name=file_name,
-                        meta_data={
-                            "company": company_name,
-                            "file_name": file_name,
-                            "page_number": i + 1,
-                        },
-                    )
-                    documents.append(doc)
-            return documents
+        # The next page is only rasterized once a slot is free
+        tasks = []
+        try:
+            while True:
+                await semaphore.acquire()
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    semaphore.release()
+                    break
+                tasks.append(asyncio.create_task(extract(*page)))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Tasks were created in page order, and gather keeps that order
+        try:
+            documents = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return [doc for doc in documents if doc is not None]
 
     @staticmethod
     def upload_to_cloudinary(file_path: str, public_id: str = None) -> str:
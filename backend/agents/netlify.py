@@ -1,47 +1,205 @@
+import asyncio
 import hashlib
-import requests
-import uuid
-from backend.settings import NetlifyConfig
+import json
+import random
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Optional
+
+import aiohttp
+
+from backend.database.mongo import MongoDBConnector
+from backend.settings import MongoConnectionDetails, NetlifyConfig
+from backend.utils.logger import get_logger
+
+LOG = get_logger("NetlifyAgent")
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ChartIndex:
+    """
+    Persistent map from a chart's content key to the URL it was published at, so
+    identical charts are only rendered and uploaded once. Deploy URLs are permanent,
+    which lets entries live without expiry.
+    """
+
+    COLLECTION_NAME = "chart_index"
+
+    def __init__(
+        self, db_config: MongoConnectionDetails, collection_name: Optional[str] = None
+    ):
+        self.mongo_connector = MongoDBConnector(db_config)
+        # Each chart store keeps its own index, as the URLs differ between stores
+        if collection_name:
+            self.COLLECTION_NAME = collection_name
+
+    async def aget_many(self, keys: list[str]) -> dict[str, str]:
+        """Return the published URL of each key that is in the index"""
+        if not keys:
+            return {}
+        collection = await self.mongo_connector.aget_collection(self.COLLECTION_NAME)
+        cursor = collection.find({"_id": {"$in": list(keys)}}, {"url": 1})
+        return {doc["_id"]: doc["url"] async for doc in cursor}
+
+    async def aset_many(self, urls: dict[str, str]) -> None:
+        """Record the published URL of each key"""
+        if not urls:
+            return
+        from pymongo import UpdateOne
+
+        now = datetime.now(timezone.utc)
+        collection = await self.mongo_connector.aget_collection(self.COLLECTION_NAME)
+        await collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": key},
+                    {"$set": {"url": url}, "$setOnInsert": {"created_at": now}},
+                    upsert=True,
+                )
+                for key, url in urls.items()
+            ],
+            ordered=False,
+        )
 
 
 class NetlifyAgent:
     """
     Agent to upload HTML files to Netlify via the Deploy API and return the public URL.
+
+    Requests go through one keep-alive connection pool per event loop, kept for the
+    lifetime of the agent. The pool size bounds concurrent requests, and requests
+    are retried with jittered exponential backoff on 429, 5xx and network errors.
     """
 
-    def __init__(self, netlify_config: NetlifyConfig):
+    def __init__(
+        self,
+        netlify_config: NetlifyConfig,
+        db_config: Optional[MongoConnectionDetails] = None,
+    ):
+        # Without a database, charts are still content-addressed but not deduplicated
+        self.chart_index = ChartIndex(db_config) if db_config else None
         self.site_id = netlify_config.site_id
         self.auth_token = netlify_config.auth_token
-        self.api_base = f"https://api.netlify.com/api/v1/sites/{self.site_id}"
+        self.api_url = netlify_config.api_url.rstrip("/")
+        self.api_base = f"{self.api_url}/sites/{self.site_id}"
         self.headers = {"Authorization": f"Bearer {self.auth_token}"}
+        self.max_connections = netlify_config.max_connections
+        self.timeout = aiohttp.ClientTimeout(total=netlify_config.timeout_seconds)
+        self.max_retries = netlify_config.max_retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # A session is bound to the loop it was created on
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            stale = self._session
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, keepalive_timeout=60, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=self.headers, timeout=self.timeout
+            )
+            self._session_loop = loop
+            if stale is not None:
+                await self._close_session(stale)
+        return self._session
+
+    @staticmethod
+    async def _close_session(session: aiohttp.ClientSession) -> None:
+        if not session.closed:
+            # Connections of a session left by a closed loop cannot be shut down
+            # cleanly, they went with the loop
+            with suppress(RuntimeError):
+                await session.close()
+
+    async def aclose(self) -> None:
+        """Close the connection pool. Meant to be called once on application shutdown."""
+        session, self._session = self._session, None
+        if session is not None:
+            await self._close_session(session)
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), 30.0)
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent uploads from retrying in lockstep
+        return random.uniform(0, min(8.0, 0.25 * 2**attempt))
+
+    async def _request(self, action: str, method: str, url: str, **kwargs) -> dict:
+        session = await self._get_session()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with session.request(method, url, **kwargs) as resp:
+                    text = await resp.text()
+                    if resp.status not in RETRY_STATUSES or attempt == self.max_retries:
+                        if resp.status >= 400:
+                            raise Exception(f"Netlify {action} failed: {text}")
+                        return json.loads(text) if text else {}
+                    retry_after = resp.headers.get("Retry-After")
+                    reason = f"status {resp.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise Exception(f"Netlify {action} failed: {e!r}") from e
+                reason = repr(e)
+            delay = self._retry_delay(attempt, retry_after)
+            LOG.warning(
+                f"Netlify {action} failed with {reason}, retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
 
     async def upload_html(self, file_path: str) -> str:
         """
         Upload an HTML file to Netlify under the charts/ folder and return the public URL.
         """
-        # Read file content and calculate SHA1
         with open(file_path, "rb") as f:
             content = f.read()
-        sha1 = hashlib.sha1(content).hexdigest()
-        unique_filename = f"{uuid.uuid4()}.html"
-        netlify_path = f"charts/{unique_filename}"
-        # Step 1: Create deploy with file hash
-        deploy_url = f"{self.api_base}/deploys"
-        data = {"files": {f"/{netlify_path}": sha1}}
-        resp = requests.post(deploy_url, json=data, headers=self.headers)
-        if not resp.ok:
-            raise Exception(f"Netlify deploy creation failed: {resp.text}")
-        deploy = resp.json()
-        deploy_id = deploy["id"]
-        # Step 2: Upload the file blob
-        upload_url = (
-            f"https://api.netlify.com/api/v1/deploys/{deploy_id}/files/{netlify_path}"
+        netlify_path = f"charts/{hashlib.sha1(content).hexdigest()}.html"
+        urls = await self.upload_files({netlify_path: content})
+        return urls[netlify_path]
+
+    async def upload_files(self, files: dict[str, bytes]) -> dict[str, str]:
+        """
+        Publish several files in a single deploy and return the public URL of each,
+        keyed by its path. Only blobs that Netlify does not already have are uploaded.
+        """
+        digests = {
+            path: hashlib.sha1(content).hexdigest() for path, content in files.items()
+        }
+        # Step 1: Create one deploy with the hashes of all files
+        deploy = await self._request(
+            "deploy creation",
+            "POST",
+            f"{self.api_base}/deploys",
+            json={"files": {f"/{path}": sha1 for path, sha1 in digests.items()}},
         )
-        resp = requests.put(upload_url, data=content, headers=self.headers)
-        if not resp.ok:
-            raise Exception(f"Netlify file upload failed: {resp.text}")
-        # Step 3: Get the public URL
-        public_url = (
-            f"https://{deploy['deploy_ssl_url'].replace('https://', '')}/{netlify_path}"
+        deploy_id = deploy["id"]
+        # Step 2: Upload the blobs Netlify reports as missing, once per distinct hash
+        required = set(deploy.get("required", digests.values()))
+        uploads = {}
+        for path, sha1 in digests.items():
+            if sha1 in required and sha1 not in uploads:
+                uploads[sha1] = self._request(
+                    "file upload",
+                    "PUT",
+                    f"{self.api_url}/deploys/{deploy_id}/files/{path}",
+                    data=files[path],
+                    headers={"Content-Type": "application/octet-stream"},
+                )
+        await asyncio.gather(*uploads.values())
+        LOG.info(
+            f"Deployed {len(files)} files to Netlify, uploaded {len(uploads)} blobs"
         )
-        return public_url
+        # Step 3: Get the public URLs
+        host = deploy["deploy_ssl_url"].replace("https://", "")
+        return {path: f"https://{host}/{path}" for path in files}
@@ -1,9 +1,55 @@
-from typing import Type
+import json
+import re
+import threading
+from typing import Optional, Type
 
 from agno.models.azure import AzureOpenAI
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from agno.agent import Agent
 
+from backend.utils.logger import get_logger
+
+LOG = get_logger("LLMOutputParser")
+
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+class ParseStats:
+    """Counts how each endpoint's LLM output ended up in its response model."""
+
+    def __init__(self):
+        # Output was already an instance of the model, i.e. structured generation
+        self.structured = 0
+        # Output was JSON that validated against the model without an LLM
+        self.local = 0
+        # The parser LLM had to be called
+        self.fallback = 0
+
+    def as_dict(self) -> dict:
+        total = self.structured + self.local + self.fallback
+        return {
+            "structured": self.structured,
+            "local": self.local,
+            "fallback": self.fallback,
+            "fallback_ratio": self.fallback / total if total else 0.0,
+        }
+
+
+_PARSE_STATS: dict[str, ParseStats] = {}
+_PARSE_STATS_LOCK = threading.Lock()
+
+
+def _record(endpoint: str, outcome: str) -> None:
+    with _PARSE_STATS_LOCK:
+        stats = _PARSE_STATS.setdefault(endpoint, ParseStats())
+        setattr(stats, outcome, getattr(stats, outcome) + 1)
+
+
+def get_parse_stats() -> dict:
+    """Per-endpoint counts of structured, locally parsed and fallback parses"""
+    with _PARSE_STATS_LOCK:
+        return {endpoint: s.as_dict() for endpoint, s in _PARSE_STATS.items()}
+
 
 class LLMOutputParserAgent:
     """
@@ -13,11 +59,8 @@ class LLMOutputParserAgent:
     def __init__(self, model: AzureOpenAI):
         self.model = model
 
-    def parse(self, content: str | dict, response_model: Type[BaseModel]) -> BaseModel:
-        """
-        Given a string and a response model class, use the LLM to convert the string into the response model structure.
-        """
-        agent = Agent(
+    def _create_agent(self, response_model: Type[BaseModel]) -> Agent:
+        return Agent(
             model=self.model,
             instructions="""
             You are a strict output parser and a summary generator.
@@ -32,5 +75,62 @@ class LLMOutputParserAgent:
             """,
             response_model=response_model,
         )
+
+    @staticmethod
+    def parse_local(
+        content: str | dict | BaseModel, response_model: Type[BaseModel]
+    ) -> Optional[BaseModel]:
+        """
+        Validate content against the response model without calling an LLM. Accepts
+        model instances, dicts and JSON text, optionally inside a markdown fence.
+        Returns None when the content does not validate.
+        """
+        if isinstance(content, response_model):
+            return content
+        if isinstance(content, str):
+            fenced = _JSON_FENCE.search(content)
+            text = fenced.group(1) if fenced else content
+            start, end = text.find("{"), text.rfind("}")
+            if start == -1 or end <= start:
+                return None
+            try:
+                content = json.loads(text[start : end + 1])
+            except json.JSONDecodeError:
+                return None
+        if not isinstance(content, dict):
+            return None
+        try:
+            return response_model.model_validate(content)
+        except ValidationError:
+            return None
+
+    def parse(self, content: str | dict, response_model: Type[BaseModel]) -> BaseModel:
+        """
+        Given a string and a response model class, use the LLM to convert the string into the response model structure.
+        """
+        agent = self._create_agent(response_model)
         response = agent.run(f"Parse this content: {content}")
         return response.content
+
+    async def aparse(
+        self,
+        content: str | dict | BaseModel,
+        response_model: Type[BaseModel],
+        endpoint: Optional[str] = None,
+    ) -> BaseModel:
+        """
+        Async version of parse. Content that already validates against the response
+        model, e.g. from structured generation, is returned without calling the
+        parser LLM, which only runs as a fallback.
+        """
+        endpoint = endpoint or response_model.__name__
+        parsed = self.parse_local(content, response_model)
+        if parsed is not None:
+            _record(endpoint, "structured" if parsed is content else "local")
+            return parsed
+
+        LOG.info(f"Falling back to the parser LLM for {endpoint}")
+        _record(endpoint, "fallback")
+        agent = self._create_agent(response_model)
+        response = await agent.arun(f"Parse this content: {content}")
+        return response.content
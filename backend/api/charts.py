@@ -0,0 +1,76 @@
+import re
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from fastapi_utils.cbv import cbv
+
+from backend.plot.store import ENCODINGS, get_chart_store
+
+charts_router = APIRouter(prefix="/charts", tags=["charts"])
+
+_CHART_HASH = re.compile(r"^[0-9a-f]{40}$")
+# Charts are content-addressed, so a URL always serves the same bytes
+_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def _etag(chart_hash: str, encoding: Optional[str]) -> str:
+    # Each encoding is a different body, so each gets its own strong ETag
+    return f'"{chart_hash}-{encoding}"' if encoding else f'"{chart_hash}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+@cbv(charts_router)
+class ChartsAPI:
+    @charts_router.get("/{chart_hash}")
+    async def get_chart(self, chart_hash: str, request: Request):
+        """
+        Serve a chart from the local chart store. Responses are cacheable forever and
+        sent precompressed when the client accepts it, with a strong ETag per
+        encoding.
+        """
+        if not _CHART_HASH.match(chart_hash):
+            raise HTTPException(status_code=404, detail="Chart not found")
+
+        headers = {"Cache-Control": _CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        if_none_match = request.headers.get("if-none-match", "")
+        # Every stored chart has all ENCODINGS, so the encoding it would be served
+        # in, and its ETag, are known without looking the chart up
+        preferred = next((e for e in ENCODINGS if e in accepted), None)
+        if if_none_match and _etag_matches(if_none_match, _etag(chart_hash, preferred)):
+            headers["ETag"] = _etag(chart_hash, preferred)
+            if preferred:
+                headers["Content-Encoding"] = preferred
+            return Response(status_code=304, headers=headers)
+
+        chart = await get_chart_store().aget(chart_hash)
+        if chart is None:
+            raise HTTPException(status_code=404, detail="Chart not found")
+
+        # Charts stored before an encoding was available fall back to the next one
+        encoding = next((e for e in ENCODINGS if e in accepted and chart.get(e)), None)
+        content = chart[encoding] if encoding else chart["content"]
+        headers["ETag"] = _etag(chart_hash, encoding)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=bytes(content), media_type=chart["content_type"], headers=headers
+        )
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, UploadFile, HTTPException, Query, Depends
 
 from backend.models.requests.auth import Documents
+from backend.models.response.files import IngestionJobResponse
 from backend.services.files import FilesService
 from fastapi.responses import FileResponse, Response
 from backend.dependencies import get_files_service
 from fastapi_utils.cbv import cbv
+from starlette import status
 import os
 
 files_router = APIRouter(prefix="/files", tags=["files"])
@@ -14,10 +16,22 @@ files_router = APIRouter(prefix="/files", tags=["files"])
 class FilesAPI:
     files_service: FilesService = Depends(get_files_service)
 
-    @files_router.post("/upload/{company_name}")
+    @files_router.post(
+        "/upload/{company_name}",
+        response_model=IngestionJobResponse,
+        status_code=status.HTTP_202_ACCEPTED,
+    )
     async def upload_file(self, company_name: str, file: UploadFile):
         return await self.files_service.upload_file(file, company_name)
 
+    @files_router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+    async def get_ingestion_job(self, job_id: str):
+        return await self.files_service.get_ingestion_job(job_id)
+
+    @files_router.post("/jobs/{job_id}/retry", response_model=IngestionJobResponse)
+    async def retry_ingestion_job(self, job_id: str):
+        return await self.files_service.retry_ingestion_job(job_id)
+
     @files_router.get("/get-files/{company_name}", response_model=Documents)
     async def get_company_docs(self, company_name: str):
         try:
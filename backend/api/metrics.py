@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from fastapi_utils.cbv import cbv
+
+from backend.agents.output_parser import get_parse_stats
+from backend.dependencies import get_cache_service
+from backend.services.cache import CacheService
+
+metrics_router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@cbv(metrics_router)
+class MetricsAPI:
+    @metrics_router.get("/llm-parsing")
+    async def get_llm_parsing_metrics(self) -> dict:
+        """
+        Per-endpoint counts of how LLM output was turned into the response model:
+        structured generation, local JSON validation, or the parser LLM fallback.
+        Counters are per worker process.
+        """
+        return get_parse_stats()
+
+    @metrics_router.get("/cache")
+    async def get_cache_metrics(
+        self, cache_service: CacheService = Depends(get_cache_service)
+    ) -> dict:
+        """
+        Hit and miss counters of the in-memory and MongoDB cache tiers, along with
+        the size of the in-memory tier. Counters are per worker process.
+        """
+        return cache_service.get_stats()
@@ -1,3 +1,4 @@
+import threading
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 
@@ -9,12 +10,79 @@ from backend.utils.time_utils import show_time_taken
 
 if TYPE_CHECKING:
     # Only imported for type checking
-    from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+    from motor.motor_asyncio import (
+        AsyncIOMotorClient,
+        AsyncIOMotorCollection,
+        AsyncIOMotorDatabase,
+    )
+    from pymongo import MongoClient
     from pymongo.collection import Collection
     from pymongo.synchronous.database import Database
 
 LOG = get_logger()
 
+# Process-wide client registry keyed by connection URI. pymongo and motor clients
+# are thread-safe and manage their own connection pools, so every connector in the
+# process shares one sync and one async client per URI.
+_SYNC_CLIENTS: dict[str, "MongoClient"] = {}
+_ASYNC_CLIENTS: dict[str, "AsyncIOMotorClient"] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_mongo_client(uri: str, **pool_options) -> "MongoClient":
+    """
+    Return the shared pymongo client for the given URI, creating it on first use.
+    Pool options are only applied when the client is created.
+    """
+    client = _SYNC_CLIENTS.get(uri)
+    if client is not None:
+        return client
+
+    with _CLIENTS_LOCK:
+        client = _SYNC_CLIENTS.get(uri)
+        if client is None:
+            from pymongo import MongoClient
+
+            client = MongoClient(uri, **pool_options)
+            _SYNC_CLIENTS[uri] = client
+            LOG.info(f"Created pooled MongoClient with options {pool_options}")
+    return client
+
+
+def get_async_mongo_client(uri: str, **pool_options) -> "AsyncIOMotorClient":
+    """
+    Return the shared motor client for the given URI, creating it on first use.
+    Pool options are only applied when the client is created.
+    """
+    client = _ASYNC_CLIENTS.get(uri)
+    if client is not None:
+        return client
+
+    with _CLIENTS_LOCK:
+        client = _ASYNC_CLIENTS.get(uri)
+        if client is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            client = AsyncIOMotorClient(uri, **pool_options)
+            _ASYNC_CLIENTS[uri] = client
+            LOG.info(f"Created pooled AsyncIOMotorClient with options {pool_options}")
+    return client
+
+
+def close_mongo_clients():
+    """Close every pooled client. Meant to be called once on application shutdown."""
+    with _CLIENTS_LOCK:
+        for client in list(_SYNC_CLIENTS.values()) + list(_ASYNC_CLIENTS.values()):
+            try:
+                client.close()
+            except Exception as e:
+                LOG.info(f"Failed to close mongo client due to {e}")
+        LOG.info(
+            f"Closed {len(_SYNC_CLIENTS)} sync and {len(_ASYNC_CLIENTS)} async mongo clients"
+        )
+        _SYNC_CLIENTS.clear()
+        _ASYNC_CLIENTS.clear()
+
 
 class MongoIndexSpec(BaseModel):
     keys: list[tuple[str, int]] = Field(
@@ -27,6 +95,11 @@ class MongoIndexSpec(BaseModel):
     background: Optional[bool] = Field(
         False, description="Whether to build the index in the background."
     )
+    expire_after_seconds: Optional[int] = Field(
+        None,
+        description="Makes this a TTL index: documents are removed by MongoDB this "
+        "many seconds after the date in the indexed field.",
+    )
 
 
 class MongoDBConnector:
@@ -39,23 +112,21 @@ class MongoDBConnector:
         self._connection_details = connection_details
         self._uri = str(self._connection_details)
         self._db_name = self._connection_details.dbname
+        self._pool_options = self._connection_details.get_pool_options()
 
         self.log_time_taken = log_time_taken
         self.log_query = log_query
 
     # sync implementations
-    def get_collection(self, collection_name: str) -> "Collection":
-        from pymongo import MongoClient
+    def get_client(self) -> "MongoClient":
+        return get_mongo_client(self._uri, **self._pool_options)
 
-        client = MongoClient(self._uri)
-        db = client[self._db_name]
+    def get_collection(self, collection_name: str) -> "Collection":
+        db = self.get_client()[self._db_name]
         return db[collection_name]
 
     def get_database(self) -> "Database":
-        from pymongo import MongoClient
-
-        client = MongoClient(self._uri)
-        return client[self._db_name]
+        return self.get_client()[self._db_name]
 
     def query(self, collection_name: str, query: dict) -> list:
         s = datetime.now()
@@ -124,11 +195,15 @@ class MongoDBConnector:
                 )
             else:
                 # Create the index if it doesn't exist
+                options = {}
+                if index_spec.expire_after_seconds is not None:
+                    options["expireAfterSeconds"] = index_spec.expire_after_seconds
                 index_name = collection_obj.create_index(
                     index_spec.keys,
                     name=index_spec.name,
                     unique=index_spec.unique,
                     background=index_spec.background,
+                    **options,
                 )
                 created_indices.append(index_name)
                 LOG.info(f"Created index: {index_name}")
@@ -136,18 +211,15 @@ class MongoDBConnector:
         return created_indices
 
     # async implementations
-    async def aget_collection(self, collection_name: str) -> "AsyncIOMotorCollection":
-        from motor.motor_asyncio import AsyncIOMotorClient
+    def aget_client(self) -> "AsyncIOMotorClient":
+        return get_async_mongo_client(self._uri, **self._pool_options)
 
-        client = AsyncIOMotorClient(self._uri)
-        db = client[self._db_name]
+    async def aget_collection(self, collection_name: str) -> "AsyncIOMotorCollection":
+        db = self.aget_client()[self._db_name]
         return db[collection_name]
 
     async def aget_database(self) -> "AsyncIOMotorDatabase":
-        from motor.motor_asyncio import AsyncIOMotorClient
-
-        client = AsyncIOMotorClient(self._uri)
-        return client[self._db_name]
+        return self.aget_client()[self._db_name]
 
     def insert_records(self, collection_name: str, records: list[dict]):
         collection_obj = self.get_collection(collection_name)
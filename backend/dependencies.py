@@ -7,7 +7,12 @@ from backend.services.companies import CompaniesService
 from backend.services.news import NewsService
 from backend.services.chat import ChatService
 from backend.services.files import FilesService
+from backend.services.ingestion import IngestionService
 from backend.settings import get_app_settings, AppSettings
+import threading
+from functools import lru_cache
+from typing import Any, Callable
+
 from fastapi import Request, Depends
 from backend.services.finance import FinanceService
 from backend.services.market_analysis import MarketAnalysisService
@@ -29,208 +34,337 @@ async def get_user(request: Request):
 
     return None
 
-
-def get_cache_service(app_settings: AppSettings = Depends(get_app_settings)):
-    return CacheService(app_settings.db_config)
+
+class ServiceContainer:
+    """
+    Process-wide service graph. Services keep no per-request state, so each one is
+    built once on first use and shared by every request; request-scoped state such
+    as the current user stays in per-request dependencies.
+    """
+
+    def __init__(self, app_settings: AppSettings):
+        self.app_settings = app_settings
+        self._instances: dict[str, Any] = {}
+        # Re-entrant since building a service resolves the services it depends on
+        self._lock = threading.RLock()
+
+    def _singleton(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = factory()
+        return instance
+
+    def _with_cache(self, service):
+        service.cache_service = self.cache_service
+        return service
+
+    @property
+    def cache_service(self) -> CacheService:
+        return self._singleton(
+            "cache_service",
+            lambda: CacheService(
+                self.app_settings.db_config, self.app_settings.cache_config
+            ),
+        )
+
+    @property
+    def netlify_agent(self) -> NetlifyAgent:
+        return self._singleton(
+            "netlify_agent",
+            lambda: NetlifyAgent(
+                self.app_settings.netlify_config, self.app_settings.db_config
+            ),
+        )
+
+    @property
+    def knowledge_base_service(self) -> KnowledgeBaseService:
+        return self._singleton(
+            "knowledge_base_service",
+            lambda: KnowledgeBaseService(
+                self.app_settings.db_config,
+                self.app_settings.vector_store_config,
+            ),
+        )
+
+    @property
+    def news_service(self) -> NewsService:
+        return self._singleton(
+            "news_service",
+            lambda: self._with_cache(
+                NewsService(
+                    self.app_settings.db_config,
+                    self.app_settings.llm_config,
+                    self.app_settings.sonar_config,
+                )
+            ),
+        )
+
+    @property
+    def auth_service(self) -> AuthService:
+        return self._singleton(
+            "auth_service",
+            lambda: AuthService(
+                self.app_settings.db_config, self.app_settings.jwt_config
+            ),
+        )
+
+    @property
+    def company_service(self) -> CompaniesService:
+        return self._singleton(
+            "company_service",
+            lambda: self._with_cache(CompaniesService(self.app_settings.db_config)),
+        )
+
+    @property
+    def chat_service(self) -> ChatService:
+        return self._singleton(
+            "chat_service",
+            lambda: ChatService(
+                self.app_settings.llm_config,
+                self.app_settings.db_config,
+                self.app_settings.mcp_url,
+            ),
+        )
+
+    @property
+    def document_processing_engine(self) -> DocumentProcessingEngine:
+        return self._singleton(
+            "document_processing_engine",
+            lambda: DocumentProcessingEngine(
+                get_model(self.app_settings.llm_config),
+                self.app_settings.storage_config,
+                self.app_settings.document_processing_config,
+            ),
+        )
+
+    @property
+    def vector_store(self) -> VectorStore:
+        return self._singleton(
+            "vector_store",
+            lambda: VectorStore(
+                self.app_settings.db_config, self.app_settings.vector_store_config
+            ),
+        )
+
+    @property
+    def ingestion_service(self) -> IngestionService:
+        return self._singleton(
+            "ingestion_service",
+            lambda: IngestionService(
+                doc_engine=self.document_processing_engine,
+                vector_store=self.vector_store,
+                mongo_config=self.app_settings.db_config,
+                ingestion_config=self.app_settings.ingestion_config,
+            ),
+        )
+
+    @property
+    def files_service(self) -> FilesService:
+        return self._singleton(
+            "files_service",
+            lambda: FilesService(
+                doc_engine=self.document_processing_engine,
+                vector_store=self.vector_store,
+                mongo_config=self.app_settings.db_config,
+                ingestion_service=self.ingestion_service,
+            ),
+        )
+
+    @property
+    def finance_service(self) -> FinanceService:
+        return self._singleton(
+            "finance_service",
+            lambda: self._with_cache(
+                FinanceService(
+                    self.app_settings.llm_config,
+                    self.app_settings.sonar_config,
+                    self.knowledge_base_service,
+                    self.netlify_agent,
+                )
+            ),
+        )
+
+    @property
+    def market_analysis_service(self) -> MarketAnalysisService:
+        return self._singleton(
+            "market_analysis_service",
+            lambda: self._with_cache(
+                MarketAnalysisService(
+                    self.app_settings.llm_config,
+                    self.app_settings.sonar_config,
+                    self.netlify_agent,
+                )
+            ),
+        )
+
+    @property
+    def linkedin_team_service(self) -> TeamService:
+        return self._singleton(
+            "linkedin_team_service",
+            lambda: self._with_cache(
+                TeamService(
+                    self.app_settings.llm_config,
+                    self.app_settings.sonar_config,
+                    self.netlify_agent,
+                )
+            ),
+        )
+
+    @property
+    def customer_sentiment_service(self) -> CustomerSentimentService:
+        return self._singleton(
+            "customer_sentiment_service",
+            lambda: self._with_cache(
+                CustomerSentimentService(
+                    self.app_settings.llm_config,
+                    self.app_settings.sonar_config,
+                    self.netlify_agent,
+                )
+            ),
+        )
+
+    @property
+    def partnership_network_service(self) -> PartnershipNetworkService:
+        return self._singleton(
+            "partnership_network_service",
+            lambda: self._with_cache(PartnershipNetworkService(self.netlify_agent)),
+        )
+
+    @property
+    def search_service(self) -> SearchService:
+        return self._singleton(
+            "search_service",
+            lambda: self._with_cache(
+                SearchService(
+                    self.app_settings.llm_config,
+                    self.app_settings.sonar_config,
+                    self.knowledge_base_service,
+                    self.netlify_agent,
+                )
+            ),
+        )
+
+    @property
+    def regulatory_compliance_service(self) -> RegulatoryComplianceService:
+        return self._singleton(
+            "regulatory_compliance_service",
+            lambda: self._with_cache(RegulatoryComplianceService(self.netlify_agent)),
+        )
+
+    @property
+    def risk_analysis_service(self) -> RiskAnalysisService:
+        return self._singleton(
+            "risk_analysis_service",
+            lambda: self._with_cache(RiskAnalysisService(self.netlify_agent)),
+        )
+
+    @property
+    def research_service(self) -> ResearchService:
+        return self._singleton(
+            "research_service",
+            lambda: self._with_cache(
+                ResearchService(
+                    finance_service=self.finance_service,
+                    linkedin_team_service=self.linkedin_team_service,
+                    market_analysis_service=self.market_analysis_service,
+                    partnership_network_service=self.partnership_network_service,
+                    customer_sentiment_service=self.customer_sentiment_service,
+                    regulatory_compliance_service=self.regulatory_compliance_service,
+                    risk_analysis_service=self.risk_analysis_service,
+                    db_config=self.app_settings.db_config,
+                    llm_config=self.app_settings.llm_config,
+                    knowledge_base_service=self.knowledge_base_service,
+                    netlify_agent=self.netlify_agent,
+                    research_config=self.app_settings.research_config,
+                )
+            ),
+        )
+
+
+@lru_cache
+def get_service_container() -> ServiceContainer:
+    return ServiceContainer(get_app_settings())
+
+
+# The providers below are async so FastAPI resolves them inline on the event loop
+# instead of dispatching each one to the threadpool.
+async def get_cache_service() -> CacheService:
+    return get_service_container().cache_service
+
+
+async def get_knowledge_base_service() -> KnowledgeBaseService:
+    return get_service_container().knowledge_base_service
+
+
+async def get_news_service() -> NewsService:
+    return get_service_container().news_service
+
+
+async def get_auth_service_settings() -> AuthService:
+    return get_service_container().auth_service
+
+
+async def get_company_service() -> CompaniesService:
+    return get_service_container().company_service
+
+
+async def get_chat_service() -> ChatService:
+    return get_service_container().chat_service
+
+
+async def get_document_processing_engine() -> DocumentProcessingEngine:
+    return get_service_container().document_processing_engine
+
+
+async def get_vector_store() -> VectorStore:
+    return get_service_container().vector_store
+
+
+async def get_files_service() -> FilesService:
+    return get_service_container().files_service
+
+
+async def get_netlify_agent() -> NetlifyAgent:
+    return get_service_container().netlify_agent
+
+
+async def get_finance_service() -> FinanceService:
+    return get_service_container().finance_service
+
+
+async def get_market_analysis_service() -> MarketAnalysisService:
+    return get_service_container().market_analysis_service
+
+
+async def get_linkedin_team_service() -> TeamService:
+    return get_service_container().linkedin_team_service
+
+
+async def get_customer_sentiment_service() -> CustomerSentimentService:
+    return get_service_container().customer_sentiment_service
+
+
+async def get_partnership_network_service() -> PartnershipNetworkService:
+    return get_service_container().partnership_network_service
+
+
+async def get_search_service() -> SearchService:
+    return get_service_container().search_service
+
+
+async def get_regulatory_compliance_service() -> RegulatoryComplianceService:
+    return get_service_container().regulatory_compliance_service
+
+
+async def get_risk_analysis_service() -> RiskAnalysisService:
+    return get_service_container().risk_analysis_service
 
 
-def get_knowledge_base_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = KnowledgeBaseService(
-        app_settings.db_config,
-        app_settings.vector_store_config,
-    )
-    return service
-
-
-def get_news_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = NewsService(
-        app_settings.db_config, app_settings.llm_config, app_settings.sonar_config
-    )
-    service.cache_service = cache_service
-    return service
-
-
-def get_auth_service_settings(
-    app_settings: AppSettings = Depends(get_app_settings),
-):
-    service = AuthService(app_settings.db_config, app_settings.jwt_config)
-    return service
-
-
-def get_company_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = CompaniesService(app_settings.db_config)
-    service.cache_service = cache_service
-    return service
-
-
-def get_chat_service(app_settings: AppSettings = Depends(get_app_settings)):
-    return ChatService(
-        app_settings.llm_config, app_settings.db_config, app_settings.mcp_url
-    )
-
-
-def get_document_processing_engine(
-    app_settings: AppSettings = Depends(get_app_settings),
-):
-    return DocumentProcessingEngine(
-        get_model(app_settings.llm_config), app_settings.storage_config
-    )
-
-
-def get_vector_store(app_settings: AppSettings = Depends(get_app_settings)):
-    return VectorStore(app_settings.db_config, app_settings.vector_store_config)
-
-
-def get_files_service(
-    doc_engine=Depends(get_document_processing_engine),
-    vector_store=Depends(get_vector_store),
-    app_settings: AppSettings = Depends(get_app_settings),
-):
-    return FilesService(
-        doc_engine=doc_engine,
-        vector_store=vector_store,
-        mongo_config=app_settings.db_config,
-    )
-
-
-def get_netlify_agent(app_settings: AppSettings = Depends(get_app_settings)):
-    return NetlifyAgent(app_settings.netlify_config)
-
-
-def get_finance_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    knowledge_base_service=Depends(get_knowledge_base_service),
-    netlify_agent=Depends(get_netlify_agent),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = FinanceService(
-        app_settings.llm_config,
-        app_settings.sonar_config,
-        knowledge_base_service,
-        netlify_agent,
-    )
-    service.cache_service = cache_service
-    return service
-
-
-def get_market_analysis_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    netlify_agent=Depends(get_netlify_agent),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = MarketAnalysisService(
-        app_settings.llm_config, app_settings.sonar_config, netlify_agent
-    )
-    service.cache_service = cache_service
-    return service
-
-
-def get_linkedin_team_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    netlify_agent=Depends(get_netlify_agent),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = TeamService(
-        app_settings.llm_config,
-        app_settings.sonar_config,
-        netlify_agent,
-    )
-    service.cache_service = cache_service
-    return service
-
-
-def get_customer_sentiment_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    netlify_agent=Depends(get_netlify_agent),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = CustomerSentimentService(
-        app_settings.llm_config, app_settings.sonar_config, netlify_agent
-    )
-    service.cache_service = cache_service
-    return service
-
-
-def get_partnership_network_service(
-    netlify_agent=Depends(get_netlify_agent),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = PartnershipNetworkService(netlify_agent)
-    service.cache_service = cache_service
-    return service
-
-
-def get_search_service(
-    app_settings: AppSettings = Depends(get_app_settings),
-    netlify_agent=Depends(get_netlify_agent),
-    knowledge_base_service=Depends(get_knowledge_base_service),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = SearchService(
-        app_settings.llm_config,
-        app_settings.sonar_config,
-        knowledge_base_service,
-        netlify_agent,
-    )
-    service.cache_service = cache_service
-    return service
-
-
-def get_regulatory_compliance_service(
-    netlify_agent=Depends(get_netlify_agent),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = RegulatoryComplianceService(netlify_agent)
-    service.cache_service = cache_service
-    return service
-
-
-def get_risk_analysis_service(
-    netlify_agent=Depends(get_netlify_agent),
-    cache_service: CacheService = Depends(get_cache_service),
-):
-    service = RiskAnalysisService(netlify_agent)
-    service.cache_service = cache_service
-    return service
-
-
-def get_research_service(
-    finance_service=Depends(get_finance_service),
-    linkedin_team_service=Depends(get_linkedin_team_service),
-    market_analysis_service=Depends(get_market_analysis_service),
-    partnership_network_service=Depends(get_partnership_network_service),
-    customer_sentiment_service=Depends(get_customer_sentiment_service),
-    regulatory_compliance_service=Depends(get_regulatory_compliance_service),
-    risk_analysis_service=Depends(get_risk_analysis_service),
-    cache_service: CacheService = Depends(get_cache_service),
-    app_settings: AppSettings = Depends(get_app_settings),
-    knowledge_base_service=Depends(get_knowledge_base_service),
-    netlify_agent=Depends(get_netlify_agent),
-):
-    service = ResearchService(
-        finance_service=finance_service,
-        linkedin_team_service=linkedin_team_service,
-        market_analysis_service=market_analysis_service,
-        partnership_network_service=partnership_network_service,
-        customer_sentiment_service=customer_sentiment_service,
-        regulatory_compliance_service=regulatory_compliance_service,
-        risk_analysis_service=risk_analysis_service,
-        db_config=app_settings.db_config,
-        llm_config=app_settings.llm_config,
-        knowledge_base_service=knowledge_base_service,
-        netlify_agent=netlify_agent,
-    )
-    service.cache_service = cache_service
-    return service
+async def get_research_service() -> ResearchService:
+    return get_service_container().research_service
 
 
 class CommonDeps:
@@ -17,6 +17,8 @@ class Status(StrEnum):
     UNKNOWN_ERROR = auto()
     NOT_FOUND = auto()
     NOT_IMPLEMENTED = auto()
+    CONFLICT = auto()
+    UNSUPPORTED_MEDIA_TYPE = auto()
 
 
 class NotFoundException(Exception):
@@ -26,3 +28,21 @@ class NotFoundException(Exception):
         self.message = message
         self.status = Status.NOT_FOUND
         super().__init__(self.message)
+
+
+class ConflictException(Exception):
+    """Simple exception for when an entity is not in a state the request allows."""
+
+    def __init__(self, message: str):
+        self.message = message
+        self.status = Status.CONFLICT
+        super().__init__(self.message)
+
+
+class UnsupportedFileException(Exception):
+    """Simple exception for when an uploaded file is of a type that is not supported."""
+
+    def __init__(self, message: str):
+        self.message = message
+        self.status = Status.UNSUPPORTED_MEDIA_TYPE
+        super().__init__(self.message)
@@ -12,6 +12,9 @@ class CitationResponse(BaseModel):
     iframe_url: Optional[str] = Field(
         None, description="URL of the iframe for the response"
     )
+    chart_spec: Optional[dict] = Field(
+        None, description="Plotly JSON spec of the chart for the response"
+    )
     summary: str = Field(..., description="Summary of the response")
 
     @model_validator(mode="after")
@@ -74,6 +74,23 @@ class FileListResponse(BaseModel):
     total: int
 
 
+class IngestionJobResponse(BaseModel):
+    job_id: str
+    company_name: Optional[str] = None
+    file_name: str
+    status: Literal["queued", "running", "completed", "failed"]
+    stage: Literal["upload", "extract", "store", "done"]
+    progress: float
+    pages_total: Optional[int] = None
+    pages_done: int = 0
+    pages_stored: int = 0
+    attempts: int = 0
+    cloud_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class CompanyDocumentsResponse(BaseModel):
     company_name: str
     document_urls: List[str]
@@ -1,7 +1,16 @@
+import hashlib
+import json
 from abc import ABC, abstractmethod
 
+import pandas as pd
+from plotly.graph_objects import Figure
+
 from backend.agents.netlify import NetlifyAgent
+from backend.plot.publisher import publish_chart
+from backend.plot.renderer import render_in_pool
+from backend.plot.templates import STYLE_FINGERPRINT
 from backend.plot.types import ChartData
+from backend.settings import get_app_settings
 
 
 class IBuilder(ABC):
@@ -9,8 +18,78 @@ class IBuilder(ABC):
         self.netlify_agent = netlify_agent
 
     @abstractmethod
-    async def plot(self, chart_data: ChartData, company_name: str) -> str:
+    def build_figure(self, chart_data: ChartData, company_name: str) -> Figure:
         """
-        Generate a plot from ChartData, upload it as HTML via FilesService, and return the public URL.
+        Build the Plotly figure for ChartData.
         """
         pass
+
+    def chart_key(self, chart_data: ChartData, company_name: str) -> str:
+        """
+        Hash of everything that determines the chart, so identical charts can be
+        looked up without rendering them. Includes the style fingerprint, so charts
+        published before a styling change are not served for it.
+        """
+        spec = {
+            "builder": type(self).__name__,
+            "style": STYLE_FINGERPRINT,
+            "company_name": company_name,
+            "title": chart_data.title,
+            "x": chart_data.x,
+            "y": chart_data.y,
+            "data": pd.DataFrame(chart_data.data).to_json(
+                orient="split", date_format="iso"
+            ),
+        }
+        return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+    def render(self, chart_data: ChartData, company_name: str) -> str:
+        """
+        Render the chart for ChartData as a standalone HTML page.
+        """
+        fig = self.build_figure(chart_data, company_name)
+        # Plotly generates a random div id by default, which would make the HTML
+        # of identical charts differ
+        return fig.to_html(
+            include_plotlyjs="cdn",
+            full_html=True,
+            div_id=self.chart_key(chart_data, company_name),
+        )
+
+    def spec(self, chart_data: ChartData, company_name: str) -> dict:
+        """
+        Plotly JSON spec of the chart for ChartData, for rendering it client-side.
+        """
+        fig = self.build_figure(chart_data, company_name)
+        return json.loads(fig.to_json())
+
+    async def aspec(self, chart_data: ChartData, company_name: str) -> dict:
+        """
+        Async version of spec, run in the shared render pool.
+        """
+        return await render_in_pool(type(self), chart_data, company_name, output="spec")
+
+    async def arender(self, chart_data: ChartData, company_name: str) -> str:
+        """
+        Async version of render. Rendering is CPU bound, so it runs in the shared
+        render pool rather than on the event loop.
+        """
+        return await render_in_pool(type(self), chart_data, company_name)
+
+    async def plot(self, chart_data: ChartData, company_name: str) -> str:
+        """
+        Generate a plot from ChartData, upload it as HTML to Netlify, and return the public URL.
+        Within a ChartBatch the chart is deployed along with the rest of the batch.
+        """
+        return await publish_chart(self.netlify_agent, self, chart_data, company_name)
+
+    async def attach(self, response, chart_data: ChartData, company_name: str) -> None:
+        """
+        Attach the chart to a response as an iframe_url, a chart_spec, or both,
+        depending on the configured chart output.
+        """
+        output = get_app_settings().chart_render_config.output
+        if output in ("spec", "both"):
+            response.chart_spec = await self.aspec(chart_data, company_name)
+        if output in ("iframe", "both"):
+            response.iframe_url = await self.plot(chart_data, company_name)
@@ -1,7 +1,6 @@
 import plotly.express as px
 import pandas as pd
 import asyncio
-import tempfile
 import os
 import sys
 
@@ -12,129 +11,42 @@ if __name__ == "__main__":
     sys.path.insert(0, project_root)
     from backend.plot.types import ChartData
     from backend.plot.builders import IBuilder
+    from backend.plot.templates import template_name
 else:
     # Normal import when run as part of the package
     from backend.plot.types import ChartData
+    from backend.plot.templates import template_name
     from . import IBuilder
 
 
 class LineBuilder(IBuilder):
-    async def plot(self, chart_data: ChartData, company_name: str) -> str:
-        fig = self._build_line_plot(
+    def build_figure(self, chart_data: ChartData, company_name: str):
+        return self._build_line_plot(
             chart_data.data,
             title=chart_data.title,
             x=chart_data.x,
             y=chart_data.y,
             company_name=company_name,
         )
-        # Save to a temporary HTML file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp:
-            fig.write_html(tmp.name, include_plotlyjs="cdn", full_html=True)
-            tmp_path = tmp.name
-        url = await self.netlify_agent.upload_html(tmp_path)
-        return url
 
     @staticmethod
     def _build_line_plot(data, title=None, x=None, y=None, company_name=None, **kwargs):
-        # Use a professionally curated color palette
-        custom_colors = [
-            "#4285F4",
-            "#EA4335",
-            "#FBBC05",
-            "#34A853",  # Google-inspired colors
-            "#1E88E5",
-            "#00897B",
-            "#7CB342",
-            "#FFB300",  # Material design
-            "#6741D9",
-            "#FF5A5F",
-            "#00BCD4",
-            "#FF9800",  # Modern web
-        ]
-
-        # Create the line chart with improved styling
+        # Styling comes from the precompiled line template, only data is bound here
         fig = px.line(
             data,
             x=x,
             y=y,
-            title=None,  # We'll set the title in layout for more control
-            template="plotly_white",
-            color_discrete_sequence=custom_colors,
+            template=template_name("line"),
             markers=True,  # Add markers to line for better data point visibility
             line_shape="spline",  # Smooth curves for more modern look
             **kwargs,
         )
-
-        # Enhanced styling for lines and markers
-        fig.update_traces(
-            line=dict(width=2.5),  # Slightly thicker lines
-            marker=dict(
-                size=8,
-                line=dict(width=1.5, color="#ffffff"),
-                opacity=0.9,
-            ),
-            hovertemplate="<b>%{x}</b><br>%{y:,.0f}<extra></extra>",
-        )
-
-        # Create a professional layout
+        fig.update_traces(hovertemplate="<b>%{x}</b><br>%{y:,.0f}<extra></extra>")
         fig.update_layout(
-            # Title configuration
-            title={
-                "text": f"<b>{title}</b>",
-                "x": 0.5,  # Centered
-                "font": {
-                    "size": 20,
-                    "family": "Inter, Arial, sans-serif",
-                    "color": "#212121",
-                },
-            },
-            # Font configuration
-            font=dict(family="Inter, Arial, sans-serif", size=12, color="#212121"),
-            # Legend configuration
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=-0.25,  # Move below the chart
-                xanchor="center",
-                x=0.5,  # Center aligned
-                bgcolor="rgba(255,255,255,0.8)",
-                bordercolor="#E0E0E0",
-                borderwidth=1,
-                font=dict(size=11),
-            ),
-            # Axis styling
-            xaxis=dict(
-                showgrid=True,
-                gridcolor="#F0F0F0",
-                gridwidth=0.5,
-                title=dict(
-                    text=x.capitalize() if x else "",
-                    font=dict(size=14, family="Inter, Arial, sans-serif"),
-                ),
-                tickfont=dict(size=12, family="Inter, Arial, sans-serif"),
-                zeroline=False,
-                rangeslider=dict(visible=False),  # No range slider by default
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor="#F0F0F0",
-                gridwidth=0.5,
-                title=dict(
-                    text=y.capitalize() if y else "",
-                    font=dict(size=14, family="Inter, Arial, sans-serif"),
-                ),
-                tickfont=dict(size=12, family="Inter, Arial, sans-serif"),
-                zeroline=False,
-                # Add thousands separator for large numbers
-                tickformat=",.0f",
-            ),
-            # Other layout improvements
-            hovermode="closest",
-            margin=dict(l=40, r=40, t=80, b=80),  # More space for title and axis labels
-            plot_bgcolor="#ffffff",
-            paper_bgcolor="#ffffff",
+            title_text=f"<b>{title}</b>",
+            xaxis_title_text=x.capitalize() if x else "",
+            yaxis_title_text=y.capitalize() if y else "",
         )
-
         return fig
 
 
@@ -1,7 +1,6 @@
 import plotly.express as px
 import pandas as pd
 import asyncio
-import tempfile
 import os
 import sys
 
@@ -12,99 +11,39 @@ if __name__ == "__main__":
     sys.path.insert(0, project_root)
     from backend.plot.types import ChartData
     from backend.plot.builders import IBuilder
+    from backend.plot.templates import FONT_FAMILY, template_name
 else:
     # Normal import when run as part of the package
     from backend.plot.types import ChartData
+    from backend.plot.templates import FONT_FAMILY, template_name
     from . import IBuilder
 
 
 class PieBuilder(IBuilder):
-    async def plot(self, chart_data: ChartData, company_name: str) -> str:
-        fig = self._build_pie_plot(
+    def build_figure(self, chart_data: ChartData, company_name: str):
+        return self._build_pie_plot(
             chart_data.data,
             title=chart_data.title,
             x=chart_data.x,
             y=chart_data.y,
             company_name=company_name,
         )
-        # Save to a temporary HTML file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp:
-            fig.write_html(tmp.name, include_plotlyjs="cdn", full_html=True)
-            tmp_path = tmp.name
-        url = await self.netlify_agent.upload_html(tmp_path)
-        return url
 
     @staticmethod
     def _build_pie_plot(data, title=None, x=None, y=None, company_name=None, **kwargs):
-        # Use a professionally curated color palette
-        custom_colors = [
-            "#4285F4",
-            "#EA4335",
-            "#FBBC05",
-            "#34A853",  # Google-inspired colors
-            "#1E88E5",
-            "#00897B",
-            "#7CB342",
-            "#FFB300",  # Material design
-            "#6741D9",
-            "#FF5A5F",
-            "#00BCD4",
-            "#FF9800",  # Modern web
-        ]
-
-        # Create the pie chart
-        fig = px.pie(
-            data,
-            names=x,
-            values=y,
-            title=None,  # We'll set the title in layout for more control
-            color_discrete_sequence=custom_colors,
-            hole=0.5,  # Slightly larger donut hole for modern look
-            **kwargs,
-        )
-
-        # Update traces for better appearance
+        # Styling comes from the precompiled pie template, only data is bound here
+        fig = px.pie(data, names=x, values=y, template=template_name("pie"), **kwargs)
         fig.update_traces(
-            textinfo="percent+label",
-            textposition="outside",  # Place text outside for cleaner look
-            textfont=dict(size=12, family="Inter, Arial, sans-serif"),
-            pull=[0.02] * len(data)
-            if hasattr(data, "__len__")
-            else None,  # Subtle pull
-            marker=dict(
-                line=dict(color="#fff", width=1.5),  # Thinner white borders
-                pattern=dict(shape=""),  # No patterns for clean look
-            ),
-            hoverinfo="label+percent+value",
+            pull=[0.02] * len(data) if hasattr(data, "__len__") else None,
             hovertemplate="<b>%{label}</b><br>%{value:,.0f} (%{percent})<extra></extra>",
         )
-
         fig.update_layout(
-            # Title configuration
-            title={
-                # Use string concatenation instead of problematic f-string with backslashes
-                "text": f"<b>{title}</b>",
-                "x": 0.5,  # Centered
-                "font": {
-                    "size": 20,
-                    "family": "Inter, Arial, sans-serif",
-                    "color": "#212121",
-                },
-            },
-            # Font configuration
-            font=dict(family="Inter, Arial, sans-serif", size=12, color="#212121"),
-            # Margins and background
-            margin=dict(l=20, r=20, t=80, b=80),  # More space at bottom for legend
-            plot_bgcolor="#ffffff",
-            paper_bgcolor="#ffffff",
-            # Additional layout improvements
-            uniformtext=dict(minsize=10, mode="hide"),  # Ensure readable text
-            showlegend=False,  # Turn off legends
+            title_text=f"<b>{title}</b>",
             annotations=[
                 dict(
                     text="<b>Total</b>",
                     showarrow=False,
-                    font=dict(size=14, family="Inter, Arial, sans-serif"),
+                    font=dict(size=14, family=FONT_FAMILY),
                     x=0.5,
                     y=0.5,
                 )
@@ -112,7 +51,6 @@ class PieBuilder(IBuilder):
             if hasattr(data, "__len__") and len(data) > 0
             else [],
         )
-
         return fig
 
 
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Awaitable, Hashable, Optional, TypeVar
+
+from backend.agents.netlify import NetlifyAgent
+from backend.plot.store import get_chart_store
+from backend.plot.types import ChartData
+from backend.settings import get_app_settings
+from backend.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from backend.plot.builders import IBuilder
+
+LOG = get_logger("ChartPublisher")
+
+T = TypeVar("T")
+
+
+class ChartPublisher:
+    """
+    Collects the charts built while serving a request and publishes them all in a
+    single Netlify deploy, or a single write to the local chart store, instead of
+    one upload per chart. Charts are stored under the hash of their HTML, and charts
+    already in the target's chart index are neither rendered nor uploaded again.
+    """
+
+    def __init__(self, netlify_agent: NetlifyAgent):
+        self.netlify_agent = netlify_agent
+        self._pending: dict[Hashable, tuple] = {}
+
+    def add(
+        self,
+        key: Hashable,
+        builder: "IBuilder",
+        chart_data: ChartData,
+        company_name: str,
+    ) -> None:
+        """Queue a chart for publishing under the given key"""
+        chart_key = builder.chart_key(chart_data, company_name)
+        self._pending[key] = (chart_key, builder, chart_data, company_name)
+
+    def discard(self, key: Hashable) -> None:
+        """Drop a queued chart that has not been published yet"""
+        self._pending.pop(key, None)
+
+    async def publish(self) -> dict[Hashable, str]:
+        """Deploy all new queued charts at once and return their public URLs by key"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return {}
+
+        # Charts go to Netlify unless the local chart store is configured
+        target = self.netlify_agent
+        if get_app_settings().chart_render_config.store == "local":
+            target = get_chart_store()
+        chart_index = target.chart_index
+        chart_keys = {chart_key for chart_key, *_ in pending.values()}
+        known = {}
+        if chart_index is not None:
+            try:
+                known = await chart_index.aget_many(list(chart_keys))
+            except Exception as e:
+                LOG.warning(f"Chart index lookup failed: {e}")
+
+        # Render each chart that has not been published before, once per chart key
+        to_render = {}
+        for chart_key, builder, chart_data, company_name in pending.values():
+            if chart_key not in known and chart_key not in to_render:
+                to_render[chart_key] = builder.arender(chart_data, company_name)
+        rendered = await asyncio.gather(*to_render.values())
+        paths, files = {}, {}
+        for chart_key, html in zip(to_render, rendered):
+            content = html.encode("utf-8")
+            path = f"charts/{hashlib.sha1(content).hexdigest()}.html"
+            paths[chart_key] = path
+            files[path] = content
+        LOG.info(f"Publishing {len(files)} charts, {len(known)} already published")
+
+        if files:
+            urls = await target.upload_files(files)
+            published = {chart_key: urls[path] for chart_key, path in paths.items()}
+            if chart_index is not None:
+                try:
+                    await chart_index.aset_many(published)
+                except Exception as e:
+                    LOG.warning(f"Chart index update failed: {e}")
+            known.update(published)
+
+        return {key: known[chart_key] for key, (chart_key, *_) in pending.items()}
+
+
+class _BatchCall:
+    __slots__ = ("arrived",)
+
+    def __init__(self):
+        # Whether the call has queued its chart or returned
+        self.arrived = False
+
+
+# Chart batch of the calls running in the current context, see ChartBatch.run
+_CURRENT_CALL: ContextVar[Optional[tuple["ChartBatch", _BatchCall]]] = ContextVar(
+    "chart_batch_call", default=None
+)
+
+
+class ChartBatch:
+    """
+    Publishes the charts of a group of concurrent service calls in one deploy. The
+    builders of calls run through the batch queue their chart and wait. Once every
+    call has either queued its chart, returned or left the batch, the queued charts
+    are published together and every waiting call gets its URL.
+
+    A call leaves the batch when it starts waiting on a computation led elsewhere
+    (see leave_chart_batch), since that computation may itself be waiting on a
+    batch, and publishes its own charts from then on.
+    """
+
+    def __init__(self, netlify_agent: NetlifyAgent, calls: int):
+        self.netlify_agent = netlify_agent
+        self.publisher = ChartPublisher(netlify_agent)
+        self._pending_calls = calls
+        self._published: Optional[asyncio.Future] = None
+        # Keeps the publish task from being collected while it runs
+        self._publish_task: Optional[asyncio.Task] = None
+
+    async def run(self, coro: Awaitable[T]) -> T:
+        """Run one of the calls of the batch"""
+        call = _BatchCall()
+        token = _CURRENT_CALL.set((self, call))
+        try:
+            return await coro
+        finally:
+            _CURRENT_CALL.reset(token)
+            self._arrive(call)
+
+    def _future(self) -> asyncio.Future:
+        if self._published is None:
+            self._published = asyncio.get_running_loop().create_future()
+        return self._published
+
+    def _arrive(self, call: _BatchCall) -> None:
+        if call.arrived:
+            return
+        call.arrived = True
+        self._pending_calls -= 1
+        if self._pending_calls == 0:
+            future = self._future()
+            future.add_done_callback(_consume_exception)
+            self._publish_task = asyncio.get_running_loop().create_task(
+                self._publish(future)
+            )
+
+    async def _publish(self, future: asyncio.Future) -> None:
+        try:
+            future.set_result(await self.publisher.publish())
+        except Exception as e:
+            LOG.error(f"Publishing the chart batch failed: {e}")
+            future.set_exception(e)
+
+    async def _add(
+        self,
+        call: _BatchCall,
+        builder: "IBuilder",
+        chart_data: ChartData,
+        company_name: str,
+    ) -> str:
+        key = object()
+        self.publisher.add(key, builder, chart_data, company_name)
+        future = self._future()
+        self._arrive(call)
+        timeout = get_app_settings().chart_render_config.batch_timeout_seconds
+        try:
+            # Shielded, one call being cancelled must not cancel the others' publish
+            urls = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            LOG.warning(
+                f"Chart batch not published after {timeout}s, publishing on its own"
+            )
+            self.publisher.discard(key)
+            return await _publish_alone(
+                self.netlify_agent, builder, chart_data, company_name
+            )
+        return urls[key]
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Avoid "exception was never retrieved" warnings when every call timed out
+    if not future.cancelled():
+        future.exception()
+
+
+def leave_chart_batch() -> None:
+    """
+    Take the current call out of its chart batch, if it is in one. Called before
+    waiting on a computation led by another request or worker, which may be
+    waiting on a batch itself; the batch no longer waits for this call and its
+    charts are published on their own.
+    """
+    current = _CURRENT_CALL.get()
+    if current is not None:
+        batch, call = current
+        batch._arrive(call)
+
+
+async def _publish_alone(
+    netlify_agent: NetlifyAgent,
+    builder: "IBuilder",
+    chart_data: ChartData,
+    company_name: str,
+) -> str:
+    publisher = ChartPublisher(netlify_agent)
+    publisher.add("chart", builder, chart_data, company_name)
+    urls = await publisher.publish()
+    return urls["chart"]
+
+
+async def publish_chart(
+    netlify_agent: NetlifyAgent,
+    builder: "IBuilder",
+    chart_data: ChartData,
+    company_name: str,
+) -> str:
+    """
+    Publish a single chart and return its public URL. Inside a ChartBatch it is
+    published along with the charts of the other calls of the batch.
+    """
+    current = _CURRENT_CALL.get()
+    # A call that already arrived, e.g. one that left the batch or a background
+    # refresh it spawned, publishes its chart on its own
+    if current is not None and not current[1].arrived:
+        batch, call = current
+        return await batch._add(call, builder, chart_data, company_name)
+    return await _publish_alone(netlify_agent, builder, chart_data, company_name)
@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Optional, Type
+
+from backend.plot.types import ChartData
+from backend.settings import ChartRenderConfig, get_app_settings
+from backend.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from backend.plot.builders import IBuilder
+
+LOG = get_logger("ChartRenderer")
+
+# Process-wide render pool, shared by every builder
+_POOL: Optional[Executor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _warm_up() -> None:
+    """Import plotly and render a tiny chart once, so the first real chart is fast"""
+    import pandas as pd
+    import plotly.express as px
+
+    px.bar(pd.DataFrame({"x": ["a"], "y": [1]}), x="x", y="y").to_html(
+        include_plotlyjs="cdn"
+    )
+
+
+def _render_chart(
+    builder_cls: Type["IBuilder"],
+    chart_data: ChartData,
+    company_name: str,
+    output: str = "html",
+) -> str | dict:
+    # Rendering needs no Netlify agent, builders are only used for their figures
+    builder = builder_cls(None)
+    if output == "spec":
+        return builder.spec(chart_data, company_name)
+    return builder.render(chart_data, company_name)
+
+
+def get_render_pool(config: Optional[ChartRenderConfig] = None) -> Optional[Executor]:
+    """
+    Return the process-wide render pool, creating it on first use. Returns None
+    when charts are rendered inline on the event loop.
+    """
+    global _POOL
+    config = config or get_app_settings().chart_render_config
+    if config.executor == "inline":
+        return None
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                workers = config.workers or min(4, os.cpu_count() or 1)
+                if config.executor == "process":
+                    # Spawned rather than forked, the parent holds database and
+                    # HTTP connection pools that must not be shared with workers
+                    _POOL = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_warm_up,
+                    )
+                else:
+                    _POOL = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix="chart-render",
+                        initializer=_warm_up,
+                    )
+                LOG.info(f"Started a {config.executor} render pool of {workers}")
+    return _POOL
+
+
+def shutdown_render_pool() -> None:
+    """Stop the render pool. Meant to be called once on application shutdown."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+async def render_in_pool(
+    builder_cls: Type["IBuilder"],
+    chart_data: ChartData,
+    company_name: str,
+    config: Optional[ChartRenderConfig] = None,
+    output: str = "html",
+) -> str | dict:
+    """Render a chart to HTML, or its Plotly JSON spec, in the render pool"""
+    pool = get_render_pool(config)
+    if pool is None:
+        return _render_chart(builder_cls, chart_data, company_name, output)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            pool, _render_chart, builder_cls, chart_data, company_name, output
+        )
+    except BrokenProcessPool:
+        # A worker died, e.g. killed for memory. Start a fresh pool next time.
+        LOG.error("Render pool is broken, restarting it")
+        shutdown_render_pool()
+        return await loop.run_in_executor(
+            get_render_pool(config),
+            _render_chart,
+            builder_cls,
+            chart_data,
+            company_name,
+            output,
+        )
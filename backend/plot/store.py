@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from backend.agents.netlify import ChartIndex
+from backend.database.mongo import MongoDBConnector
+from backend.settings import (
+    ChartRenderConfig,
+    MongoConnectionDetails,
+    get_app_settings,
+)
+from backend.utils.logger import get_logger
+
+LOG = get_logger("ChartStore")
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Encodings stored next to each chart, in order of preference when serving
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _compress(encoding: str, content: bytes) -> bytes:
+    # Charts are written once and served many times, so use the best ratio
+    if encoding == "br":
+        return brotli.compress(content, quality=11)
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+class ChartStore:
+    """
+    Content-addressed store for chart HTML in MongoDB, served by this API under
+    /charts/{hash}. Charts are a few KB, so each is a single document holding the
+    HTML along with its gzip (and brotli, when installed) precompressed variants.
+    It is a drop-in publishing target for NetlifyAgent, without the external hop.
+    """
+
+    COLLECTION_NAME = "chart_store"
+
+    def __init__(
+        self,
+        db_config: MongoConnectionDetails,
+        chart_render_config: ChartRenderConfig,
+        memory_max_entries: int = 512,
+    ):
+        self.mongo_connector = MongoDBConnector(db_config)
+        self.chart_index = ChartIndex(db_config, collection_name="chart_store_index")
+        self.public_base_url = chart_render_config.public_base_url.rstrip("/")
+        # Charts never change once stored, so cached documents never go stale
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._memory_max_entries = memory_max_entries
+        self._memory_lock = threading.Lock()
+
+    def url_for(self, chart_hash: str) -> str:
+        return f"{self.public_base_url}/charts/{chart_hash}"
+
+    async def upload_files(self, files: dict[str, bytes]) -> dict[str, str]:
+        """
+        Store files under the SHA1 of their content and return the URL of each, keyed
+        by its path. Content that is already stored is not written again.
+        """
+        from pymongo import UpdateOne
+
+        hashes = {
+            path: hashlib.sha1(content).hexdigest() for path, content in files.items()
+        }
+        now = datetime.now(timezone.utc)
+
+        def build_documents() -> dict[str, dict]:
+            documents = {}
+            for path, chart_hash in hashes.items():
+                content = files[path]
+                document = {
+                    "content": content,
+                    "content_type": "text/html; charset=utf-8",
+                    "created_at": now,
+                }
+                for encoding in ENCODINGS:
+                    document[encoding] = _compress(encoding, content)
+                documents[chart_hash] = document
+            return documents
+
+        # Compressing at the highest levels is CPU bound, keep it off the event loop
+        documents = await asyncio.to_thread(build_documents)
+        operations = [
+            UpdateOne({"_id": chart_hash}, {"$setOnInsert": document}, upsert=True)
+            for chart_hash, document in documents.items()
+        ]
+
+        collection = await self.mongo_connector.aget_collection(self.COLLECTION_NAME)
+        result = await collection.bulk_write(operations, ordered=False)
+        LOG.info(f"Stored {result.upserted_count} of {len(files)} charts")
+        return {path: self.url_for(chart_hash) for path, chart_hash in hashes.items()}
+
+    async def aget(self, chart_hash: str) -> Optional[dict]:
+        """Return the stored chart document, or None if there is no such chart"""
+        with self._memory_lock:
+            document = self._memory.get(chart_hash)
+            if document is not None:
+                self._memory.move_to_end(chart_hash)
+                return document
+
+        collection = await self.mongo_connector.aget_collection(self.COLLECTION_NAME)
+        document = await collection.find_one({"_id": chart_hash})
+        if document is None:
+            return None
+        with self._memory_lock:
+            self._memory[chart_hash] = document
+            if len(self._memory) > self._memory_max_entries:
+                self._memory.popitem(last=False)
+        return document
+
+
+@lru_cache
+def get_chart_store() -> ChartStore:
+    """Process-wide chart store"""
+    app_settings = get_app_settings()
+    return ChartStore(app_settings.db_config, app_settings.chart_render_config)
@@ -0,0 +1,168 @@
+import copy
+import hashlib
+import json
+
+import plotly
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Professionally curated color palette
+COLORWAY = [
+    "#4285F4",
+    "#EA4335",
+    "#FBBC05",
+    "#34A853",  # Google-inspired colors
+    "#1E88E5",
+    "#00897B",
+    "#7CB342",
+    "#FFB300",  # Material design
+    "#6741D9",
+    "#FF5A5F",
+    "#00BCD4",
+    "#FF9800",  # Modern web
+]
+
+FONT_FAMILY = "Inter, Arial, sans-serif"
+
+# Bump when styling set in the builders themselves (hover templates, trace
+# updates) changes, template changes are picked up by STYLE_FINGERPRINT on their own
+STYLE_VERSION = 1
+
+# Styling shared by every chart kind
+_BASE_LAYOUT = dict(
+    colorway=COLORWAY,
+    # Title configuration, the text is bound per figure
+    title=dict(x=0.5, font=dict(size=20, family=FONT_FAMILY, color="#212121")),
+    font=dict(family=FONT_FAMILY, size=12, color="#212121"),
+    plot_bgcolor="#ffffff",
+    paper_bgcolor="#ffffff",
+)
+
+# Legend, axes and hover of the cartesian (line, bar and area) charts
+_AXIS = dict(
+    showgrid=True,
+    gridcolor="#F0F0F0",
+    gridwidth=0.5,
+    title=dict(font=dict(size=14, family=FONT_FAMILY)),
+    tickfont=dict(size=12, family=FONT_FAMILY),
+    zeroline=False,
+)
+_CARTESIAN_LAYOUT = dict(
+    legend=dict(
+        orientation="h",
+        yanchor="bottom",
+        y=-0.25,  # Move below the chart
+        xanchor="center",
+        x=0.5,  # Center aligned
+        bgcolor="rgba(255,255,255,0.8)",
+        bordercolor="#E0E0E0",
+        borderwidth=1,
+        font=dict(size=11),
+    ),
+    xaxis=_AXIS,
+    # Add thousands separator for large numbers
+    yaxis=dict(_AXIS, tickformat=",.0f"),
+    hovermode="closest",
+    margin=dict(l=40, r=40, t=80, b=80),  # More space for title and axis labels
+)
+
+# Per-kind layout and trace defaults, by trace type
+_KIND_STYLES = {
+    "line": (
+        dict(_CARTESIAN_LAYOUT, xaxis=dict(_AXIS, rangeslider=dict(visible=False))),
+        {
+            "scatter": dict(
+                line=dict(width=2.5),
+                marker=dict(size=8, line=dict(width=1.5, color="#ffffff"), opacity=0.9),
+            )
+        },
+    ),
+    "bar": (
+        dict(_CARTESIAN_LAYOUT, bargap=0.2),
+        {
+            "bar": dict(
+                marker=dict(
+                    line=dict(width=1.5, color="#ffffff"),
+                    opacity=0.9,
+                    pattern=dict(shape=""),
+                )
+            )
+        },
+    ),
+    "area": (
+        _CARTESIAN_LAYOUT,
+        {
+            "scatter": dict(
+                line=dict(width=2),
+                marker=dict(size=6, line=dict(width=1, color="#ffffff"), opacity=0.8),
+                # Semi-transparent light blue fill
+                fillcolor="rgba(66, 133, 244, 0.2)",
+                opacity=0.9,
+            )
+        },
+    ),
+    "pie": (
+        dict(
+            margin=dict(l=20, r=20, t=80, b=80),  # More space at bottom for legend
+            uniformtext=dict(minsize=10, mode="hide"),  # Ensure readable text
+            showlegend=False,
+        ),
+        {
+            "pie": dict(
+                hole=0.5,  # Donut for a modern look
+                textinfo="percent+label",
+                textposition="outside",  # Place text outside for cleaner look
+                textfont=dict(size=12, family=FONT_FAMILY),
+                marker=dict(line=dict(color="#fff", width=1.5), pattern=dict(shape="")),
+                hoverinfo="label+percent+value",
+            )
+        },
+    ),
+}
+
+
+def template_name(kind: str) -> str:
+    return f"insights_{kind}"
+
+
+def _build_template(kind: str) -> go.layout.Template:
+    """
+    plotly_white's layout with our styling on top. Only the trace defaults of the
+    kind's own trace type are kept, which keeps the template small in the HTML
+    and JSON output of every chart.
+    """
+    base = pio.templates["plotly_white"]
+    layout, trace_styles = _KIND_STYLES[kind]
+    template = go.layout.Template(layout=copy.deepcopy(base.layout))
+    template.layout.update(_BASE_LAYOUT)
+    template.layout.update(layout)
+    for trace_type, style in trace_styles.items():
+        trace = copy.deepcopy(base.data[trace_type][0])
+        trace.update(style)
+        template.data[trace_type] = [trace]
+    return template
+
+
+# Registered once at import, builders only refer to them by name
+for _kind in _KIND_STYLES:
+    pio.templates[template_name(_kind)] = _build_template(_kind)
+
+
+def _style_fingerprint() -> str:
+    """
+    Hash of everything styling a chart besides its data, so chart keys change
+    when the styling does.
+    """
+    templates = {
+        kind: pio.templates[template_name(kind)].to_plotly_json()
+        for kind in _KIND_STYLES
+    }
+    spec = {
+        "version": STYLE_VERSION,
+        "plotly": plotly.__version__,
+        "templates": templates,
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+STYLE_FINGERPRINT = _style_fingerprint()
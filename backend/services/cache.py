@@ -1,10 +1,19 @@
+import asyncio
+import hashlib
+import json
+import pickle
+import re
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Optional, TypeVar, Generic, Dict
+from typing import Any, Optional, TypeVar, Generic, Dict, Tuple
 
 from pydantic import BaseModel
 
-from backend.settings import MongoConnectionDetails
+from backend.settings import CacheConfig, MongoConnectionDetails
 from backend.database.mongo import MongoDBConnector
+from backend.utils.cache_codec import PayloadCodec
 from backend.utils.logger import get_logger
 
 LOG = get_logger("CacheService")
@@ -18,6 +27,174 @@ class CacheEntry(BaseModel, Generic[T]):
     expires_at: datetime
 
 
+class CacheTierStats:
+    """Hit and miss counters for a single cache tier."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class _MemoryEntry:
+    __slots__ = ("blob", "expires_at", "fresh_until")
+
+    def __init__(
+        self,
+        blob: bytes,
+        expires_at: datetime,
+        fresh_until: Optional[datetime],
+    ):
+        # Pickled, so every hit gets its own copy of the data to modify
+        self.blob = blob
+        self.expires_at = expires_at
+        self.fresh_until = fresh_until
+
+    @property
+    def size(self) -> int:
+        return len(self.blob)
+
+
+class MemoryCacheTier:
+    """
+    Bounded, thread-safe LRU cache with per-entry expiry, used as the L1 tier in
+    front of MongoDB. Bounded both by number of entries and bytes. Entries are
+    stored pickled, so callers that modify a cached result, such as a plain dict,
+    never change the entry other callers get.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl: Optional[timedelta] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheTierStats()
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[datetime]]]:
+        """Return (data, fresh_until) for an unexpired entry"""
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if entry.expires_at <= now:
+                self._pop(key)
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        return pickle.loads(entry.blob), entry.fresh_until
+
+    def set(
+        self,
+        key: str,
+        data: Any,
+        expires_at: datetime,
+        fresh_until: Optional[datetime] = None,
+    ) -> None:
+        if self.ttl is not None:
+            expires_at = min(expires_at, datetime.utcnow() + self.ttl)
+        try:
+            blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            LOG.debug(f"Skipping memory cache for {key}, entry not picklable: {e}")
+            return
+        size = len(blob)
+        if size > self.max_bytes:
+            LOG.debug(f"Skipping memory cache for {key}, entry too large ({size} B)")
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = _MemoryEntry(blob, expires_at, fresh_until)
+            self._size += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._pop(oldest_key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def clear_expired(self) -> None:
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e.expires_at <= now]
+            for key in expired:
+                self._pop(key)
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def info(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# The memory tier and the mongo tier counters are process-wide so that every
+# CacheService instance, however it is constructed, reads and fills the same L1.
+_MEMORY_TIER: Optional[MemoryCacheTier] = None
+_MONGO_TIER_STATS = CacheTierStats()
+_MEMORY_TIER_LOCK = threading.Lock()
+# Indexes only need to be ensured once per process, not per CacheService instance
+_INDEXES_READY = False
+
+
+def get_memory_tier(cache_config: CacheConfig) -> MemoryCacheTier:
+    global _MEMORY_TIER
+    if _MEMORY_TIER is None:
+        with _MEMORY_TIER_LOCK:
+            if _MEMORY_TIER is None:
+                ttl = (
+                    timedelta(seconds=cache_config.memory_ttl_seconds)
+                    if cache_config.memory_ttl_seconds
+                    else None
+                )
+                _MEMORY_TIER = MemoryCacheTier(
+                    max_entries=cache_config.memory_max_entries,
+                    max_bytes=cache_config.memory_max_bytes,
+                    ttl=ttl,
+                )
+    return _MEMORY_TIER
+
+
 class CacheService:
     """
     A service for caching data with MongoDB as the backend storage.
@@ -26,38 +203,94 @@ class CacheService:
 
     COLLECTION_NAME = "cache_entries"
     DEFAULT_TTL = timedelta(days=1)  # Default time-to-live is 1 day
+    LEASE_PREFIX = "lease:"
 
-    def __init__(self, mongo_config: MongoConnectionDetails):
+    def __init__(
+        self,
+        mongo_config: MongoConnectionDetails,
+        cache_config: Optional[CacheConfig] = None,
+    ):
+        cache_config = cache_config or CacheConfig()
         self.mongo_connector = MongoDBConnector(mongo_config)
+        self.memory_tier = get_memory_tier(cache_config)
+        self.codec = (
+            PayloadCodec(
+                serializer=cache_config.payload_codec,
+                compression=cache_config.payload_compression,
+                threshold=cache_config.payload_compression_threshold,
+            )
+            if cache_config.payload_codec
+            else None
+        )
+        self.mongo_stats = _MONGO_TIER_STATS
         # Ensure indexes are created
         self._setup_indexes()
 
+    def get_stats(self) -> dict:
+        """Hit and miss counters reported separately for each cache tier"""
+        return {
+            "memory": self.memory_tier.info(),
+            "mongo": self.mongo_stats.as_dict(),
+        }
+
     def _setup_indexes(self):
-        """Setup necessary indexes for the cache collection"""
+        """
+        Setup necessary indexes for the cache collection, once per process.
+        Expiry is delegated to MongoDB through a TTL index on expires_at, which
+        removes entries (and stale leases) as soon as they expire.
+        """
         from backend.database.mongo import MongoIndexSpec
 
+        global _INDEXES_READY
+        if _INDEXES_READY:
+            return
+
         # Check if collection exists and has our indexes
         collection = self.mongo_connector.get_collection(self.COLLECTION_NAME)
         existing_indexes = collection.index_information()
 
-        # If the key_index already exists, we don't need to create indexes
-        if "key_index" in existing_indexes:
-            LOG.debug("Cache collection indexes already exist")
-            return
+        # A plain index on expires_at predates the TTL index and has the same key,
+        # so it has to be dropped before the TTL variant can be created
+        expiry_index = existing_indexes.get("expiry_index")
+        if expiry_index is not None and "expireAfterSeconds" not in expiry_index:
+            LOG.info("Replacing expiry_index with a TTL index")
+            collection.drop_index("expiry_index")
+            del existing_indexes["expiry_index"]
 
-        LOG.info(f"Creating indexes for collection: {self.COLLECTION_NAME}")
         indexes = [
             MongoIndexSpec(keys=[("key", 1)], name="key_index", unique=True),
-            MongoIndexSpec(keys=[("expires_at", 1)], name="expiry_index"),
+            MongoIndexSpec(
+                keys=[("expires_at", 1)], name="expiry_index", expire_after_seconds=0
+            ),
+            MongoIndexSpec(keys=[("prefix", 1)], name="prefix_index"),
         ]
-        self.mongo_connector.create_indexes(self.COLLECTION_NAME, indexes)
+        missing_indexes = [i for i in indexes if i.name not in existing_indexes]
+
+        # If all indexes already exist, we don't need to create any
+        if not missing_indexes:
+            LOG.debug("Cache collection indexes already exist")
+        else:
+            LOG.info(f"Creating indexes for collection: {self.COLLECTION_NAME}")
+            self.mongo_connector.create_indexes(self.COLLECTION_NAME, missing_indexes)
+        _INDEXES_READY = True
+
+    @staticmethod
+    def _generate_prefix(service_name: str, method_name: Optional[str] = None) -> str:
+        """Readable part of the cache key, stored separately for tag invalidation"""
+        if method_name is None:
+            return f"{service_name}:"
+        return f"{service_name}:{method_name}"
 
     def _generate_key(
         self, service_name: str, method_name: str, args: Dict[str, Any]
     ) -> str:
-        """Generate a unique cache key based on service, method and arguments"""
-        args_str = "&".join(f"{k}={v}" for k, v in sorted(args.items()))
-        return f"{service_name}:{method_name}:{args_str}"
+        """
+        Generate a compact cache key: the service/method prefix followed by a
+        fixed-size digest of the canonical JSON encoding of the arguments.
+        """
+        args_str = json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.blake2b(args_str.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{self._generate_prefix(service_name, method_name)}:{digest}"
 
     def _serialize_for_mongodb(self, data: Any) -> Any:
         """Convert data to MongoDB-compatible format"""
@@ -103,12 +336,48 @@ class CacheService:
         # Handle other types that MongoDB can store directly
         return data
 
+    def _encode_entry(
+        self,
+        prefix: str,
+        serialized_data: Any,
+        expires_at: datetime,
+        fresh_until: Optional[datetime],
+    ) -> dict:
+        """
+        Build the upsert for a cache entry. Large payloads are stored as an encoded
+        binary 'payload' with the name of its codec, small ones as plain BSON 'data'.
+        """
+        fields = {
+            "prefix": prefix,
+            "expires_at": expires_at,
+            "fresh_until": fresh_until,
+        }
+        payload = self.codec.encode(serialized_data) if self.codec else None
+        if payload is None:
+            fields["data"] = serialized_data
+            return {"$set": fields, "$unset": {"payload": "", "codec": ""}}
+        fields["payload"] = payload
+        fields["codec"] = self.codec.name
+        return {"$set": fields, "$unset": {"data": ""}}
+
+    @staticmethod
+    def _decode_entry(entry: dict) -> Any:
+        """Return the data of a stored cache entry, whichever way it was written"""
+        if entry.get("codec"):
+            return PayloadCodec.decode(entry["payload"], entry["codec"])
+        return entry.get("data")
+
     def get(
         self, service_name: str, method_name: str, args: Dict[str, Any]
     ) -> Optional[Any]:
         """Get cached data if it exists and is not expired"""
         key = self._generate_key(service_name, method_name, args)
 
+        cached = self.memory_tier.get(key)
+        if cached is not None:
+            LOG.debug(f"Memory cache hit for {key}")
+            return cached
+
         # Query for unexpired cache entry
         now = datetime.utcnow()
         query = {"key": key, "expires_at": {"$gt": now}}
@@ -116,9 +385,16 @@ class CacheService:
         results = self.mongo_connector.query(self.COLLECTION_NAME, query)
         if results and len(results) > 0:
             LOG.info(f"Cache hit for {key}")
-            return results[0]["data"]
+            self.mongo_stats.hits += 1
+            entry = results[0]
+            data = self._decode_entry(entry)
+            self.memory_tier.set(
+                key, data, entry["expires_at"], entry.get("fresh_until")
+            )
+            return data
 
         LOG.info(f"Cache miss for {key}")
+        self.mongo_stats.misses += 1
         return None
 
     def set(
@@ -128,21 +404,33 @@ class CacheService:
         args: Dict[str, Any],
         data: Any,
         ttl: Optional[timedelta] = None,
+        soft_ttl: Optional[timedelta] = None,
     ) -> None:
-        """Store data in cache with expiration time"""
+        """
+        Store data in cache with expiration time. With a soft_ttl the entry is
+        reported as stale after soft_ttl, while still being served until ttl.
+        """
         key = self._generate_key(service_name, method_name, args)
-        expires_at = datetime.utcnow() + (ttl or self.DEFAULT_TTL)
+        now = datetime.utcnow()
+        expires_at = now + (ttl or self.DEFAULT_TTL)
+        fresh_until = now + soft_ttl if soft_ttl else None
 
         # Serialize data for MongoDB
         serialized_data = self._serialize_for_mongodb(data)
 
         # Upsert the cache entry
         query_filter = {"key": key}
-        update_operation = {"$set": {"data": serialized_data, "expires_at": expires_at}}
+        update_operation = self._encode_entry(
+            self._generate_prefix(service_name, method_name),
+            serialized_data,
+            expires_at,
+            fresh_until,
+        )
 
         self.mongo_connector.update_records(
             self.COLLECTION_NAME, query_filter, update_operation
         )
+        self.memory_tier.set(key, serialized_data, expires_at, fresh_until)
         LOG.info(f"Cached data for {key}, expires at {expires_at}")
 
     def invalidate(
@@ -150,16 +438,43 @@ class CacheService:
     ) -> None:
         """Invalidate a specific cache entry"""
         key = self._generate_key(service_name, method_name, args)
+        self.memory_tier.delete(key)
         self.mongo_connector.delete_records(self.COLLECTION_NAME, {"key": key})
         LOG.info(f"Invalidated cache for {key}")
 
+    def _prefix_query(
+        self, service_name: str, method_name: Optional[str]
+    ) -> Tuple[str, dict]:
+        prefix = self._generate_prefix(service_name, method_name)
+        if method_name is None:
+            self.memory_tier.delete_prefix(prefix)
+            return prefix, {"prefix": {"$regex": f"^{re.escape(prefix)}"}}
+        self.memory_tier.delete_prefix(f"{prefix}:")
+        return prefix, {"prefix": prefix}
+
+    def invalidate_prefix(
+        self, service_name: str, method_name: Optional[str] = None
+    ) -> None:
+        """
+        Invalidate every cache entry of a method, or of a whole service when no
+        method name is given, using the indexed prefix field.
+        """
+        prefix, query = self._prefix_query(service_name, method_name)
+        self.mongo_connector.delete_records(self.COLLECTION_NAME, query)
+        LOG.info(f"Invalidated cache entries with prefix {prefix}")
+
     def clear_all(self) -> None:
         """Clear all cache entries"""
+        self.memory_tier.clear()
         self.mongo_connector.delete_records(self.COLLECTION_NAME, {})
         LOG.info("Cleared all cache entries")
 
     def clear_expired(self) -> None:
-        """Clear all expired cache entries"""
+        """
+        Clear all expired cache entries. MongoDB removes expired entries through
+        the TTL index on its own; this forces an immediate sweep.
+        """
+        self.memory_tier.clear_expired()
         now = datetime.utcnow()
         self.mongo_connector.delete_records(
             self.COLLECTION_NAME, {"expires_at": {"$lt": now}}
@@ -171,18 +486,40 @@ class CacheService:
         self, service_name: str, method_name: str, args: Dict[str, Any]
     ) -> Optional[Any]:
         """Async version of get"""
+        entry = await self.aget_entry(service_name, method_name, args)
+        return entry[0] if entry is not None else None
+
+    async def aget_entry(
+        self, service_name: str, method_name: str, args: Dict[str, Any]
+    ) -> Optional[Tuple[Any, bool]]:
+        """
+        Get cached data along with whether it is stale, i.e. past its soft TTL but
+        not yet expired. Returns None on a miss.
+        """
         key = self._generate_key(service_name, method_name, args)
+        now = datetime.utcnow()
+
+        cached = self.memory_tier.get_entry(key)
+        if cached is not None:
+            LOG.debug(f"Memory cache hit for {key}")
+            data, fresh_until = cached
+            return data, fresh_until is not None and fresh_until <= now
 
         # Query for unexpired cache entry
-        now = datetime.utcnow()
         query = {"key": key, "expires_at": {"$gt": now}}
 
         results = await self.mongo_connector.aquery(self.COLLECTION_NAME, query)
         if results and len(results) > 0:
             LOG.info(f"Cache hit for {key}")
-            return results[0]["data"]
+            self.mongo_stats.hits += 1
+            entry = results[0]
+            data = self._decode_entry(entry)
+            fresh_until = entry.get("fresh_until")
+            self.memory_tier.set(key, data, entry["expires_at"], fresh_until)
+            return data, fresh_until is not None and fresh_until <= now
 
         LOG.info(f"Cache miss for {key}")
+        self.mongo_stats.misses += 1
         return None
 
     async def aset(
@@ -192,10 +529,13 @@ class CacheService:
         args: Dict[str, Any],
         data: Any,
         ttl: Optional[timedelta] = None,
+        soft_ttl: Optional[timedelta] = None,
     ) -> None:
         """Async version of set"""
         key = self._generate_key(service_name, method_name, args)
-        expires_at = datetime.utcnow() + (ttl or self.DEFAULT_TTL)
+        now = datetime.utcnow()
+        expires_at = now + (ttl or self.DEFAULT_TTL)
+        fresh_until = now + soft_ttl if soft_ttl else None
 
         # Serialize data for MongoDB
         serialized_data = self._serialize_for_mongodb(data)
@@ -204,9 +544,15 @@ class CacheService:
         collection = await self.mongo_connector.aget_collection(self.COLLECTION_NAME)
         await collection.update_one(
             {"key": key},
-            {"$set": {"data": serialized_data, "expires_at": expires_at}},
+            self._encode_entry(
+                self._generate_prefix(service_name, method_name),
+                serialized_data,
+                expires_at,
+                fresh_until,
+            ),
             upsert=True,
         )
+        self.memory_tier.set(key, serialized_data, expires_at, fresh_until)
         LOG.info(f"Cached data for {key}, expires at {expires_at}")
 
     async def ainvalidate(
@@ -214,18 +560,126 @@ class CacheService:
     ) -> None:
         """Async version of invalidate"""
         key = self._generate_key(service_name, method_name, args)
+        self.memory_tier.delete(key)
         await self.mongo_connector.adelete_records(self.COLLECTION_NAME, {"key": key})
         LOG.info(f"Invalidated cache for {key}")
 
+    async def ainvalidate_prefix(
+        self, service_name: str, method_name: Optional[str] = None
+    ) -> None:
+        """Async version of invalidate_prefix"""
+        prefix, query = self._prefix_query(service_name, method_name)
+        await self.mongo_connector.adelete_records(self.COLLECTION_NAME, query)
+        LOG.info(f"Invalidated cache entries with prefix {prefix}")
+
     async def aclear_all(self) -> None:
         """Async version of clear_all"""
+        self.memory_tier.clear()
         await self.mongo_connector.adelete_records(self.COLLECTION_NAME, {})
         LOG.info("Cleared all cache entries")
 
     async def aclear_expired(self) -> None:
         """Async version of clear_expired"""
+        self.memory_tier.clear_expired()
         now = datetime.utcnow()
         await self.mongo_connector.adelete_records(
             self.COLLECTION_NAME, {"expires_at": {"$lt": now}}
         )
         LOG.info("Cleared expired cache entries")
+
+    # Distributed leases used to coalesce cache misses across workers
+    async def aacquire_lease(
+        self,
+        service_name: str,
+        method_name: str,
+        args: Dict[str, Any],
+        ttl: timedelta,
+    ) -> Optional[str]:
+        """
+        Try to take the computation lease for a cache key. Returns an owner token
+        when acquired, or None if another worker currently holds an unexpired lease.
+        """
+        from pymongo.errors import DuplicateKeyError
+
+        key = self._generate_key(service_name, method_name, args)
+        lease_key = f"{self.LEASE_PREFIX}{key}"
+        owner = uuid.uuid4().hex
+        now = datetime.utcnow()
+
+        # Only an expired lease matches the filter. If an unexpired one exists the
+        # upsert collides on the unique key index, which means the lease is taken.
+        collection = await self.mongo_connector.aget_collection(self.COLLECTION_NAME)
+        try:
+            await collection.update_one(
+                {"key": lease_key, "expires_at": {"$lte": now}},
+                {"$set": {"owner": owner, "expires_at": now + ttl}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            LOG.info(f"Lease for {key} is held by another worker")
+            return None
+
+        LOG.info(f"Acquired lease for {key}")
+        return owner
+
+    async def arelease_lease(
+        self, service_name: str, method_name: str, args: Dict[str, Any], owner: str
+    ) -> None:
+        """Release a lease previously acquired with aacquire_lease"""
+        key = self._generate_key(service_name, method_name, args)
+        await self.mongo_connector.adelete_records(
+            self.COLLECTION_NAME,
+            {"key": f"{self.LEASE_PREFIX}{key}", "owner": owner},
+        )
+
+    async def await_lease(
+        self,
+        service_name: str,
+        method_name: str,
+        args: Dict[str, Any],
+        timeout: timedelta,
+        poll_interval: float = 0.5,
+    ) -> Optional[Any]:
+        """
+        Wait for the worker holding the lease to publish its result. Returns the
+        cached data, or None if the lease was released or expired without a result.
+        """
+        key = self._generate_key(service_name, method_name, args)
+        lease_key = f"{self.LEASE_PREFIX}{key}"
+        deadline = datetime.utcnow() + timeout
+        collection = await self.mongo_connector.aget_collection(self.COLLECTION_NAME)
+
+        while datetime.utcnow() < deadline:
+            await asyncio.sleep(poll_interval)
+            now = datetime.utcnow()
+            entries = await collection.find(
+                {"key": {"$in": [key, lease_key]}, "expires_at": {"$gt": now}}
+            ).to_list(length=None)
+            entries = {entry["key"]: entry for entry in entries}
+            if key in entries:
+                entry = entries[key]
+                data = self._decode_entry(entry)
+                self.mongo_stats.hits += 1
+                self.memory_tier.set(
+                    key, data, entry["expires_at"], entry.get("fresh_until")
+                )
+                return data
+            if lease_key not in entries:
+                # Lease released without a result or expired
+                return None
+
+        return None
+
+
+async def run_cache_maintenance(cache_service: CacheService, interval: timedelta):
+    """
+    Periodically evict expired entries from the in-memory tier. Meant to run as a
+    lifespan-scoped background task; expiry in MongoDB is handled by the TTL index.
+    """
+    while True:
+        await asyncio.sleep(interval.total_seconds())
+        try:
+            cache_service.memory_tier.clear_expired()
+            LOG.debug(f"Memory cache maintenance done: {cache_service.get_stats()}")
+        except Exception as e:
+            LOG.error(f"Error during cache maintenance: {e}")
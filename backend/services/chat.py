@@ -46,13 +46,6 @@ class ChatService:
             db_url=db_config.get_connection_string(),
             mode="agent",
         )
-        self.memory = AgentMemory(
-            create_user_memories=True,
-            storage=self.storage,
-            update_user_memories_after_run=True,
-            create_session_summaries=True,
-            update_session_summaries_after_run=True,
-        )
         self.mongo = MongoDBConnector(db_config)
 
     @staticmethod
@@ -112,7 +105,14 @@ Always prioritize delivering accurate, relevant information from Venture Insight
             description=self.system_agent_prompt(),
             instructions=self.system_instructions(),
             storage=self.storage,
-            memory=self.memory,
+            # Memory holds the state of a single run, so it is never shared
+            memory=AgentMemory(
+                create_user_memories=True,
+                storage=self.storage,
+                update_user_memories_after_run=True,
+                create_session_summaries=True,
+                update_session_summaries_after_run=True,
+            ),
         )
 
     async def process_query(
@@ -61,6 +61,10 @@ class CustomerSentimentService:
             name=agent_name,
             model=self.sonar_model,
             instructions=prompt,
+            # In structured output mode Sonar generates the response schema directly
+            response_model=response_model
+            if self.sonar_config.structured_output
+            else None,
         )
 
         if use_knowledge_base:
@@ -68,10 +72,12 @@ class CustomerSentimentService:
             analysis_agent.knowledge_filters = {"company_name": company_name}
 
         # Use the LLM to generate the content
-        content = analysis_agent.run(prompt)
+        content = await analysis_agent.arun(prompt)
 
         # Parse the LLM output into the response model
-        response = self.llm_output_parser.parse(content.content, response_model)
+        response = await self.llm_output_parser.aparse(
+            content.content, response_model, endpoint=agent_name
+        )
 
         # Add citations to the response if available
         if hasattr(response, "citations") and hasattr(content, "citations"):
@@ -83,7 +89,7 @@ class CustomerSentimentService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
 
@@ -99,7 +105,7 @@ class CustomerSentimentService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> SentimentSummaryResponse:
         """
         Retrieve sentiment summary for a company.
 
@@ -170,7 +176,7 @@ class CustomerSentimentService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> CustomerFeedbackResponse:
         """
         Retrieve customer feedback for a company.
 
@@ -234,7 +240,7 @@ class CustomerSentimentService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> BrandReputationResponse:
         """
         Retrieve brand reputation data for a company.
 
@@ -296,7 +302,7 @@ class CustomerSentimentService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> SentimentComparisonResponse:
         """
         Compare the sentiment of a target company with its competitors using publicly available data sources.
 
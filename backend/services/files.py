@@ -1,14 +1,20 @@
-from typing import Dict, Any
+import asyncio
 import os
+from contextlib import suppress
+from typing import Optional
+
+import aiohttp
+
 from backend.models.base.exceptions import NotFoundException
 from backend.agents.document_processing import DocumentProcessingEngine
 from backend.agents.vector_store import VectorStore
+from backend.models.response.files import IngestionJobResponse
+from backend.services.ingestion import IngestionService
 from backend.models.requests.auth import Documents
 from backend.settings import MongoConnectionDetails, get_app_settings
 from backend.database.mongo import MongoDBConnector
 from cloudinary.utils import cloudinary_url
 import uuid
-import requests
 
 from backend.utils.cache_decorator import cacheable
 
@@ -19,27 +25,59 @@ class FilesService:
         doc_engine: DocumentProcessingEngine,
         vector_store: VectorStore,
         mongo_config: MongoConnectionDetails,
+        ingestion_service: IngestionService,
     ):
         self.doc_engine = doc_engine
         self.vector_store = vector_store
+        self.ingestion_service = ingestion_service
         self.mongo_config = mongo_config
         self.mongo_connector = MongoDBConnector(mongo_config)
+        # Keep-alive connections to Cloudinary, bound to the loop they were made on
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
 
-    async def upload_file(self, file, company_name: str = None) -> Dict[str, Any]:
-        temp_path = f"/tmp/{file.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(await file.read())
-        cloud_url = self.doc_engine.upload_to_cloudinary(temp_path)
-        documents = self.doc_engine.extract_text(temp_path, file.filename, company_name)
-        await self.vector_store.add_documents(documents, company_name)
-        os.remove(temp_path)
-        # Add the public URL to the company_docs collection
-        self.mongo_connector.update_records(
-            "company_docs",
-            {"company_name": company_name},
-            {"$addToSet": {"document_urls": cloud_url}},
-        )
-        return {"cloud_url": cloud_url}
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            stale = self._session
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+            self._session_loop = loop
+            if stale is not None:
+                await self._close_session(stale)
+        return self._session
+
+    @staticmethod
+    async def _close_session(session: aiohttp.ClientSession) -> None:
+        if not session.closed:
+            # Connections of a session left by a closed loop cannot be shut down
+            # cleanly, they went with the loop
+            with suppress(RuntimeError):
+                await session.close()
+
+    async def aclose(self) -> None:
+        """Close the Cloudinary connection pool. Meant to be called on shutdown."""
+        session, self._session = self._session, None
+        if session is not None:
+            await self._close_session(session)
+
+    async def upload_file(self, file, company_name: str = None) -> IngestionJobResponse:
+        """
+        Queue the file for ingestion by the background workers. The upload to
+        Cloudinary, extraction and embedding are tracked by the returned job.
+        """
+        return await self.ingestion_service.submit(file, company_name)
+
+    async def get_ingestion_job(self, job_id: str) -> IngestionJobResponse:
+        return await self.ingestion_service.aget_job(job_id)
+
+    async def retry_ingestion_job(self, job_id: str) -> IngestionJobResponse:
+        return await self.ingestion_service.aretry_job(job_id)
 
     @cacheable()
     async def get_company_docs(self, company_name: str) -> Documents:
@@ -85,6 +123,6 @@ class FilesService:
         cloud_name = app_settings.storage_config.cloud_name
         # Construct the raw file URL
         url = f"https://res.cloudinary.com/{cloud_name}/raw/upload/{public_id}"
-        resp = requests.get(url)
-        resp.raise_for_status()
-        return resp.content
+        session = await self._get_session()
+        async with session.get(url, raise_for_status=True) as resp:
+            return await resp.read()
@@ -1,4 +1,4 @@
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import Optional, Type, Union
 
 from agno.agent import Agent
@@ -66,6 +66,10 @@ class FinanceService:
             name=agent_name,
             model=self.sonar_model,
             instructions=prompt,
+            # In structured output mode Sonar generates the response schema directly
+            response_model=response_model
+            if self.sonar_config.structured_output
+            else None,
         )
 
         if use_knowledge_base:
@@ -73,10 +77,12 @@ class FinanceService:
             analysis_agent.knowledge_filters = {"company_name": company_name}
 
         # Use the LLM to generate the content
-        content = analysis_agent.run(prompt)
+        content = await analysis_agent.arun(prompt)
 
         # Parse the LLM output into the response model
-        response = self.llm_output_parser.parse(content.content, response_model)
+        response = await self.llm_output_parser.aparse(
+            content.content, response_model, endpoint=agent_name
+        )
 
         # Attach citations if response is a Pydantic model and has citations
         if hasattr(response, "citations") and hasattr(content, "citations"):
@@ -89,14 +95,14 @@ class FinanceService:
             chart_data = response.get_plot_data()
             builder = get_builder(chart_data.kind, self.netlify_agent)
             print("chart_data.kind", chart_data.kind)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception as e:
             print(f"Failed to generate plot for response as {e}")
             response.iframe_url = None
 
         return response
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_revenue_analysis(
         self,
         company_name: str,
@@ -148,7 +154,7 @@ class FinanceService:
             use_knowledge_base=use_knowledge_base,
         )
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_expense_analysis(
         self,
         company_name: str,
@@ -195,7 +201,7 @@ class FinanceService:
             use_knowledge_base=use_knowledge_base,
         )
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_profit_margins(
         self,
         company_name: str,
@@ -236,7 +242,7 @@ class FinanceService:
             use_knowledge_base=use_knowledge_base,
         )
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_valuation_estimation(
         self,
         company_name: str,
@@ -278,7 +284,7 @@ class FinanceService:
             use_knowledge_base=use_knowledge_base,
         )
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_funding_history(
         self,
         company_name: str,
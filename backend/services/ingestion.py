@@ -0,0 +1,465 @@
+import asyncio
+import os
+import shutil
+import socket
+import uuid
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from agno.document import Document
+
+from backend.agents.document_processing import (
+    SUPPORTED_EXTENSIONS,
+    UNSUPPORTED_FILE_MESSAGE,
+    DocumentProcessingEngine,
+)
+from backend.agents.vector_store import VectorStore
+from backend.database.mongo import MongoDBConnector, MongoIndexSpec
+from backend.models.base.exceptions import (
+    ConflictException,
+    NotFoundException,
+    UnsupportedFileException,
+)
+from backend.models.response.files import IngestionJobResponse
+from backend.settings import IngestionConfig, MongoConnectionDetails
+from backend.utils.logger import get_logger
+
+LOG = get_logger("IngestionService")
+
+# Indexes are ensured once per process
+_INDEXES_READY = False
+
+
+class _LeaseLost(Exception):
+    """The job was taken over by another worker after this one's lease expired"""
+
+
+class IngestionService:
+    """
+    Queue of document ingestion jobs in MongoDB, worked through by a pool of
+    background workers. Each job uploads the file to Cloudinary, extracts its pages
+    and writes them to the vector store. Every extracted page is checkpointed, so a
+    job that failed, or whose worker was restarted, resumes from the pages it has
+    left instead of paying for the extracted ones again.
+    """
+
+    JOBS_COLLECTION = "ingestion_jobs"
+    PAGES_COLLECTION = "ingestion_job_pages"
+
+    def __init__(
+        self,
+        doc_engine: DocumentProcessingEngine,
+        vector_store: VectorStore,
+        mongo_config: MongoConnectionDetails,
+        ingestion_config: Optional[IngestionConfig] = None,
+    ):
+        self.doc_engine = doc_engine
+        self.vector_store = vector_store
+        self.config = ingestion_config or IngestionConfig()
+        self.mongo_connector = MongoDBConnector(mongo_config)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._workers: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._setup_indexes()
+
+    def _setup_indexes(self):
+        global _INDEXES_READY
+        if _INDEXES_READY:
+            return
+        self.mongo_connector.create_indexes(
+            self.JOBS_COLLECTION,
+            [
+                MongoIndexSpec(
+                    keys=[("status", 1), ("available_at", 1)], name="queue_index"
+                ),
+                MongoIndexSpec(
+                    keys=[("status", 1), ("lease_expires_at", 1)], name="lease_index"
+                ),
+            ],
+        )
+        self.mongo_connector.create_indexes(
+            self.PAGES_COLLECTION,
+            [
+                MongoIndexSpec(
+                    keys=[("job_id", 1), ("page_number", 1)], name="job_index"
+                )
+            ],
+        )
+        _INDEXES_READY = True
+
+    @staticmethod
+    def _to_response(job: dict) -> IngestionJobResponse:
+        pages_total = job.get("pages_total")
+        # Extracting the pages is by far the longest stage, storing them is quick
+        progress = {"upload": 0.0, "done": 1.0}.get(job["stage"])
+        if progress is None:
+            progress = (
+                0.9 * job["pages_done"] / pages_total
+                + 0.1 * job["pages_stored"] / pages_total
+                if pages_total
+                else 0.0
+            )
+        return IngestionJobResponse(
+            job_id=job["_id"], progress=round(progress, 4), **job
+        )
+
+    async def submit(self, file, company_name: str = None) -> IngestionJobResponse:
+        """Save the uploaded file and queue it for ingestion"""
+        job_id = uuid.uuid4().hex
+        file_name = os.path.basename(file.filename)
+        if os.path.splitext(file_name)[1].lower() not in SUPPORTED_EXTENSIONS:
+            raise UnsupportedFileException(UNSUPPORTED_FILE_MESSAGE)
+        file_path = os.path.join(self.config.upload_dir, job_id, file_name)
+        content = await file.read()
+
+        def save():
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(content)
+
+        await asyncio.to_thread(save)
+        now = datetime.now(timezone.utc)
+        job = {
+            "_id": job_id,
+            "company_name": company_name,
+            "file_name": file_name,
+            "file_path": file_path,
+            "status": "queued",
+            "stage": "upload",
+            "attempts": 0,
+            "pages_total": None,
+            "pages_done": 0,
+            "pages_stored": 0,
+            "cloud_url": None,
+            "error": None,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        collection = await self.mongo_connector.aget_collection(self.JOBS_COLLECTION)
+        await collection.insert_one(job)
+        LOG.info(f"Queued ingestion job {job_id} for {file_name}")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return self._to_response(job)
+
+    async def aget_job(self, job_id: str) -> IngestionJobResponse:
+        collection = await self.mongo_connector.aget_collection(self.JOBS_COLLECTION)
+        job = await collection.find_one({"_id": job_id})
+        if job is None:
+            raise NotFoundException(f"Ingestion job {job_id} not found")
+        return self._to_response(job)
+
+    async def aretry_job(self, job_id: str) -> IngestionJobResponse:
+        """Queue a failed job again, it resumes from its checkpointed pages"""
+        now = datetime.now(timezone.utc)
+        collection = await self.mongo_connector.aget_collection(self.JOBS_COLLECTION)
+        result = await collection.update_one(
+            {"_id": job_id, "status": "failed"},
+            {
+                "$set": {
+                    "status": "queued",
+                    "attempts": 0,
+                    "available_at": now,
+                    "updated_at": now,
+                }
+            },
+        )
+        job = await self.aget_job(job_id)
+        if result.matched_count == 0:
+            raise ConflictException(
+                f"Ingestion job {job_id} is {job.status}, only failed jobs can be "
+                "retried"
+            )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    # Worker pool
+    def start(self) -> None:
+        """Start the background workers. Meant to be called once on startup."""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.config.workers)
+        ]
+        LOG.info(f"Started {self.config.workers} ingestion workers")
+
+    async def stop(self) -> None:
+        """Stop the workers, handing their jobs back to the queue"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self) -> None:
+        while True:
+            # Cleared before looking, so a job submitted meanwhile still wakes us
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                LOG.error(f"Could not claim an ingestion job: {e!r}")
+                job = None
+            if job is None:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), self.config.poll_interval_seconds
+                    )
+                continue
+            try:
+                await self._run(job)
+            except Exception as e:
+                LOG.error(f"Could not record the outcome of job {job['_id']}: {e!r}")
+
+    async def _claim(self) -> Optional[dict]:
+        """
+        Atomically claim the oldest queued job, or a running one whose worker
+        stopped renewing its lease, e.g. because its process was restarted
+        """
+        from pymongo import ReturnDocument
+
+        now = datetime.now(timezone.utc)
+        collection = await self.mongo_connector.aget_collection(self.JOBS_COLLECTION)
+        return await collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    {"status": "running", "lease_expires_at": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    # Unique per claim, workers of the same process share worker_id
+                    "lease_owner": f"{self.worker_id}/{uuid.uuid4().hex}",
+                    "lease_expires_at": now
+                    + timedelta(seconds=self.config.lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _update(self, job: dict, fields: dict) -> None:
+        """
+        Update a claimed job, only while this worker still holds its lease.
+        Raises _LeaseLost once another worker has taken the job over.
+        """
+        collection = await self.mongo_connector.aget_collection(self.JOBS_COLLECTION)
+        result = await collection.update_one(
+            {"_id": job["_id"], "lease_owner": job["lease_owner"]},
+            {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}},
+        )
+        if result.matched_count == 0:
+            raise _LeaseLost(f"Lost the lease on ingestion job {job['_id']}")
+
+    async def _renew_lease(self, job: dict) -> None:
+        lease = timedelta(seconds=self.config.lease_seconds)
+        await self._update(
+            job, {"lease_expires_at": datetime.now(timezone.utc) + lease}
+        )
+
+    async def _heartbeat(self, job: dict, ingest: asyncio.Task) -> None:
+        """
+        Renew the lease on a job for as long as it is being worked on, and stop the
+        work once the job has been taken over by another worker
+        """
+        while True:
+            await asyncio.sleep(self.config.lease_seconds / 3)
+            try:
+                await self._renew_lease(job)
+            except _LeaseLost as e:
+                LOG.warning(f"{e}, stopping it")
+                ingest.cancel(msg="lease lost")
+                return
+            except Exception as e:
+                LOG.warning(f"Could not renew the lease on job {job['_id']}: {e!r}")
+
+    async def _run(self, job: dict) -> None:
+        job_id = job["_id"]
+        if job["attempts"] > self.config.max_attempts:
+            # Claimed again after its lease expired one time too many, e.g. the
+            # file crashes the worker
+            await self._update(
+                job,
+                {
+                    "status": "failed",
+                    "error": f"Gave up after {self.config.max_attempts} attempts",
+                },
+            )
+            return
+
+        LOG.info(f"Running ingestion job {job_id}, attempt {job['attempts']}")
+        ingest = asyncio.create_task(self._ingest(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, ingest))
+        try:
+            await ingest
+        except _LeaseLost as e:
+            LOG.warning(f"{e}, leaving it to the new owner")
+        except asyncio.CancelledError:
+            if heartbeat.done() and not asyncio.current_task().cancelling():
+                # Stopped by the heartbeat, the job belongs to another worker now
+                return
+            # Shutting down, hand the job back so it resumes on the next start
+            with suppress(_LeaseLost):
+                await asyncio.shield(
+                    self._update(job, {"status": "queued", "lease_expires_at": None})
+                )
+            raise
+        except Exception as e:
+            LOG.error(f"Ingestion job {job_id} failed: {e!r}")
+            fields = {"error": repr(e), "lease_expires_at": None}
+            if job["attempts"] >= self.config.max_attempts:
+                fields["status"] = "failed"
+            else:
+                delay = self.config.retry_delay_seconds * 2 ** (job["attempts"] - 1)
+                fields["status"] = "queued"
+                fields["available_at"] = datetime.now(timezone.utc) + timedelta(
+                    seconds=delay
+                )
+            with suppress(_LeaseLost):
+                await self._update(job, fields)
+        finally:
+            heartbeat.cancel()
+            ingest.cancel()
+
+    async def _ingest(self, job: dict) -> None:
+        job_id, file_path = job["_id"], job["file_path"]
+        company_name = job["company_name"]
+        cloud_url = job["cloud_url"]
+        if not cloud_url:
+            cloud_url = await asyncio.to_thread(
+                self.doc_engine.upload_to_cloudinary, file_path
+            )
+            await self._update(job, {"cloud_url": cloud_url, "stage": "extract"})
+        elif not os.path.exists(file_path):
+            # Resumed on another host, or the upload directory was cleared
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            await asyncio.to_thread(
+                self.doc_engine.download_from_cloudinary, cloud_url, file_path
+            )
+
+        pages_total = job["pages_total"]
+        if pages_total is None:
+            pages_total = await asyncio.to_thread(self.doc_engine.page_count, file_path)
+            await self._update(job, {"pages_total": pages_total})
+
+        await self._extract(job, pages_total)
+        await self._store(job)
+
+        # Add the public URL to the company_docs collection
+        company_docs = await self.mongo_connector.aget_collection("company_docs")
+        await company_docs.update_one(
+            {"company_name": company_name},
+            {"$addToSet": {"document_urls": cloud_url}},
+            upsert=True,
+        )
+        now = datetime.now(timezone.utc)
+        await self._update(
+            job,
+            {
+                "status": "completed",
+                "stage": "done",
+                "error": None,
+                "lease_expires_at": None,
+                "finished_at": now,
+            },
+        )
+        await self.mongo_connector.adelete_records(
+            self.PAGES_COLLECTION, {"job_id": job_id}
+        )
+        await asyncio.to_thread(
+            shutil.rmtree, os.path.dirname(file_path), ignore_errors=True
+        )
+        LOG.info(f"Ingestion job {job_id} completed, {pages_total} pages")
+
+    async def _extract(self, job: dict, pages_total: int) -> None:
+        """Extract the pages without a checkpoint, checkpointing each as it is done"""
+        job_id = job["_id"]
+        pages = await self.mongo_connector.aget_collection(self.PAGES_COLLECTION)
+        jobs = await self.mongo_connector.aget_collection(self.JOBS_COLLECTION)
+        done = frozenset(
+            [
+                page["page_number"]
+                async for page in pages.find({"job_id": job_id}, {"page_number": 1})
+            ]
+        )
+        if len(done) < pages_total:
+            await self._update(job, {"stage": "extract"})
+            if done:
+                LOG.info(f"Resuming job {job_id} with {len(done)} pages extracted")
+
+        async def checkpoint(page_number: int, doc: Optional[Document]) -> None:
+            result = await pages.update_one(
+                {"_id": f"{job_id}:{page_number}"},
+                {
+                    "$setOnInsert": {
+                        "job_id": job_id,
+                        "page_number": page_number,
+                        "document": doc.to_dict() if doc is not None else None,
+                        "stored": False,
+                    }
+                },
+                upsert=True,
+            )
+            if result.upserted_id is not None:
+                await jobs.update_one(
+                    {"_id": job_id},
+                    {
+                        "$inc": {"pages_done": 1},
+                        "$set": {"updated_at": datetime.now(timezone.utc)},
+                    },
+                )
+
+        if len(done) < pages_total:
+            await self.doc_engine.aextract_text(
+                job["file_path"],
+                job["file_name"],
+                job["company_name"],
+                skip_pages=done,
+                on_page=checkpoint,
+            )
+        extracted = await pages.count_documents({"job_id": job_id})
+        if extracted < pages_total:
+            # The next attempt only extracts the pages that are missing
+            raise RuntimeError(
+                f"{pages_total - extracted} of {pages_total} pages could not be "
+                "extracted"
+            )
+
+    async def _store(self, job: dict) -> None:
+        """Embed and store the extracted pages not stored yet, in batches"""
+        job_id = job["_id"]
+        await self._update(job, {"stage": "store"})
+        pages = await self.mongo_connector.aget_collection(self.PAGES_COLLECTION)
+        jobs = await self.mongo_connector.aget_collection(self.JOBS_COLLECTION)
+        unstored = (
+            await pages.find({"job_id": job_id, "stored": False})
+            .sort("page_number", 1)
+            .to_list(length=None)
+        )
+        batch_size = self.config.store_batch_size
+        for start in range(0, len(unstored), batch_size):
+            batch = unstored[start : start + batch_size]
+            documents = [
+                Document.from_dict(page["document"])
+                for page in batch
+                if page["document"] is not None
+            ]
+            # A worker that lost the job must not write the same pages again
+            await self._renew_lease(job)
+            if documents:
+                await self.vector_store.add_documents(documents, job["company_name"])
+            await pages.update_many(
+                {"_id": {"$in": [page["_id"] for page in batch]}},
+                {"$set": {"stored": True}},
+            )
+            await jobs.update_one(
+                {"_id": job_id}, {"$inc": {"pages_stored": len(batch)}}
+            )
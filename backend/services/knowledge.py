@@ -1,7 +1,20 @@
+import asyncio
+from typing import Optional
+
+import numpy as np
+from agno.document import Document
+
+from backend.database.mongo import MongoDBConnector
 from backend.settings import VectorStoreConfig, MongoConnectionDetails
 from agno.vectordb.mongodb import MongoDb
 from agno.knowledge import AgentKnowledge
 from backend.utils.llm import get_embedding_model
+from backend.utils.logger import get_logger
+
+LOG = get_logger("KnowledgeBaseService")
+
+# Field the vector search index filters chunks on, set by document ingestion
+COMPANY_FILTER_PATH = "meta_data.company"
 
 
 class KnowledgeBaseService:
@@ -21,6 +34,170 @@ class KnowledgeBaseService:
             wait_until_index_ready=60,
             wait_after_insert=300,
         )
+        self.mongo_connector = MongoDBConnector(db_config)
+        self._filter_index_ready = False
 
     def get_knowledge_base(self):
         return AgentKnowledge(vector_db=self.vector_db)
+
+    def _embed_queries(self, queries: list[str]) -> np.ndarray:
+        """
+        Embed all queries with a single embeddings request, with the same request
+        parameters the embedder uses for a single text
+        """
+        embedder = self.embedder
+        params = {
+            "input": queries,
+            "model": embedder.id,
+            "encoding_format": embedder.encoding_format,
+        }
+        if embedder.user is not None:
+            params["user"] = embedder.user
+        if embedder.id.startswith("text-embedding-3"):
+            params["dimensions"] = embedder.dimensions
+        if embedder.request_params:
+            params.update(embedder.request_params)
+        response = embedder.client.embeddings.create(**params)
+        data = sorted(response.data, key=lambda d: d.index)
+        return np.array([d.embedding for d in data], dtype=np.float32)
+
+    def _search_index(self, collection) -> Optional[dict]:
+        indexes = list(collection.list_search_indexes(self.vector_db.search_index_name))
+        return indexes[0] if indexes else None
+
+    @staticmethod
+    def _has_company_filter(index: dict) -> bool:
+        fields = index.get("latestDefinition", {}).get("fields", [])
+        return any(
+            f.get("type") == "filter" and f.get("path") == COMPANY_FILTER_PATH
+            for f in fields
+        )
+
+    def ensure_company_filter_index(self) -> None:
+        """
+        Add the company field to the vector search index as a filter field, run
+        once at startup. The index created by agno only indexes the embeddings.
+        Changing the definition rebuilds the index, and until it is rebuilt shared
+        retrieval is refused rather than run unfiltered.
+        """
+        collection = self.mongo_connector.get_collection(
+            self.vector_store_config.mongo_collection
+        )
+        index_name = self.vector_db.search_index_name
+        index = self._search_index(collection)
+        if index is None:
+            LOG.warning(
+                f"Vector search index {index_name} does not exist yet, the company "
+                "filter is added on the next startup after it is created"
+            )
+            return
+        if self._has_company_filter(index):
+            return
+        LOG.info(f"Adding {COMPANY_FILTER_PATH} to {index_name} as a filter")
+        definition = index.get("latestDefinition", {})
+        collection.update_search_index(
+            index_name,
+            {
+                **definition,
+                "fields": definition.get("fields", [])
+                + [{"type": "filter", "path": COMPANY_FILTER_PATH}],
+            },
+        )
+
+    def _check_company_filter(self, collection) -> None:
+        """Raise unless the search index can filter on the company yet"""
+        if self._filter_index_ready:
+            return
+        index = self._search_index(collection)
+        # The index is READY once its latest definition has been built
+        if (
+            index is None
+            or not self._has_company_filter(index)
+            or index.get("status") != "READY"
+        ):
+            raise RuntimeError(
+                f"Vector search index {self.vector_db.search_index_name} cannot "
+                f"filter on {COMPANY_FILTER_PATH} yet"
+            )
+        self._filter_index_ready = True
+
+    def retrieve_for_queries(
+        self,
+        queries: list[str],
+        company: Optional[str] = None,
+        top_k: int = 5,
+        pool_size: int = 100,
+    ) -> Optional[list[list[Document]]]:
+        """
+        Retrieve the top_k chunks for each of several related queries with one
+        embeddings request and one vector search. The search uses the mean of the
+        query vectors to pull a candidate pool for the company, which is then ranked
+        per query locally by cosine similarity. Returns None when there are no
+        candidate chunks at all, and raises when the search index cannot filter on the
+        company yet.
+        """
+        collection = self.mongo_connector.get_collection(
+            self.vector_store_config.mongo_collection
+        )
+        if company:
+            self._check_company_filter(collection)
+        query_vectors = self._embed_queries(queries)
+        centroid = query_vectors.mean(axis=0)
+
+        vector_search = {
+            "index": self.vector_db.search_index_name,
+            "path": "embedding",
+            "queryVector": centroid.tolist(),
+            "limit": pool_size,
+            "numCandidates": min(pool_size * 10, 10000),
+        }
+        if company:
+            # Filtered inside the search, a $match after it would only see the
+            # nearest chunks across all companies
+            vector_search["filter"] = {COMPANY_FILTER_PATH: {"$eq": company}}
+        pipeline = [
+            {"$vectorSearch": vector_search},
+            {"$project": {"name": 1, "content": 1, "meta_data": 1, "embedding": 1}},
+        ]
+        candidates = list(collection.aggregate(pipeline))
+        LOG.info(
+            f"Retrieved {len(candidates)} candidate chunks for {len(queries)} queries"
+        )
+        if not candidates:
+            return None
+
+        chunk_vectors = np.array([c["embedding"] for c in candidates], dtype=np.float32)
+        chunk_vectors /= np.linalg.norm(chunk_vectors, axis=1, keepdims=True) + 1e-12
+        query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True) + 1e-12
+        scores = query_vectors @ chunk_vectors.T
+
+        results = []
+        for query_scores in scores:
+            ranked = np.argsort(-query_scores)[:top_k]
+            results.append(
+                [
+                    Document(
+                        id=str(candidates[i]["_id"]),
+                        name=candidates[i].get("name"),
+                        content=candidates[i]["content"],
+                        meta_data={
+                            **candidates[i].get("meta_data", {}),
+                            "score": float(query_scores[i]),
+                        },
+                    )
+                    for i in ranked
+                ]
+            )
+        return results
+
+    async def aretrieve_for_queries(
+        self,
+        queries: list[str],
+        company: Optional[str] = None,
+        top_k: int = 5,
+        pool_size: int = 100,
+    ) -> Optional[list[list[Document]]]:
+        """Async version of retrieve_for_queries"""
+        return await asyncio.to_thread(
+            self.retrieve_for_queries, queries, company, top_k, pool_size
+        )
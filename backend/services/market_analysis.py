@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 from backend.settings import LLMConfig, SonarConfig
 from backend.utils.llm import get_model, get_sonar_model
@@ -54,6 +54,10 @@ class MarketAnalysisService:
             name=agent_name,
             model=self.sonar_model,
             instructions=prompt,
+            # In structured output mode Sonar generates the response schema directly
+            response_model=response_model
+            if self.sonar_config.structured_output
+            else None,
         )
 
         if use_knowledge_base:
@@ -61,10 +65,12 @@ class MarketAnalysisService:
             analysis_agent.knowledge_filters = {"company_name": company_name}
 
         # Use the LLM to generate the content
-        content = analysis_agent.run(prompt)
+        content = await analysis_agent.arun(prompt)
 
         # Parse the LLM output into the response model
-        response = self.llm_output_parser.parse(content.content, response_model)
+        response = await self.llm_output_parser.aparse(
+            content.content, response_model, endpoint=agent_name
+        )
 
         # Attach citations if response is a Pydantic model and has citations
         if hasattr(response, "citations") and hasattr(content, "citations"):
@@ -75,13 +81,13 @@ class MarketAnalysisService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder(chart_data.kind, self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
 
         return response
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_market_trends(
         self,
         company_name: str,
@@ -90,7 +96,7 @@ class MarketAnalysisService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> MarketTrendsResponse:
         """
         Retrieve market trends data for a company.
         Args:
@@ -128,7 +134,7 @@ class MarketAnalysisService:
             use_knowledge_base=use_knowledge_base,
         )
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_competitive_analysis(
         self,
         company_name: str,
@@ -137,7 +143,7 @@ class MarketAnalysisService:
         region: Optional[str] = None,
         companies_to_compare: Optional[list[str]] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> CompetitiveAnalysisResponse:
         prompt = f"""
         The current date is {datetime.now().isoformat()}. 
         You are a financial analyst with access to reputable market research sources. Generate a detailed competitive analysis for the following company:
@@ -163,7 +169,7 @@ class MarketAnalysisService:
             use_knowledge_base=use_knowledge_base,
         )
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_growth_projections(
         self,
         company_name: str,
@@ -172,7 +178,7 @@ class MarketAnalysisService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> GrowthProjectionsResponse:
         prompt = f"""
         The current date is {datetime.now().isoformat()}. 
         You are a financial analyst with access to reputable market research sources. Generate a detailed growth projections analysis for the following company:
@@ -198,7 +204,7 @@ class MarketAnalysisService:
             use_knowledge_base=use_knowledge_base,
         )
 
-    @cacheable()
+    @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
     async def get_regional_trends(
         self,
         company_name: str,
@@ -207,7 +213,7 @@ class MarketAnalysisService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> RegionalTrendsResponse:
         prompt = f"""
         The current date is {datetime.now().isoformat()}. 
         You are a financial analyst with access to reputable market research sources. Generate a detailed regional trends analysis for the following company:
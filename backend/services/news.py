@@ -48,15 +48,21 @@ class NewsService:
             name=agent_name,
             model=self.sonar_model,
             instructions=prompt,
+            # In structured output mode Sonar generates the response schema directly
+            response_model=response_model
+            if self.sonar_config.structured_output
+            else None,
         )
         s = datetime.now()
         # Use the LLM to generate the content
-        content = analysis_agent.run(prompt)
+        content = await analysis_agent.arun(prompt)
         LOG.info(f"Sonar response generated in {datetime.now() - s} seconds")
 
         # Parse the LLM output into the response model
         s = datetime.now()
-        response = self.llm_output_parser.parse(content.content, response_model)
+        response = await self.llm_output_parser.aparse(
+            content.content, response_model, endpoint=agent_name
+        )
         LOG.info(f"Chatgpt took to Response parsed in {datetime.now() - s} seconds")
         # 3) Extract actual list of NewsItem
         news_items: list[NewsItem] = response.news_items
@@ -23,7 +23,7 @@ class PartnershipNetworkService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> PartnerListResponse:
         data = {
             "company_name": company_name,
             "partners": [
@@ -53,7 +53,7 @@ class PartnershipNetworkService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -65,7 +65,7 @@ class PartnershipNetworkService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> StrategicAlliancesResponse:
         data = {
             "company_name": company_name,
             "alliances": [
@@ -95,7 +95,7 @@ class PartnershipNetworkService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -107,7 +107,7 @@ class PartnershipNetworkService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> NetworkStrengthResponse:
         data = {
             "company_name": company_name,
             "network_metrics": [
@@ -132,7 +132,7 @@ class PartnershipNetworkService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -146,7 +146,7 @@ class PartnershipNetworkService:
         region: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-    ):
+    ) -> PartnershipTrendsResponse:
         data = {
             "company_name": company_name,
             "partnership_trends_timeseries": [
@@ -177,7 +177,7 @@ class PartnershipNetworkService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
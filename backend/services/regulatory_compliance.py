@@ -23,7 +23,7 @@ class RegulatoryComplianceService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> ComplianceOverviewResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -56,7 +56,7 @@ class RegulatoryComplianceService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -70,7 +70,7 @@ class RegulatoryComplianceService:
         region: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-    ):
+    ) -> ViolationHistoryResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -106,7 +106,7 @@ class RegulatoryComplianceService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -118,7 +118,7 @@ class RegulatoryComplianceService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> ComplianceRiskResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -147,7 +147,7 @@ class RegulatoryComplianceService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -159,7 +159,7 @@ class RegulatoryComplianceService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         regions: Optional[List[str]] = None,
-    ):
+    ) -> RegionalComplianceResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -209,7 +209,7 @@ class RegulatoryComplianceService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -1,12 +1,24 @@
+import math
+from datetime import timedelta
+from typing import Optional, Type
+
 from agno.agent import Agent
+from agno.document import Document
+from pydantic import BaseModel
 
 from backend.agents.netlify import NetlifyAgent
 from backend.agents.output_parser import LLMOutputParserAgent
 from backend.database.mongo import MongoDBConnector
 from backend.models.base.exceptions import Status
 from backend.plot.factory import get_builder
+from backend.plot.publisher import ChartBatch, ChartPublisher
 from backend.services.knowledge import KnowledgeBaseService
-from backend.settings import MongoConnectionDetails, LLMConfig
+from backend.settings import (
+    MongoConnectionDetails,
+    LLMConfig,
+    ResearchConfig,
+    get_app_settings,
+)
 import asyncio
 
 from backend.services.finance import FinanceService
@@ -45,12 +57,15 @@ from backend.models.response.market_analysis import (
 from backend.utils.cache_decorator import cacheable
 from backend.utils.exceptions import ServiceException
 from backend.utils.llm import get_model
+from backend.utils.logger import get_logger
 
 # Apply OpenAI client patch to fix AttributeError during garbage collection
 from backend.utils.openai_patch import patch_openai_client
 
 patch_openai_client()
 
+LOG = get_logger("ResearchService")
+
 
 # Common base system prompt for all section/field LLMs
 def BASE_SYSTEM_PROMPT():
@@ -83,6 +98,30 @@ Below is the schema for your field:
 """
 
 
+# Finance fields
+DEEP_RESEARCH_FINANCE_FIELDS = [
+    ("revenue", RevenueAnalysisResponse),
+    ("expenses", ExpenseAnalysisResponse),
+    ("margins", ProfitMarginsResponse),
+    ("valuation", ValuationEstimationResponse),
+    ("funding", FundingHistoryResponse),
+]
+# Team fields
+DEEP_RESEARCH_TEAM_FIELDS = [
+    ("team_overview", TeamOverviewResponse),
+    ("individual_performance", IndividualPerformanceResponse),
+    ("org_structure", OrgStructureResponse),
+    ("team_growth", TeamGrowthResponse),
+]
+# Market Analysis fields
+DEEP_RESEARCH_MARKET_FIELDS = [
+    ("market_trends", MarketTrendsResponse),
+    ("competitive_analysis", CompetitiveAnalysisResponse),
+    ("growth_projections", GrowthProjectionsResponse),
+    ("regional_trends", RegionalTrendsResponse),
+]
+
+
 class ResearchService:
     def __init__(
         self,
@@ -97,6 +136,7 @@ class ResearchService:
         db_config: MongoConnectionDetails,
         llm_config: LLMConfig,
         netlify_agent: NetlifyAgent,
+        research_config: Optional[ResearchConfig] = None,
     ):
         self.finance_service = finance_service
         self.linkedin_team_service = linkedin_team_service
@@ -105,30 +145,49 @@ class ResearchService:
         self.customer_sentiment_service = customer_sentiment_service
         self.regulatory_compliance_service = regulatory_compliance_service
         self.risk_analysis_service = risk_analysis_service
+        self.knowledge_base_service = knowledge_base_service
         self.knowledge_base = knowledge_base_service.get_knowledge_base()
         self.db_config = db_config
         self.mongo_connector = MongoDBConnector(db_config)
         self.llm_model = get_model(llm_config)
         self.llm_output_parser = LLMOutputParserAgent(self.llm_model)
         self.netlify_agent = netlify_agent
+        self.research_config = research_config or ResearchConfig()
+        # Caps field agents across all concurrent deep research requests served by
+        # this service, which is a singleton per process
+        self.field_limit = asyncio.Semaphore(
+            self.research_config.global_field_concurrency
+        )
 
     async def _llm_field(
-        self, company: str, section_name, field_name, schema, knowledge
+        self,
+        company: str,
+        section_name,
+        field_name,
+        schema,
+        knowledge,
+        references: Optional[list[Document]] = None,
     ):
         prompt = FIELD_SYSTEM_PROMPT(field_name, schema)
+        input_text = (
+            f"Generate the {company} {field_name} field for the {section_name} section"
+        )
+        if references:
+            # Knowledge was retrieved up front for the whole request, so the agent
+            # gets its chunks directly instead of running its own searches
+            excerpts = "\n\n".join(doc.content for doc in references)
+            input_text = f"{input_text}\n\nKnowledge base excerpts:\n{excerpts}"
+            knowledge = None
         agent = Agent(
             name=f"{section_name}_{field_name}Agent",
             model=self.llm_model,
             instructions=prompt,
             response_model=schema,
             knowledge=knowledge,
-            search_knowledge=True,
+            search_knowledge=knowledge is not None,
             use_json_mode=True,
             show_tool_calls=True,
         )
-        input_text = (
-            f"Generate the {company} {field_name} field for the {section_name} section"
-        )
         # LOG THE CONTEXT
         # print(f"\n--- LLM CONTEXT FOR {section_name.upper()} - {field_name.upper()} ---")
         # print("Prompt:\n", prompt)
@@ -138,6 +197,145 @@ class ResearchService:
         response = await agent.arun(input_text)
         return response.content
 
+    async def _retrieve_field_references(
+        self, company: str, fields: list[tuple[str, str, Type[BaseModel]]]
+    ) -> Optional[list[list[Document]]]:
+        """
+        Shared retrieval for all field agents of a request: one batched embedding of
+        the field queries and one vector search over the company's chunks. Returns
+        None if it fails or finds nothing, in which case every agent searches the
+        knowledge base itself.
+        """
+        queries = [
+            f"{company} {section_name} {field_name.replace('_', ' ')}: "
+            + ", ".join(schema.model_fields)
+            for section_name, field_name, schema in fields
+        ]
+        try:
+            return await self.knowledge_base_service.aretrieve_for_queries(
+                queries,
+                company=company,
+                top_k=self.research_config.references_per_field,
+            )
+        except Exception as e:
+            LOG.warning(
+                f"Shared retrieval failed for {company}, agents will search: {e}"
+            )
+            return None
+
+    async def _run_fields(
+        self,
+        company: str,
+        fields: list[tuple[str, str, Type[BaseModel]]],
+        knowledge,
+        references: Optional[list[list[Document]]] = None,
+    ) -> list[Optional[BaseModel]]:
+        """
+        Run the (section, field, schema) field agents concurrently, bounded both per
+        request and process-wide. A field that fails, times out or does not produce
+        its schema comes back as None so the rest of the research is kept.
+        """
+        config = self.research_config
+        request_limit = asyncio.Semaphore(config.field_concurrency)
+
+        async def run(
+            section_name: str,
+            field_name: str,
+            schema: Type[BaseModel],
+            field_references: Optional[list[Document]],
+        ):
+            async with request_limit, self.field_limit:
+                try:
+                    result = await asyncio.wait_for(
+                        self._llm_field(
+                            company,
+                            section_name,
+                            field_name,
+                            schema,
+                            knowledge,
+                            field_references,
+                        ),
+                        timeout=config.field_timeout_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    LOG.warning(f"{section_name}.{field_name} timed out for {company}")
+                    return None
+                except Exception as e:
+                    LOG.error(f"{section_name}.{field_name} failed for {company}: {e}")
+                    return None
+            if not isinstance(result, schema):
+                LOG.warning(f"{section_name}.{field_name} did not match its schema")
+                return None
+            return result
+
+        if references is None:
+            references = [None] * len(fields)
+        return await asyncio.gather(
+            *(run(*field, refs) for field, refs in zip(fields, references))
+        )
+
+    def _deep_research_lease_ttl(self) -> timedelta:
+        """
+        How long a worker may hold the get_deep_research lease: the worst case of
+        every round of field agents running into its timeout, with margin for the
+        shared retrieval and chart publishing around them.
+        """
+        config = self.research_config
+        n_fields = (
+            len(DEEP_RESEARCH_FINANCE_FIELDS)
+            + len(DEEP_RESEARCH_TEAM_FIELDS)
+            + len(DEEP_RESEARCH_MARKET_FIELDS)
+        )
+        concurrency = max(
+            1, min(config.field_concurrency, config.global_field_concurrency)
+        )
+        rounds = math.ceil(n_fields / concurrency)
+        return timedelta(seconds=rounds * config.field_timeout_seconds * 1.5 + 300)
+
+    async def _publish_charts(self, company_name: str, responses: list[tuple]) -> None:
+        """
+        Build the plot of each (field_name, response) that has one and attach it as
+        configured: as a chart_spec, and/or as an iframe_url with all charts
+        published in one Netlify deploy.
+        """
+        output = get_app_settings().chart_render_config.output
+        charts = {}
+        for field_name, response in responses:
+            if response is not None and hasattr(response, "get_plot_data"):
+                response.iframe_url = None
+                try:
+                    chart_data = response.get_plot_data()
+                    builder = get_builder(chart_data.kind, self.netlify_agent)
+                    charts[field_name] = (response, builder, chart_data)
+                except Exception as e:
+                    LOG.error(f"Plot build failed for {field_name}: {e}")
+
+        if output in ("spec", "both"):
+            specs = await asyncio.gather(
+                *(
+                    builder.aspec(chart_data, company_name)
+                    for _, builder, chart_data in charts.values()
+                ),
+                return_exceptions=True,
+            )
+            for (field_name, (response, *_)), spec in zip(charts.items(), specs):
+                if isinstance(spec, Exception):
+                    LOG.error(f"Chart spec failed for {field_name}: {spec}")
+                else:
+                    response.chart_spec = spec
+
+        if output in ("iframe", "both"):
+            publisher = ChartPublisher(self.netlify_agent)
+            for field_name, (_, builder, chart_data) in charts.items():
+                publisher.add(field_name, builder, chart_data, company_name)
+            try:
+                urls = await publisher.publish()
+            except Exception as e:
+                LOG.error(f"Publishing charts for {company_name} failed: {e}")
+                urls = {}
+            for field_name, (response, *_) in charts.items():
+                response.iframe_url = urls.get(field_name)
+
     async def get_research(self, company_name: str, use_knowledge_base: bool = False):
         """
         Get comprehensive research data for a company by calling multiple service agents in parallel (fully concurrent, not batched).
@@ -190,8 +388,12 @@ class ResearchService:
             ),
         ]
 
-        # Run all service calls concurrently
-        results = await asyncio.gather(*coros, return_exceptions=True)
+        # Run all service calls concurrently, their charts are published together
+        # in a single deploy once every call has built its chart or returned
+        chart_batch = ChartBatch(self.netlify_agent, len(coros))
+        results = await asyncio.gather(
+            *(chart_batch.run(coro) for coro in coros), return_exceptions=True
+        )
 
         # Unpack results
         (
@@ -210,26 +412,6 @@ class ResearchService:
             regional_trends,
         ) = results
 
-        # For each finance field, try to build the plot and set iframe_url
-        finance_fields = [
-            (revenue, "revenue"),
-            (expenses, "expenses"),
-            (margins, "margins"),
-            (valuation, "valuation"),
-            (funding, "funding"),
-        ]
-        for idx, (field_name, _) in enumerate(finance_fields):
-            response = results[idx]
-            if response is not None and hasattr(response, "get_plot_data"):
-                try:
-                    chart_data = response.get_plot_data()
-                    builder = get_builder(chart_data.kind, self.netlify_agent)
-                    print("chart_data.kind", chart_data.kind)
-                    response.iframe_url = await builder.plot(chart_data, company_name)
-                except Exception as e:
-                    print(f"Plot build failed for {field_name}: {e}")
-                    response.iframe_url = None
-
         finance_response = FinanceResponse(
             revenue=revenue if not isinstance(revenue, Exception) else None,
             expenses=expenses if not isinstance(expenses, Exception) else None,
@@ -281,10 +463,15 @@ class ResearchService:
 
         return research_response
 
-    @cacheable()
+    @cacheable(
+        ttl=timedelta(days=7),
+        soft_ttl=timedelta(days=1),
+        distributed=True,
+        lease_ttl=lambda service: service._deep_research_lease_ttl(),
+    )
     async def get_deep_research(
         self, company_name: str, use_knowledge_base: bool = False
-    ):
+    ) -> ResearchResponse:
         get_basic_company_info = await self.mongo_connector.aquery(
             "company_info", {"company_name": company_name}
         )
@@ -293,100 +480,37 @@ class ResearchService:
                 status=Status.NOT_FOUND, message="Company not found."
             )
 
-        # Finance fields
-        finance_fields = [
-            ("revenue", RevenueAnalysisResponse),
-            ("expenses", ExpenseAnalysisResponse),
-            ("margins", ProfitMarginsResponse),
-            ("valuation", ValuationEstimationResponse),
-            ("funding", FundingHistoryResponse),
-        ]
-        finance_tasks = [
-            self._llm_field(
-                company_name, "Finance", fname, fschema, self.knowledge_base
-            )
-            for fname, fschema in finance_fields
-        ]
-        # Team fields
-        team_fields = [
-            ("team_overview", TeamOverviewResponse),
-            ("individual_performance", IndividualPerformanceResponse),
-            ("org_structure", OrgStructureResponse),
-            ("team_growth", TeamGrowthResponse),
-        ]
-        team_tasks = [
-            self._llm_field(
-                company_name,
-                "Team",
-                fname,
-                fschema,
-                self.knowledge_base,
-            )
-            for fname, fschema in team_fields
-        ]
-        # Market Analysis fields
-        market_fields = [
-            ("market_trends", MarketTrendsResponse),
-            ("competitive_analysis", CompetitiveAnalysisResponse),
-            ("growth_projections", GrowthProjectionsResponse),
-            ("regional_trends", RegionalTrendsResponse),
-        ]
-        market_tasks = [
-            self._llm_field(
-                company_name, "MarketAnalysis", fname, fschema, self.knowledge_base
-            )
-            for fname, fschema in market_fields
-        ]
-
-        # Run all field LLMs sequentially (no parallel gather)
-        finance_results = []
-        for task in finance_tasks:
-            finance_results.append(await task)
-        team_results = []
-        for task in team_tasks:
-            team_results.append(await task)
-        market_results = []
-        for task in market_tasks:
-            market_results.append(await task)
-
-        # For each finance field, try to build the plot and set iframe_url
-        for idx, (field_name, _) in enumerate(finance_fields):
-            response = finance_results[idx]
-            if response is not None and hasattr(response, "get_plot_data"):
-                try:
-                    chart_data = response.get_plot_data()
-                    builder = get_builder(chart_data.kind, self.netlify_agent)
-                    print("chart_data.kind", chart_data.kind)
-                    response.iframe_url = await builder.plot(chart_data, company_name)
-                except Exception as e:
-                    print(f"Plot build failed for {field_name}: {e}")
-                    response.iframe_url = None
-
-        # For each team field, try to build the plot and set iframe_url
-        for idx, (field_name, _) in enumerate(team_fields):
-            response = team_results[idx]
-            if response is not None and hasattr(response, "get_plot_data"):
-                try:
-                    chart_data = response.get_plot_data()
-                    builder = get_builder(chart_data.kind, self.netlify_agent)
-                    print("chart_data.kind", chart_data.kind)
-                    response.iframe_url = await builder.plot(chart_data, company_name)
-                except Exception as e:
-                    print(f"Plot build failed for {field_name}: {e}")
-                    response.iframe_url = None
+        fields = (
+            [
+                ("Finance", fname, fschema)
+                for fname, fschema in DEEP_RESEARCH_FINANCE_FIELDS
+            ]
+            + [("Team", fname, fschema) for fname, fschema in DEEP_RESEARCH_TEAM_FIELDS]
+            + [
+                ("MarketAnalysis", fname, fschema)
+                for fname, fschema in DEEP_RESEARCH_MARKET_FIELDS
+            ]
+        )
+        references = await self._retrieve_field_references(company_name, fields)
 
-        # For each market analysis field, try to build the plot and set iframe_url
-        for idx, (field_name, _) in enumerate(market_fields):
-            response = market_results[idx]
-            if response is not None and hasattr(response, "get_plot_data"):
-                try:
-                    chart_data = response.get_plot_data()
-                    builder = get_builder(chart_data.kind, self.netlify_agent)
-                    print("chart_data.kind", chart_data.kind)
-                    response.iframe_url = await builder.plot(chart_data, company_name)
-                except Exception as e:
-                    print(f"Plot build failed for {field_name}: {e}")
-                    response.iframe_url = None
+        # Run all field LLMs in parallel, within the configured concurrency limits
+        results = await self._run_fields(
+            company_name, fields, self.knowledge_base, references
+        )
+        n_finance = len(DEEP_RESEARCH_FINANCE_FIELDS)
+        n_market = len(DEEP_RESEARCH_MARKET_FIELDS)
+        finance_results = results[:n_finance]
+        team_results = results[n_finance:-n_market]
+        market_results = results[-n_market:]
+
+        # Build the plots of all fields and publish them in one deploy
+        await self._publish_charts(
+            company_name,
+            [
+                (field_name, result)
+                for (_, field_name, _), result in zip(fields, results)
+            ],
+        )
 
         finance_response = FinanceResponse(
             revenue=finance_results[0],
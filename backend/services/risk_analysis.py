@@ -23,7 +23,7 @@ class RiskAnalysisService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> RegulatoryRisksResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -52,7 +52,7 @@ class RiskAnalysisService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -64,7 +64,7 @@ class RiskAnalysisService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> MarketRisksResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -96,7 +96,7 @@ class RiskAnalysisService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -108,7 +108,7 @@ class RiskAnalysisService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> OperationalRisksResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -140,7 +140,7 @@ class RiskAnalysisService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
@@ -152,7 +152,7 @@ class RiskAnalysisService:
         domain: Optional[str] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-    ):
+    ) -> LegalRisksResponse:
         data = {
             "company_name": company_name,
             "industry": industry or "Cloud Computing",
@@ -188,7 +188,7 @@ class RiskAnalysisService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder("bar", self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
         return response
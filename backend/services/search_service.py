@@ -53,13 +53,19 @@ class SearchService:
             name=agent_name,
             model=self.sonar_model,
             instructions=prompt,
+            # In structured output mode Sonar generates the response schema directly
+            response_model=response_model
+            if self.sonar_config.structured_output
+            else None,
         )
 
         # Use the LLM to generate the content
-        content = analysis_agent.run(query)
+        content = await analysis_agent.arun(query)
 
         # Parse the LLM output into the response model
-        response = self.llm_output_parser.parse(content.content, response_model)
+        response = await self.llm_output_parser.aparse(
+            content.content, response_model, endpoint=agent_name
+        )
 
         # Attach citations if response is a Pydantic model and has citations
         if hasattr(response, "citations") and hasattr(content, "citations"):
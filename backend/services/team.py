@@ -55,6 +55,10 @@ class TeamService:
             name=agent_name,
             model=self.sonar_model,
             instructions=prompt,
+            # In structured output mode Sonar generates the response schema directly
+            response_model=response_model
+            if self.sonar_config.structured_output
+            else None,
         )
 
         if use_knowledge_base:
@@ -62,10 +66,12 @@ class TeamService:
             analysis_agent.knowledge_filters = {"company_name": company_name}
 
         # Use the LLM to generate the content
-        content = analysis_agent.run(prompt)
+        content = await analysis_agent.arun(prompt)
 
         # Parse the LLM output into the response model
-        response = self.llm_output_parser.parse(content.content, response_model)
+        response = await self.llm_output_parser.aparse(
+            content.content, response_model, endpoint=agent_name
+        )
 
         # Ensure datetime fields are properly formatted as strings
         if hasattr(response, "last_updated") and response.last_updated is not None:
@@ -91,14 +97,16 @@ class TeamService:
         try:
             chart_data = response.get_plot_data()
             builder = get_builder(chart_data.kind, self.netlify_agent)
-            response.iframe_url = await builder.plot(chart_data, company_name)
+            await builder.attach(response, chart_data, company_name)
         except Exception:
             response.iframe_url = None
 
         return response
 
     @cacheable()
-    async def get_team_overview(self, company_name: str, domain: Optional[str] = None):
+    async def get_team_overview(
+        self, company_name: str, domain: Optional[str] = None
+    ) -> TeamOverviewResponse:
         """
         Retrieve team overview data for a company from LinkedIn.
         Args:
@@ -146,7 +154,7 @@ class TeamService:
         domain: Optional[str] = None,
         individual_name: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> IndividualPerformanceResponse:
         """
         Retrieve performance data for an individual based on LinkedIn.
         Args:
@@ -197,7 +205,7 @@ class TeamService:
         company_name: str,
         domain: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> OrgStructureResponse:
         """
         Retrieve organizational structure data for a company from LinkedIn.
         Args:
@@ -249,7 +257,7 @@ class TeamService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         use_knowledge_base: bool = False,
-    ):
+    ) -> TeamGrowthResponse:
         """
         Retrieve team growth data for a company from LinkedIn.
         Args:
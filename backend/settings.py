@@ -1,6 +1,6 @@
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import Literal, Optional
 
 import yaml
 from pydantic import BaseModel, Field
@@ -13,6 +13,30 @@ class MongoConnectionDetails(BaseModel):
     password: str = Field(..., description="Password to connect to the db")
     port: int = Field(..., description="Database port to use")
     dbname: str = Field(..., description="Database name")
+    max_pool_size: int = Field(
+        100, description="Maximum number of pooled connections per client"
+    )
+    min_pool_size: int = Field(
+        0, description="Minimum number of idle connections kept in the pool"
+    )
+    max_idle_time_ms: Optional[int] = Field(
+        300000, description="Close pooled connections idle for longer than this"
+    )
+    connect_timeout_ms: int = Field(
+        10000, description="Timeout for establishing a new connection"
+    )
+    server_selection_timeout_ms: int = Field(
+        10000, description="Timeout for selecting a server for an operation"
+    )
+
+    def get_pool_options(self) -> dict:
+        return {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+        }
 
     def get_connection_string(self):
         return f"mongodb+srv://{self.user}:{self.password}@{self.host}/"
@@ -46,6 +70,11 @@ class VectorStoreConfig(BaseModel):
 class SonarConfig(BaseModel):
     base_url: str = Field(..., description="Perplexity base URL")
     api_key: str = Field(..., description="Sonar API Key")
+    structured_output: bool = Field(
+        False,
+        description="Have Sonar generate the response schema directly, calling the "
+        "parser LLM only when its output does not validate",
+    )
 
 
 class JWTConfig(BaseModel):
@@ -57,6 +86,159 @@ class JWTConfig(BaseModel):
 class NetlifyConfig(BaseModel):
     site_id: str = Field(..., description="Netlify site ID")
     auth_token: str = Field(..., description="Netlify personal access token")
+    api_url: str = Field(
+        "https://api.netlify.com/api/v1", description="Base URL of the Netlify API"
+    )
+    max_connections: int = Field(
+        8, description="Maximum number of concurrent connections to the Netlify API"
+    )
+    timeout_seconds: float = Field(
+        30, description="Total timeout of a single Netlify API request"
+    )
+    max_retries: int = Field(
+        4, description="Retries of a Netlify API request on 429, 5xx and network errors"
+    )
+
+
+class CacheConfig(BaseModel):
+    memory_max_entries: int = Field(
+        1024, description="Maximum number of entries held in the in-memory cache tier"
+    )
+    memory_max_bytes: int = Field(
+        64 * 1024 * 1024,
+        description="Approximate upper bound in bytes for the in-memory cache tier",
+    )
+    memory_ttl_seconds: Optional[int] = Field(
+        None,
+        description="Optional cap on how long an entry lives in memory, in seconds",
+    )
+    maintenance_interval_seconds: Optional[int] = Field(
+        None,
+        description="Interval of the background task evicting expired in-memory "
+        "entries, in seconds. Disabled when unset",
+    )
+    payload_codec: Optional[str] = Field(
+        None,
+        description="Serializer for compressed payloads in MongoDB: json, orjson or "
+        "msgpack. Payloads are stored as plain BSON when unset",
+    )
+    payload_compression: str = Field(
+        "zlib", description="Compression for encoded payloads: none, zlib or zstd"
+    )
+    payload_compression_threshold: int = Field(
+        16 * 1024,
+        description="Serialized size in bytes from which payloads are encoded",
+    )
+
+
+class ResearchConfig(BaseModel):
+    field_concurrency: int = Field(
+        4, description="Maximum field agents running at once for a single request"
+    )
+    global_field_concurrency: int = Field(
+        16, description="Maximum field agents running at once across all requests"
+    )
+    field_timeout_seconds: float = Field(
+        180, description="Timeout for a single field agent, in seconds"
+    )
+    references_per_field: int = Field(
+        8, description="Knowledge base chunks handed to each field agent"
+    )
+
+
+class ChartRenderConfig(BaseModel):
+    executor: Literal["process", "thread", "inline"] = Field(
+        "process",
+        description="Where charts are rendered: a process pool, a thread pool, or "
+        "inline on the event loop",
+    )
+    workers: Optional[int] = Field(
+        None, description="Size of the render pool, defaults to the CPU count up to 4"
+    )
+    output: Literal["iframe", "spec", "both"] = Field(
+        "iframe",
+        description="How charts are returned: an iframe_url to HTML published on "
+        "Netlify, an inline Plotly JSON chart_spec, or both",
+    )
+    store: Literal["netlify", "local"] = Field(
+        "netlify",
+        description="Where chart HTML is published: Netlify, or the chart store in "
+        "MongoDB served by this API under /charts",
+    )
+    public_base_url: str = Field(
+        "",
+        description="Public base URL of this API, used in the iframe_url of charts in "
+        "the local store. Relative URLs are returned when empty.",
+    )
+    batch_timeout_seconds: float = Field(
+        30,
+        description="How long a chart waits for the rest of its batch before it is "
+        "published on its own, in seconds",
+    )
+
+
+class DocumentProcessingConfig(BaseModel):
+    page_concurrency: int = Field(
+        8, description="Pages of a document sent to the vision model at once"
+    )
+    page_retries: int = Field(
+        2, description="Retries of a page whose extraction failed or timed out"
+    )
+    page_timeout_seconds: float = Field(
+        120, description="Timeout for extracting a single page, in seconds"
+    )
+    dpi: int = Field(150, description="Resolution PDF pages are rasterized at")
+    image_long_side: int = Field(
+        2048, description="Longest side, in pixels, of page images sent to the model"
+    )
+    image_short_side: int = Field(
+        768,
+        description="Shortest side, in pixels, of page images sent to the model. "
+        "GPT-4o scales high detail images down to this, so more is never seen.",
+    )
+    image_format: Literal["jpeg", "webp", "png"] = Field(
+        "jpeg", description="Encoding of page images sent to the model"
+    )
+    image_quality: int = Field(85, description="JPEG/WebP quality of page images")
+    text_layer: bool = Field(
+        True,
+        description="Read PDF pages with a usable embedded text layer directly, "
+        "instead of sending them to the vision model",
+    )
+    text_layer_min_chars: int = Field(
+        200, description="Characters a page's text layer needs to be used"
+    )
+    text_layer_dense_chars: int = Field(
+        1000,
+        description="Characters a page with images needs for its text layer to be "
+        "used, sparser pages are mostly pictures or charts",
+    )
+
+
+class IngestionConfig(BaseModel):
+    workers: int = Field(
+        2, description="Documents ingested at once by the background workers"
+    )
+    upload_dir: str = Field(
+        "/tmp/ingestion", description="Where uploaded files wait to be ingested"
+    )
+    poll_interval_seconds: float = Field(
+        5, description="How often idle workers look for jobs queued by other workers"
+    )
+    lease_seconds: int = Field(
+        300,
+        description="How long a job stays claimed without a heartbeat before another "
+        "worker takes it over, e.g. after a crash or restart",
+    )
+    max_attempts: int = Field(
+        3, description="Attempts at a job before it is marked as failed"
+    )
+    retry_delay_seconds: float = Field(
+        30, description="Delay before the first retry of a job, doubled every attempt"
+    )
+    store_batch_size: int = Field(
+        32, description="Pages embedded and written to the vector store at once"
+    )
 
 
 class AppSettings(BaseSettings):
@@ -75,6 +257,23 @@ class AppSettings(BaseSettings):
     netlify_config: NetlifyConfig = Field(
         ..., description="Netlify deployment configuration"
     )
+    cache_config: CacheConfig = Field(
+        default_factory=CacheConfig, description="Cache configuration details"
+    )
+    research_config: ResearchConfig = Field(
+        default_factory=ResearchConfig, description="Deep research configuration"
+    )
+    chart_render_config: ChartRenderConfig = Field(
+        default_factory=ChartRenderConfig, description="Chart rendering configuration"
+    )
+    document_processing_config: DocumentProcessingConfig = Field(
+        default_factory=DocumentProcessingConfig,
+        description="Document text extraction configuration",
+    )
+    ingestion_config: IngestionConfig = Field(
+        default_factory=IngestionConfig,
+        description="Background document ingestion configuration",
+    )
     local_user_email: Optional[str] = Field(None, description="Local user mail id")
     local: bool = Field(False, description="Local mode")
     mcp_url: str = Field(..., description="MCP server URL")
@@ -101,6 +300,13 @@ class AppSettings(BaseSettings):
                 port=os.environ.get("DB__PORT"),
                 user=os.environ.get("DB__USER"),
                 password=os.environ.get("DB__PASSWORD"),
+                max_pool_size=os.environ.get("DB__MAX_POOL_SIZE", 100),
+                min_pool_size=os.environ.get("DB__MIN_POOL_SIZE", 0),
+                max_idle_time_ms=os.environ.get("DB__MAX_IDLE_TIME_MS", 300000),
+                connect_timeout_ms=os.environ.get("DB__CONNECT_TIMEOUT_MS", 10000),
+                server_selection_timeout_ms=os.environ.get(
+                    "DB__SERVER_SELECTION_TIMEOUT_MS", 10000
+                ),
             ),
             llm_config=LLMConfig(
                 api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
@@ -111,6 +317,7 @@ class AppSettings(BaseSettings):
             sonar_config=SonarConfig(
                 base_url=os.environ.get("SONAR_BASE_URL"),
                 api_key=os.environ.get("SONAR_API_KEY"),
+                structured_output=os.environ.get("SONAR_STRUCTURED_OUTPUT", False),
             ),
             storage_config=StorageConfig(
                 cloud_name=os.environ.get("CLOUDINARY_CLOUD_NAME"),
@@ -131,6 +338,77 @@ class AppSettings(BaseSettings):
             netlify_config=NetlifyConfig(
                 site_id=os.environ.get("NETLIFY_SITE_ID"),
                 auth_token=os.environ.get("NETLIFY_AUTH_TOKEN"),
+                api_url=os.environ.get(
+                    "NETLIFY_API_URL", "https://api.netlify.com/api/v1"
+                ),
+                max_connections=os.environ.get("NETLIFY_MAX_CONNECTIONS", 8),
+                timeout_seconds=os.environ.get("NETLIFY_TIMEOUT_SECONDS", 30),
+                max_retries=os.environ.get("NETLIFY_MAX_RETRIES", 4),
+            ),
+            cache_config=CacheConfig(
+                memory_max_entries=os.environ.get("CACHE__MEMORY_MAX_ENTRIES", 1024),
+                memory_max_bytes=os.environ.get(
+                    "CACHE__MEMORY_MAX_BYTES", 64 * 1024 * 1024
+                ),
+                memory_ttl_seconds=os.environ.get("CACHE__MEMORY_TTL_SECONDS"),
+                maintenance_interval_seconds=os.environ.get(
+                    "CACHE__MAINTENANCE_INTERVAL_SECONDS"
+                ),
+                payload_codec=os.environ.get("CACHE__PAYLOAD_CODEC"),
+                payload_compression=os.environ.get(
+                    "CACHE__PAYLOAD_COMPRESSION", "zlib"
+                ),
+                payload_compression_threshold=os.environ.get(
+                    "CACHE__PAYLOAD_COMPRESSION_THRESHOLD", 16 * 1024
+                ),
+            ),
+            research_config=ResearchConfig(
+                field_concurrency=os.environ.get("RESEARCH__FIELD_CONCURRENCY", 4),
+                global_field_concurrency=os.environ.get(
+                    "RESEARCH__GLOBAL_FIELD_CONCURRENCY", 16
+                ),
+                field_timeout_seconds=os.environ.get(
+                    "RESEARCH__FIELD_TIMEOUT_SECONDS", 180
+                ),
+                references_per_field=os.environ.get(
+                    "RESEARCH__REFERENCES_PER_FIELD", 8
+                ),
+            ),
+            chart_render_config=ChartRenderConfig(
+                executor=os.environ.get("CHARTS__RENDER_EXECUTOR", "process"),
+                workers=os.environ.get("CHARTS__RENDER_WORKERS"),
+                output=os.environ.get("CHARTS__OUTPUT", "iframe"),
+                store=os.environ.get("CHARTS__STORE", "netlify"),
+                public_base_url=os.environ.get("CHARTS__PUBLIC_BASE_URL", ""),
+                batch_timeout_seconds=os.environ.get(
+                    "CHARTS__BATCH_TIMEOUT_SECONDS", 30
+                ),
+            ),
+            document_processing_config=DocumentProcessingConfig(
+                page_concurrency=os.environ.get("DOCS__PAGE_CONCURRENCY", 8),
+                page_retries=os.environ.get("DOCS__PAGE_RETRIES", 2),
+                page_timeout_seconds=os.environ.get("DOCS__PAGE_TIMEOUT_SECONDS", 120),
+                dpi=os.environ.get("DOCS__DPI", 150),
+                image_long_side=os.environ.get("DOCS__IMAGE_LONG_SIDE", 2048),
+                image_short_side=os.environ.get("DOCS__IMAGE_SHORT_SIDE", 768),
+                image_format=os.environ.get("DOCS__IMAGE_FORMAT", "jpeg"),
+                image_quality=os.environ.get("DOCS__IMAGE_QUALITY", 85),
+                text_layer=os.environ.get("DOCS__TEXT_LAYER", True),
+                text_layer_min_chars=os.environ.get("DOCS__TEXT_LAYER_MIN_CHARS", 200),
+                text_layer_dense_chars=os.environ.get(
+                    "DOCS__TEXT_LAYER_DENSE_CHARS", 1000
+                ),
+            ),
+            ingestion_config=IngestionConfig(
+                workers=os.environ.get("INGEST__WORKERS", 2),
+                upload_dir=os.environ.get("INGEST__UPLOAD_DIR", "/tmp/ingestion"),
+                poll_interval_seconds=os.environ.get(
+                    "INGEST__POLL_INTERVAL_SECONDS", 5
+                ),
+                lease_seconds=os.environ.get("INGEST__LEASE_SECONDS", 300),
+                max_attempts=os.environ.get("INGEST__MAX_ATTEMPTS", 3),
+                retry_delay_seconds=os.environ.get("INGEST__RETRY_DELAY_SECONDS", 30),
+                store_batch_size=os.environ.get("INGEST__STORE_BATCH_SIZE", 32),
             ),
             local_user_email=os.environ.get("LOCAL_USER_EMAIL"),
             local=os.environ.get("LOCAL"),
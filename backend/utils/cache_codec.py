@@ -0,0 +1,125 @@
+import json
+import zlib
+from typing import Any, Optional
+
+from pydantic_core import to_jsonable_python
+
+from backend.utils.logger import get_logger
+
+LOG = get_logger("CacheCodec")
+
+SERIALIZERS = ("json", "orjson", "msgpack")
+COMPRESSIONS = ("none", "zlib", "zstd")
+
+
+def _is_available(module_name: str) -> bool:
+    try:
+        __import__(module_name)
+        return True
+    except ImportError:
+        return False
+
+
+def _dumps(serializer: str, data: Any) -> bytes:
+    # Values the serializers don't support natively (datetimes, enums, UUIDs, ...)
+    # are written the way pydantic would write them to JSON
+    if serializer == "orjson":
+        import orjson
+
+        return orjson.dumps(data, default=to_jsonable_python)
+    if serializer == "msgpack":
+        import msgpack
+
+        return msgpack.packb(data, use_bin_type=True, default=to_jsonable_python)
+    return json.dumps(data, separators=(",", ":"), default=to_jsonable_python).encode(
+        "utf-8"
+    )
+
+
+def _loads(serializer: str, raw: bytes) -> Any:
+    if serializer == "orjson":
+        import orjson
+
+        return orjson.loads(raw)
+    if serializer == "msgpack":
+        import msgpack
+
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw)
+
+
+def _compress(compression: str, raw: bytes, level: int) -> bytes:
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=level).compress(raw)
+    if compression == "zlib":
+        return zlib.compress(raw, level)
+    return raw
+
+
+def _decompress(compression: str, payload: bytes) -> bytes:
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if compression == "zlib":
+        return zlib.decompress(payload)
+    return payload
+
+
+class PayloadCodec:
+    """
+    Encodes serialized cache payloads into compact binary blobs. Payloads whose
+    serialized size is below the threshold are left for MongoDB to store as BSON.
+    Datetimes and other non-JSON values are encoded in their JSON form and come back
+    as such, for the cacheable decorator to rehydrate into the return type.
+
+    orjson, msgpack and zstandard are optional. When one is not installed the codec
+    falls back to the stdlib json serializer or zlib compression.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "zlib",
+        threshold: int = 16 * 1024,
+        level: Optional[int] = None,
+    ):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unsupported cache serializer: {serializer}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported cache compression: {compression}")
+
+        if serializer != "json" and not _is_available(serializer):
+            LOG.warning(f"{serializer} is not installed, falling back to json")
+            serializer = "json"
+        if compression == "zstd" and not _is_available("zstandard"):
+            LOG.warning("zstandard is not installed, falling back to zlib")
+            compression = "zlib"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.threshold = threshold
+        # Favour decode speed and cheap writes over the last few percent of ratio
+        self.level = level if level is not None else 3
+        self.name = f"{serializer}+{compression}"
+
+    def encode(self, data: Any) -> Optional[bytes]:
+        """Return the encoded payload, or None if it should be stored as plain BSON"""
+        try:
+            raw = _dumps(self.serializer, data)
+        except (TypeError, ValueError) as e:
+            LOG.warning(
+                f"Payload not encodable with {self.serializer}, storing as BSON: {e}"
+            )
+            return None
+        if len(raw) < self.threshold:
+            return None
+        return _compress(self.compression, raw, self.level)
+
+    @staticmethod
+    def decode(payload: bytes, codec: str) -> Any:
+        """Decode a payload written by any codec, as named in the stored document"""
+        serializer, compression = codec.split("+", 1)
+        return _loads(serializer, _decompress(compression, payload))
@@ -1,19 +1,127 @@
+import asyncio
 import functools
 import inspect
-from datetime import timedelta
-from typing import Any, Callable, Dict, Optional, TypeVar, cast
+import typing
+from datetime import date, timedelta
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, TypeVar, Union, cast
 
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from backend.plot.publisher import leave_chart_batch
 from backend.services.cache import CacheService
+from backend.utils.logger import get_logger
 
-T = TypeVar("T")
+LOG = get_logger("CacheDecorator")
 
+T = TypeVar("T")
 
-def cacheable(ttl: Optional[timedelta] = None):
+# Futures for cache misses currently being computed in this process, by cache key
+_INFLIGHT: Dict[str, asyncio.Future] = {}
+# Stale-while-revalidate refresh tasks by cache key, also keeps them from being collected
+_REFRESH_TASKS: Dict[str, asyncio.Task] = {}
+
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight future when the call computing it was cancelled"""
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Avoid "exception was never retrieved" warnings when nobody joined the flight
+    if not future.cancelled():
+        future.exception()
+
+
+# Return types that are stored as-is and need no rehydration on a cache hit
+_PASSTHROUGH_TYPES = (None, type(None), Any, dict, str, int, float, bool)
+
+
+def _get_return_adapter(func: Callable) -> Optional[TypeAdapter]:
+    """Precompile a TypeAdapter for the declared return type of func, if any"""
+    try:
+        return_type = typing.get_type_hints(func).get("return")
+    except Exception as e:
+        LOG.warning(f"Could not resolve return type of {func.__qualname__}: {e}")
+        return None
+    if return_type in _PASSTHROUGH_TYPES:
+        return None
+    return TypeAdapter(return_type)
+
+
+def _canonicalize(value: Any) -> Any:
+    """Normalise an argument value into a stable, JSON-compatible form"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return _canonicalize(value.value)
+    if isinstance(value, date):
+        # Covers datetime as well
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return _canonicalize(value.model_dump(mode="json"))
+    if isinstance(value, dict):
+        # Keys become strings in the cache key, and sorting them as strings also
+        # works for dicts whose keys are of mixed types
+        items = sorted(value.items(), key=lambda kv: str(kv[0]))
+        return {str(k): _canonicalize(v) for k, v in items}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_canonicalize(v) for v in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    return str(value)
+
+
+def _make_args_encoder(func: Callable) -> Callable[..., Dict[str, Any]]:
+    """
+    Build the canonical argument encoder for func once, at decoration time.
+    Arguments are bound to the signature with defaults applied, so positional vs
+    keyword calls and explicitly passed defaults all produce the same cache key.
+    """
+    signature = inspect.signature(func)
+    var_keyword = next(
+        (
+            p.name
+            for p in signature.parameters.values()
+            if p.kind is inspect.Parameter.VAR_KEYWORD
+        ),
+        None,
+    )
+
+    def encode(self, args: tuple, kwargs: dict) -> Dict[str, Any]:
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        # Exclude 'self' and flatten **kwargs into the top level
+        arguments.pop(next(iter(signature.parameters)), None)
+        if var_keyword is not None:
+            arguments.update(arguments.pop(var_keyword, {}))
+        return {name: _canonicalize(value) for name, value in arguments.items()}
+
+    return encode
+
+
+def cacheable(
+    ttl: Optional[timedelta] = None,
+    soft_ttl: Optional[timedelta] = None,
+    coalesce: bool = True,
+    distributed: bool = False,
+    lease_ttl: Union[timedelta, Callable[[Any], timedelta]] = timedelta(minutes=2),
+):
     """
     A decorator for caching service method results.
 
     Args:
         ttl: Optional time-to-live for the cache entry. If not provided, defaults to 1 day.
+            With soft_ttl set this is the hard TTL after which callers must wait.
+        soft_ttl: Enables stale-while-revalidate. Once an entry is older than soft_ttl
+            it is still served immediately while a single background refresh runs
+            (async methods only).
+        coalesce: Concurrent misses for the same key in this process share a single
+            computation (async methods only).
+        distributed: Additionally coalesce across workers through a lease document in
+            the cache collection. Workers that lose the lease wait for the result.
+        lease_ttl: How long a distributed lease is held before other workers may
+            take over the computation. Either a timedelta or a callable taking the
+            service instance, for leases that depend on the service's configuration.
 
     Usage:
         @cacheable()
@@ -23,10 +131,40 @@ def cacheable(ttl: Optional[timedelta] = None):
         @cacheable(ttl=timedelta(hours=1))
         async def my_async_method(self, arg1, arg2, ...):
             ...
+
+        @cacheable(distributed=True)
+        async def my_expensive_method(self, arg1, arg2, ...):
+            ...
+
+        @cacheable(ttl=timedelta(days=7), soft_ttl=timedelta(days=1))
+        async def my_slow_changing_method(self, arg1, arg2, ...):
+            ...
     """
+    if soft_ttl is not None and soft_ttl >= (ttl or CacheService.DEFAULT_TTL):
+        raise ValueError("soft_ttl must be shorter than ttl")
 
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         is_async = inspect.iscoroutinefunction(func)
+        encode_args = _make_args_encoder(func)
+
+        @functools.lru_cache(maxsize=None)
+        def return_adapter() -> Optional[TypeAdapter]:
+            # Resolved on first use so forward references have been defined
+            return _get_return_adapter(func)
+
+        def rehydrate(data: Any) -> Any:
+            """Rebuild the declared return type from the serialized cache payload"""
+            adapter = return_adapter()
+            if adapter is None or data is None:
+                return data
+            try:
+                return adapter.validate_python(data)
+            except ValidationError as e:
+                LOG.warning(
+                    f"Cached result for {func.__qualname__} did not match its "
+                    f"return type, returning raw data: {e}"
+                )
+                return data
 
         @functools.wraps(func)
         async def async_wrapper(self, *args, **kwargs) -> T:
@@ -45,37 +183,110 @@ def cacheable(ttl: Optional[timedelta] = None):
             # Get method name
             method_name = func.__name__
 
-            # Create a dictionary of arguments
-            # Exclude 'self' from args
-            arg_names = list(inspect.signature(func).parameters.keys())[1:]
-            arg_dict: Dict[str, Any] = {}
-
-            # Add positional arguments
-            for i, arg_name in enumerate(arg_names):
-                if i < len(args):
-                    # If the argument is provided positionally
-                    arg_dict[arg_name] = str(args[i])
-                elif arg_name in kwargs:
-                    # If the argument is provided as a keyword
-                    arg_dict[arg_name] = str(kwargs[arg_name])
-
-            # Add keyword arguments that weren't already captured
-            for kw, value in kwargs.items():
-                if kw not in arg_dict:
-                    arg_dict[kw] = str(value)
+            # Canonical dictionary of arguments, excluding 'self'
+            arg_dict = encode_args(self, args, kwargs)
 
             # Try to get from cache first
-            cached_result = await cache_service.aget(
-                service_name, method_name, arg_dict
+            cached = await cache_service.aget_entry(service_name, method_name, arg_dict)
+            if cached is not None:
+                cached_result, is_stale = cached
+                if is_stale:
+                    # Serve the stale value right away and refresh it in the background
+                    schedule_refresh(cache_service, self, arg_dict, args, kwargs)
+                return rehydrate(cached_result)
+
+            return await coalesced(cache_service, self, arg_dict, args, kwargs)
+
+        async def coalesced(cache_service: CacheService, self, arg_dict, args, kwargs):
+            if not coalesce:
+                return await compute(cache_service, self, arg_dict, args, kwargs)
+
+            # Join an in-flight computation for the same key if there is one
+            key = cache_service._generate_key(
+                self.__class__.__name__, func.__name__, arg_dict
             )
-            if cached_result is not None:
-                return cached_result
-
-            # Execute the method if not cached
-            result = await func(self, *args, **kwargs)
+            inflight = _INFLIGHT.get(key)
+            if inflight is not None:
+                LOG.info(f"Joining in-flight computation for {key}")
+                # The leader may be waiting on the chart batch of its own request,
+                # which must not wait on this call in turn
+                leave_chart_batch()
+                try:
+                    return await asyncio.shield(inflight)
+                except _LeaderCancelled:
+                    # Only the leader was cancelled, one of the joiners takes over
+                    LOG.info(f"In-flight computation for {key} was cancelled, retrying")
+                    return await coalesced(cache_service, self, arg_dict, args, kwargs)
+
+            future = asyncio.get_running_loop().create_future()
+            future.add_done_callback(_consume_exception)
+            _INFLIGHT[key] = future
+            try:
+                result = await compute(cache_service, self, arg_dict, args, kwargs)
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                # Cancelling the future would cancel every joiner along with it
+                future.set_exception(_LeaderCancelled(key))
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                _INFLIGHT.pop(key, None)
+
+        def schedule_refresh(cache_service: CacheService, self, arg_dict, args, kwargs):
+            key = cache_service._generate_key(
+                self.__class__.__name__, func.__name__, arg_dict
+            )
+            if key in _INFLIGHT or key in _REFRESH_TASKS:
+                # A refresh or a hard miss is already computing this entry
+                return
+
+            async def refresh():
+                try:
+                    await coalesced(cache_service, self, arg_dict, args, kwargs)
+                    LOG.info(f"Refreshed stale cache entry for {key}")
+                except Exception as e:
+                    LOG.error(f"Background refresh failed for {key}: {e}")
+
+            LOG.info(f"Serving stale cache entry for {key}, refreshing")
+            task = asyncio.create_task(refresh())
+            _REFRESH_TASKS[key] = task
+            task.add_done_callback(lambda _: _REFRESH_TASKS.pop(key, None))
+
+        async def compute(cache_service: CacheService, self, arg_dict, args, kwargs):
+            service_name = self.__class__.__name__
+            method_name = func.__name__
 
-            # Cache the result
-            await cache_service.aset(service_name, method_name, arg_dict, result, ttl)
+            owner = None
+            if distributed:
+                lease = lease_ttl(self) if callable(lease_ttl) else lease_ttl
+                owner = await cache_service.aacquire_lease(
+                    service_name, method_name, arg_dict, lease
+                )
+                if owner is None:
+                    # Another worker is computing this entry, wait for its result
+                    leave_chart_batch()
+                    cached_result = await cache_service.await_lease(
+                        service_name, method_name, arg_dict, lease
+                    )
+                    if cached_result is not None:
+                        return rehydrate(cached_result)
+
+            try:
+                # Execute the method if not cached
+                result = await func(self, *args, **kwargs)
+
+                # Cache the result
+                await cache_service.aset(
+                    service_name, method_name, arg_dict, result, ttl, soft_ttl
+                )
+            finally:
+                if owner is not None:
+                    await cache_service.arelease_lease(
+                        service_name, method_name, arg_dict, owner
+                    )
 
             return result
 
@@ -96,29 +307,13 @@ def cacheable(ttl: Optional[timedelta] = None):
             # Get method name
             method_name = func.__name__
 
-            # Create a dictionary of arguments
-            # Exclude 'self' from args
-            arg_names = list(inspect.signature(func).parameters.keys())[1:]
-            arg_dict: Dict[str, Any] = {}
-
-            # Add positional arguments
-            for i, arg_name in enumerate(arg_names):
-                if i < len(args):
-                    # If the argument is provided positionally
-                    arg_dict[arg_name] = str(args[i])
-                elif arg_name in kwargs:
-                    # If the argument is provided as a keyword
-                    arg_dict[arg_name] = str(kwargs[arg_name])
-
-            # Add keyword arguments that weren't already captured
-            for kw, value in kwargs.items():
-                if kw not in arg_dict:
-                    arg_dict[kw] = str(value)
+            # Canonical dictionary of arguments, excluding 'self'
+            arg_dict = encode_args(self, args, kwargs)
 
             # Try to get from cache first
             cached_result = cache_service.get(service_name, method_name, arg_dict)
             if cached_result is not None:
-                return cached_result
+                return rehydrate(cached_result)
 
             # Execute the method if not cached
             result = func(self, *args, **kwargs)
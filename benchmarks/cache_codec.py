@@ -0,0 +1,107 @@
+"""
+Size and encode/decode time of cache payloads as BSON and with each payload
+codec, on a synthetic research response or a real exported payload:
+
+    python -m benchmarks.cache_codec [payload.json]
+"""
+
+import json
+import random
+import string
+import sys
+import timeit
+import typing
+from typing import Any
+
+import bson
+from pydantic import BaseModel
+
+from backend.models.response.research import ResearchResponse
+from backend.utils.cache_codec import (
+    COMPRESSIONS,
+    SERIALIZERS,
+    PayloadCodec,
+)
+
+# Words sample strings are made of
+vocabulary: list[str] = []
+
+
+def sample(annotation: Any, depth: int = 0) -> Any:
+    """Build plausible data for an annotation, following nested models"""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Union:
+        return sample(next(a for a in args if a is not type(None)), depth)
+    if origin in (list, typing.List):
+        return [sample(args[0], depth + 1) for _ in range(12 if depth < 3 else 3)]
+    if origin in (dict, typing.Dict):
+        return {f"key_{i}": sample(args[1], depth + 1) for i in range(5)}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {
+            name: sample(field.annotation, depth + 1)
+            for name, field in annotation.model_fields.items()
+        }
+    if annotation is float:
+        return round(random.uniform(0, 10_000_000), 2)
+    if annotation is int:
+        return random.randint(0, 10_000)
+    if annotation is bool:
+        return random.random() > 0.5
+    if annotation is str:
+        return " ".join(random.choices(vocabulary, k=random.randint(1, 24)))
+    return None
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        # A real payload exported from cache_entries, e.g. via mongoexport
+        with open(sys.argv[1]) as f:
+            payload = json.load(f)
+    else:
+        random.seed(7)
+        # Roughly the vocabulary size of LLM generated research prose
+        vocabulary[:] = [
+            "".join(random.choices(string.ascii_lowercase, k=random.randint(2, 10)))
+            for _ in range(3000)
+        ]
+        payload = ResearchResponse.model_validate(sample(ResearchResponse)).model_dump()
+
+    runs = 50
+    bson_doc = bson.encode({"data": payload})
+    results = [
+        (
+            "bson (current)",
+            len(bson_doc),
+            timeit.timeit(lambda: bson.encode({"data": payload}), number=runs),
+            timeit.timeit(lambda: bson.decode(bson_doc), number=runs),
+        )
+    ]
+    for serializer in SERIALIZERS:
+        for compression in COMPRESSIONS:
+            codec = PayloadCodec(serializer, compression, threshold=0)
+            if codec.name != f"{serializer}+{compression}":
+                # Not installed, the codec fell back to another format
+                continue
+            blob = codec.encode(payload)
+            results.append(
+                (
+                    codec.name,
+                    len(blob),
+                    timeit.timeit(lambda: codec.encode(payload), number=runs),
+                    timeit.timeit(
+                        lambda: PayloadCodec.decode(blob, codec.name), number=runs
+                    ),
+                )
+            )
+
+    print(f"{'format':<18}{'bytes':>10}{'encode ms':>12}{'decode ms':>12}")
+    for name, size, encode_time, decode_time in results:
+        print(
+            f"{name:<18}{size:>10}"
+            f"{encode_time / runs * 1e3:>12.2f}{decode_time / runs * 1e3:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Cost of rehydrating cached payloads into response models on a cache hit:
+
+    python -m benchmarks.cache_rehydration
+"""
+
+import timeit
+
+from pydantic import TypeAdapter
+
+from backend.models.response.finance import RevenueAnalysisResponse
+from backend.services.cache import CacheService
+
+
+def main() -> None:
+    response = RevenueAnalysisResponse(
+        company_name="Datagenie AI",
+        citations=[
+            {"url": f"https://example.com/report/{i}", "title": None} for i in range(10)
+        ],
+        summary="Revenue grew steadily across the period.",
+        revenue_timeseries=[
+            {
+                "currency": "USD",
+                "period_start": f"20{i // 4 + 10}-0{i % 4 * 3 + 1}-01",
+                "period_end": f"20{i // 4 + 10}-0{i % 4 * 3 + 3}-30",
+                "value": 1_000_000 + i * 25_000,
+                "sources": [f"https://example.com/source/{i}"],
+                "confidence": 0.8,
+            }
+            for i in range(40)
+        ],
+        total_revenue=60_000_000,
+        last_updated="2025-01-01T00:00:00",
+    )
+    payload = CacheService._serialize_for_mongodb(
+        object.__new__(CacheService), response
+    )
+    adapter = TypeAdapter(RevenueAnalysisResponse)
+
+    runs = 2000
+    cases = {
+        "raw dict (current hit path)": lambda: payload,
+        "TypeAdapter.validate_python": lambda: adapter.validate_python(payload),
+        "model_validate": lambda: RevenueAnalysisResponse.model_validate(payload),
+        "model_construct (shallow)": lambda: RevenueAnalysisResponse.model_construct(
+            **payload
+        ),
+        # FastAPI validates and dumps the route's return value against response_model
+        "response_model check on dict": lambda: adapter.dump_python(
+            adapter.validate_python(payload), mode="json"
+        ),
+        "response_model check on model": lambda: adapter.dump_python(
+            adapter.validate_python(adapter.validate_python(payload).model_dump()),
+            mode="json",
+        ),
+    }
+    for name, case in cases.items():
+        elapsed = timeit.timeit(case, number=runs)
+        print(f"{name:<32} {elapsed / runs * 1e6:8.1f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Figure construction time and output size per chart kind:
+
+    python -m benchmarks.chart_figures
+"""
+
+import json
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from backend.plot.factory import BUILDER_MAP
+from backend.plot.types import ChartData
+
+
+def main() -> None:
+    rng = np.random.default_rng(7)
+    data = pd.DataFrame(
+        {
+            "period": pd.date_range("2015-01-01", periods=40, freq="QS").astype(str),
+            "value": rng.uniform(1e5, 1e7, 40).round(2),
+        }
+    )
+    runs = 50
+    for kind, builder_cls in BUILDER_MAP.items():
+        builder = builder_cls(None)
+        chart_data = ChartData(
+            data=data, title="Revenue", x="period", y="value", kind=kind
+        )
+        builder.build_figure(chart_data, "Datagenie AI")
+        elapsed = timeit.timeit(
+            lambda: builder.build_figure(chart_data, "Datagenie AI"), number=runs
+        )
+        spec = json.dumps(builder.spec(chart_data, "Datagenie AI"))
+        print(
+            f"{kind:<6}{elapsed / runs * 1e3:8.2f} ms/figure"
+            f"{len(spec):8d} B spec"
+            f"{len(builder.render(chart_data, 'Datagenie AI')):8d} B html"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Render N charts concurrently in each kind of render pool, and how long the event
+loop is blocked meanwhile:
+
+    python -m benchmarks.chart_rendering [n_charts]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.plot.factory import BUILDER_MAP
+from backend.plot.renderer import render_in_pool, shutdown_render_pool
+from backend.plot.types import ChartData
+from backend.settings import ChartRenderConfig
+
+
+def sample_charts(n_charts: int) -> list[ChartData]:
+    rng = np.random.default_rng(7)
+    kinds = list(BUILDER_MAP)
+    return [
+        ChartData(
+            data=pd.DataFrame(
+                {
+                    "period": pd.date_range("2015-01-01", periods=40, freq="QS").astype(
+                        str
+                    ),
+                    "value": rng.uniform(1e5, 1e7, 40).round(2),
+                }
+            ),
+            title=f"Chart {i}",
+            x="period",
+            y="value",
+            kind=kinds[i % len(kinds)],
+        )
+        for i in range(n_charts)
+    ]
+
+
+async def max_loop_lag(stop: asyncio.Event) -> float:
+    """Longest time the event loop was blocked while the charts rendered"""
+    lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lag = max(lag, time.perf_counter() - start - 0.005)
+    return lag
+
+
+async def render_all(
+    charts: list[ChartData], config: ChartRenderConfig
+) -> tuple[float, float]:
+    def render(chart: ChartData):
+        return render_in_pool(BUILDER_MAP[chart.kind], chart, "Datagenie AI", config)
+
+    # Start and warm every worker before timing, as the application would have
+    if config.executor != "inline":
+        await asyncio.gather(*(render(c) for c in charts[: config.workers or 1]))
+    stop = asyncio.Event()
+    lag = asyncio.create_task(max_loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(render(c) for c in charts))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    shutdown_render_pool()
+    return elapsed, await lag
+
+
+def main() -> None:
+    n_charts = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    charts = sample_charts(n_charts)
+    print(f"{n_charts} charts on {os.cpu_count()} CPUs")
+    for executor, workers in [
+        ("inline", None),
+        ("thread", 4),
+        ("process", 1),
+        ("process", 4),
+    ]:
+        config = ChartRenderConfig(executor=executor, workers=workers)
+        elapsed, lag = asyncio.run(render_all(charts, config))
+        print(
+            f"{executor:<8} workers={workers or '-':<3} {elapsed:6.2f}s "
+            f"{n_charts / elapsed:7.1f} charts/s, max loop lag {lag * 1e3:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
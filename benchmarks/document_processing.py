@@ -0,0 +1,373 @@
+"""
+Document processing with the vision model stubbed to a fixed latency and failure
+rate, on synthetic documents or your own:
+
+    python -m benchmarks.document_processing pages [pages] [latency] [failure_rate]
+    python -m benchmarks.document_processing textlayer [latency] [pdf ...]
+    python -m benchmarks.document_processing slides [latency] [pptx ...]
+"""
+
+import asyncio
+import io
+import os
+import random
+import resource
+import shutil
+import sys
+import time
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+from PIL import Image, ImageDraw
+from pptx import Presentation
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import DictionaryObject, NameObject, StreamObject
+
+from backend.agents.document_processing import EMU_PER_INCH, DocumentProcessingEngine
+from backend.models.response.files import DoucmentParseResponse
+from backend.settings import DocumentProcessingConfig, get_app_settings
+
+# Size of the prompt of every vision model call
+vision_calls: List[int] = []
+
+
+class StubbedVisionAgent:
+    def __init__(self, latency: float, failure_rate: float):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    async def arun(self, prompt):
+        vision_calls.append(len(str(prompt)))
+        await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("stubbed vision model error")
+        return SimpleNamespace(
+            content=DoucmentParseResponse(heading="Slide", content="Content")
+        )
+
+
+class StubbedEngine(DocumentProcessingEngine):
+    def __init__(
+        self,
+        config: DocumentProcessingConfig,
+        latency: float,
+        failure_rate: float = 0.0,
+    ):
+        super().__init__(None, get_app_settings().storage_config, config)
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def _create_agent(self):
+        return StubbedVisionAgent(self.latency, self.failure_rate)
+
+
+def draw_page(page_number: int, dpi: int = 300) -> Image.Image:
+    page = Image.new("RGB", (11 * dpi, 17 * dpi // 2), "white")
+    draw = ImageDraw.Draw(page)
+    draw.rectangle((dpi, dpi, 6 * dpi, 5 * dpi), fill=(66, 133, 244))
+    for line in range(40):
+        draw.text(
+            (dpi, 6 * dpi + line * dpi // 8),
+            f"Slide {page_number}: revenue grew {line}% quarter on quarter",
+            fill="black",
+        )
+    return page
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_sample_pdf(path: str, kinds: List[str]) -> None:
+    """
+    A PDF of report pages with a text layer, scanned pages with none, and chart
+    pages with a picture and a few labels, in the given order
+    """
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+
+    def text_page(lines: List[str]) -> PageObject:
+        body = " ".join(
+            "(" + line.replace("(", "[").replace(")", "]") + ") '" for line in lines
+        )
+        stream = StreamObject()
+        stream.set_data(f"BT /F1 10 Tf 14 TL 72 740 Td {body} ET".encode())
+        page = PageObject.create_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        page.replace_contents(stream)
+        return page
+
+    writer = PdfWriter()
+    for page_number, kind in enumerate(kinds, start=1):
+        if kind == "text":
+            writer.add_page(
+                text_page(
+                    [f"Quarterly review, page {page_number}"]
+                    + [
+                        f"Revenue grew {line}% as the company expanded its "
+                        f"enterprise segment in region {line % 7}."
+                        for line in range(45)
+                    ]
+                )
+            )
+            continue
+        scan = io.BytesIO()
+        draw_page(page_number, dpi=150).save(scan, format="PDF", resolution=150)
+        writer.append(PdfReader(scan))
+        if kind == "chart":
+            # Axis labels and a legend drawn over the chart picture
+            writer.pages[-1].merge_page(
+                text_page(
+                    ["Revenue by quarter ($m)"]
+                    + [
+                        f"Q{q % 4 + 1} {2020 + q // 4} {q * 13.5:.1f}"
+                        for q in range(16)
+                    ]
+                )
+            )
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def write_sample_deck(path: str, slides: int) -> None:
+    """A deck of bullet, table, chart and photo slides, with a logo on every slide"""
+    from pptx.chart.data import CategoryChartData
+    from pptx.enum.chart import XL_CHART_TYPE
+    from pptx.util import Inches
+
+    def picture(size: Tuple[int, int], color: Tuple[int, int, int]) -> io.BytesIO:
+        buffer = io.BytesIO()
+        img = Image.new("RGB", size, color)
+        ImageDraw.Draw(img).ellipse((0, 0, *size), fill=(255, 255, 255))
+        img.save(buffer, format="PNG")
+        buffer.seek(0)
+        return buffer
+
+    prs = Presentation()
+    logo = picture((200, 200), (66, 133, 244))
+    for slide_number in range(1, slides + 1):
+        kind = ("bullets", "table", "chart", "bullets", "photo")[slide_number % 5]
+        slide = prs.slides.add_slide(prs.slide_layouts[1 if kind == "bullets" else 5])
+        slide.shapes.title.text = f"Slide {slide_number}: {kind.title()}"
+        logo.seek(0)
+        slide.shapes.add_picture(
+            logo, Inches(9.2), Inches(0.1), Inches(0.6), Inches(0.6)
+        )
+        if kind == "bullets":
+            slide.placeholders[1].text_frame.text = "\n".join(
+                f"Revenue grew {line * 3}% in region {line}" for line in range(6)
+            )
+        elif kind == "table":
+            table = slide.shapes.add_table(
+                5, 4, Inches(1), Inches(2), Inches(8), Inches(3)
+            ).table
+            for row in range(5):
+                for col in range(4):
+                    table.cell(row, col).text = (
+                        f"FY{2020 + col}" if row == 0 else f"{row * col * 1.5:.1f}"
+                    )
+        elif kind == "chart":
+            chart_data = CategoryChartData()
+            chart_data.categories = ["Q1", "Q2", "Q3", "Q4"]
+            chart_data.add_series("Revenue", (12.5, 14.1, 15.8, 17.2))
+            slide.shapes.add_chart(
+                XL_CHART_TYPE.COLUMN_CLUSTERED,
+                Inches(1),
+                Inches(2),
+                Inches(8),
+                Inches(4.5),
+                chart_data,
+            )
+        else:
+            slide.shapes.add_picture(
+                picture((1600, 1000), (slide_number * 8 % 256, 160, 90)),
+                Inches(1),
+                Inches(1.5),
+                Inches(8),
+                Inches(5),
+            )
+    prs.save(path)
+
+
+def benchmark_slides(latency: float, decks: List[str]) -> None:
+    """Vision calls and prompt size of blank slide renders against python-pptx"""
+    with TemporaryDirectory() as tmpdir:
+        if not decks:
+            decks = [os.path.join(tmpdir, "investor_deck.pptx")]
+            write_sample_deck(decks[0], 30)
+
+        config = DocumentProcessingConfig()
+        engine = StubbedEngine(config, latency)
+        for path in decks:
+            prs = Presentation(path)
+            slides = len(prs.slides)
+            # Previously every slide was sent as a blank render of its size
+            size = (
+                prs.slide_width * config.dpi // EMU_PER_INCH,
+                prs.slide_height * config.dpi // EMU_PER_INCH,
+            )
+            blank_slides = (
+                (n, Image.new("RGB", size, "white")) for n in range(1, slides + 1)
+            )
+            vision_calls.clear()
+            start = time.perf_counter()
+            asyncio.run(engine._extract_pages(blank_slides, path, None))
+            before = time.perf_counter() - start
+            before_calls, before_bytes = len(vision_calls), sum(vision_calls)
+
+            vision_calls.clear()
+            start = time.perf_counter()
+            documents = asyncio.run(engine.aextract_text(path))
+            after = time.perf_counter() - start
+            print(
+                f"{os.path.basename(path)}: {slides} slides, "
+                f"{len(documents)} documents, "
+                f"{sum(d.meta_data['extraction'] == 'pptx' for d in documents)} "
+                f"read natively\n"
+                f"  blank renders (previous): {before_calls} vision calls, "
+                f"{before_bytes // 1024} KB of prompts, {before:.2f}s\n"
+                f"  python-pptx:              {len(vision_calls)} vision calls, "
+                f"{sum(vision_calls) // 1024} KB of prompts, {after:.2f}s"
+            )
+
+
+def benchmark_textlayer(latency: float, corpus: List[str]) -> None:
+    """Pages read from the PDF text layer instead of the vision model"""
+    with TemporaryDirectory() as tmpdir:
+        if not corpus:
+            samples = {
+                "annual_report.pdf": ["text"] * 18 + ["chart"] * 4,
+                "investor_deck.pdf": ["text", "chart", "scan"] * 6,
+                "scanned_filing.pdf": ["scan"] * 8,
+            }
+            for name, kinds in samples.items():
+                corpus.append(os.path.join(tmpdir, name))
+                write_sample_pdf(corpus[-1], kinds)
+
+        engine = StubbedEngine(DocumentProcessingConfig(), latency)
+        total_pages = total_text = 0
+        total_before = total_after = 0.0
+        for path in corpus:
+            start = time.perf_counter()
+            text_pages = engine._read_text_layer(path)
+            read_time = time.perf_counter() - start
+            page_count = len(PdfReader(path).pages)
+            vision_pages = page_count - len(text_pages)
+
+            def page_images(count: int):
+                # pdf2image needs poppler, so rasterized pages are stand-ins
+                for page_number in range(1, count + 1):
+                    yield page_number, draw_page(page_number, dpi=150)
+
+            start = time.perf_counter()
+            asyncio.run(engine._extract_pages(page_images(page_count), path, None))
+            before = time.perf_counter() - start
+            start = time.perf_counter()
+            asyncio.run(engine._extract_pages(page_images(vision_pages), path, None))
+            after = read_time + time.perf_counter() - start
+
+            total_pages += page_count
+            total_text += len(text_pages)
+            total_before += before
+            total_after += after
+            print(
+                f"{os.path.basename(path):<22} {len(text_pages):>3}/{page_count:<3} "
+                f"pages skip vision, text layer read in {read_time * 1e3:6.1f}ms, "
+                f"{before:6.2f}s -> {after:6.2f}s"
+            )
+        print(
+            f"{'total':<22} {total_text:>3}/{total_pages:<3} pages skip vision "
+            f"({total_text / total_pages:.0%}), vision calls at {latency}s each, "
+            f"{total_before:6.2f}s -> {total_after:6.2f}s "
+            f"({1 - total_after / total_before:.0%} saved)"
+        )
+
+
+def benchmark_pages(pages: int, latency: float, failure_rate: float) -> None:
+    """
+    Pages per second and peak memory at several page concurrencies, on a synthetic
+    deck of 300 DPI letter pages
+    """
+    config = DocumentProcessingConfig()
+    page = draw_page(1)
+    png = io.BytesIO()
+    page.save(png, format="PNG")
+    prompt = StubbedEngine(config, latency)._page_prompt(page, None)
+    print(
+        f"page payload: {len(png.getvalue()) * 4 // 3 // 1024} KB as full size PNG "
+        f"(previous), {len(prompt[1]['image_url']['url']) // 1024} KB as "
+        f"downscaled {config.image_format}"
+    )
+    del page, png, prompt
+
+    print(
+        f"{pages} pages at 300 DPI materialised at once (previous): "
+        f"{pages * 3300 * 2550 * 3 // 2**20} MB of pixels"
+    )
+
+    def drawn_pages():
+        # Drawn lazily, as a streaming rasterizer would produce them
+        for page_number in range(1, pages + 1):
+            yield page_number, draw_page(page_number)
+
+    with TemporaryDirectory() as tmpdir:
+        pdf_path = None
+        if shutil.which("pdftoppm"):
+            pdf_path = os.path.join(tmpdir, "deck.pdf")
+            draw_page(1).save(
+                pdf_path,
+                save_all=True,
+                append_images=(draw_page(i) for i in range(2, pages + 1)),
+            )
+        else:
+            # pdf2image needs poppler, feed the pipeline the pages as drawn
+            print("poppler is not installed, using drawn pages instead of a PDF")
+
+        for page_concurrency in (1, 4, 8, 16):
+            engine = StubbedEngine(
+                DocumentProcessingConfig(page_concurrency=page_concurrency),
+                latency,
+                failure_rate,
+            )
+            start = time.perf_counter()
+            if pdf_path:
+                documents = asyncio.run(engine.aextract_text(pdf_path, "deck.pdf"))
+            else:
+                documents = asyncio.run(
+                    engine._extract_pages(drawn_pages(), "deck.pdf", None)
+                )
+            elapsed = time.perf_counter() - start
+            assert [d.meta_data["page_number"] for d in documents] == sorted(
+                d.meta_data["page_number"] for d in documents
+            )
+            print(
+                f"page_concurrency={page_concurrency:<3} {len(documents)}/{pages} pages "
+                f"in {elapsed:6.2f}s, {len(documents) / elapsed:5.2f} pages/s, "
+                f"peak RSS {peak_rss_mb():6.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    mode, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("pages", [])
+    if mode == "slides":
+        benchmark_slides(float(args[0]) if args else 1.0, args[1:])
+    elif mode == "textlayer":
+        benchmark_textlayer(float(args[0]) if args else 1.0, args[1:])
+    elif mode == "pages":
+        benchmark_pages(
+            int(args[0]) if len(args) > 0 else 40,
+            float(args[1]) if len(args) > 1 else 1.0,
+            float(args[2]) if len(args) > 2 else 0.05,
+        )
+    else:
+        sys.exit(__doc__)
@@ -0,0 +1,100 @@
+"""
+Exercise NetlifyAgent against a local stand-in for the Netlify Deploy API that adds
+latency and fails a share of requests with 429 and 503:
+
+    python -m benchmarks.netlify_client [failure_rate]
+"""
+
+import asyncio
+import hashlib
+import random
+import sys
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from backend.agents.netlify import NetlifyAgent
+from backend.settings import NetlifyConfig
+
+failure_rate = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+latency = 0.02
+stats = Counter()
+peers = set()
+blobs = {}
+
+
+async def create_deploy(request: web.Request) -> web.Response:
+    stats["requests"] += 1
+    peers.add(request.transport.get_extra_info("peername"))
+    await asyncio.sleep(latency)
+    if random.random() < failure_rate:
+        stats["rate_limited"] += 1
+        return web.Response(status=429, headers={"Retry-After": "0.05"})
+    files = (await request.json())["files"]
+    stats["deploys"] += 1
+    deploy_id = f"deploy-{stats['deploys']}"
+    return web.json_response(
+        {
+            "id": deploy_id,
+            "deploy_ssl_url": f"https://{deploy_id}--site.netlify.app",
+            "required": sorted(set(files.values()) - set(blobs)),
+        }
+    )
+
+
+async def upload_file(request: web.Request) -> web.Response:
+    stats["requests"] += 1
+    peers.add(request.transport.get_extra_info("peername"))
+    await asyncio.sleep(latency)
+    if random.random() < failure_rate:
+        stats["unavailable"] += 1
+        return web.Response(status=503)
+    content = await request.read()
+    blobs[hashlib.sha1(content).hexdigest()] = content
+    stats["uploads"] += 1
+    return web.json_response({"path": request.match_info["path"]})
+
+
+async def main():
+    app = web.Application()
+    app.router.add_post("/api/v1/sites/{site_id}/deploys", create_deploy)
+    app.router.add_put("/api/v1/deploys/{deploy_id}/files/{path:.*}", upload_file)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    port = runner.addresses[0][1]
+
+    agent = NetlifyAgent(
+        NetlifyConfig(
+            site_id="local",
+            auth_token="token",
+            api_url=f"http://127.0.0.1:{port}/api/v1",
+        )
+    )
+    runs, charts = 10, 13
+    start = time.perf_counter()
+    for run in range(runs):
+        files = {
+            f"charts/{run}-{i}.html": f"<html>chart {run}-{i}</html>".encode()
+            for i in range(charts)
+        }
+        # Every other run republishes the previous charts, which need no uploads
+        if run % 2:
+            files = {
+                f"charts/{run - 1}-{i}.html": f"<html>chart {run - 1}-{i}</html>".encode()
+                for i in range(charts)
+            }
+        urls = await agent.upload_files(files)
+        assert set(urls) == set(files)
+    elapsed = time.perf_counter() - start
+    await agent.aclose()
+    await runner.cleanup()
+
+    print(f"{runs} deploys of {charts} charts in {elapsed:.2f}s")
+    print(f"stand-in server: {dict(stats)}")
+    print(f"distinct client connections: {len(peers)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
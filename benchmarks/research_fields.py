@@ -0,0 +1,56 @@
+"""
+Wall clock of get_deep_research with the field agents stubbed to a fixed latency,
+at several field concurrencies:
+
+    python -m benchmarks.research_fields [latency_seconds]
+"""
+
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from backend.services.research import ResearchService
+from backend.settings import ResearchConfig
+
+
+class StubbedResearchService(ResearchService):
+    def __init__(self, research_config: ResearchConfig, latency: float):
+        self.research_config = research_config
+        self.field_limit = asyncio.Semaphore(research_config.global_field_concurrency)
+        self.knowledge_base = None
+        self.netlify_agent = None
+        self.latency = latency
+
+        async def aquery(collection_name, query):
+            return [{"company_name": query["company_name"]}]
+
+        self.mongo_connector = SimpleNamespace(aquery=aquery)
+
+    async def _retrieve_field_references(self, company, fields):
+        return None
+
+    async def _llm_field(self, company, section_name, field_name, schema, *_):
+        await asyncio.sleep(self.latency)
+        return schema.model_construct(citations=[], summary="")
+
+
+async def timed(config: ResearchConfig, latency: float) -> float:
+    service = StubbedResearchService(config, latency)
+    start = time.perf_counter()
+    await service.get_deep_research("Acme")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    for name, config in [
+        ("sequential (previous)", ResearchConfig(field_concurrency=1)),
+        ("field_concurrency=4", ResearchConfig(field_concurrency=4)),
+        ("field_concurrency=13", ResearchConfig(field_concurrency=13)),
+    ]:
+        print(f"{name:<24} {asyncio.run(timed(config, latency)):6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
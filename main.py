@@ -1,18 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from datetime import timedelta
+
 import uvicorn
 from fastapi import FastAPI
 from scalar_fastapi import get_scalar_api_reference
 
 from backend.api.auth import auth_router
+from backend.api.charts import charts_router
 from backend.api.companies import companies_router
 from backend.api.news import news_router
 from backend.api.chat import chat_router
 from backend.api.files import files_router
+from backend.api.metrics import metrics_router
 from backend.api.research import research_router
-from backend.dependencies import get_cache_service, get_user
-from backend.middlewares.cache_cleanup import setup_cache_cleanup_middleware
+from backend.database.mongo import close_mongo_clients
+from backend.plot.renderer import shutdown_render_pool
+from backend.dependencies import get_service_container, get_user
 from fastapi.middleware.cors import CORSMiddleware
 from backend.models.base.users import User
-from backend.models.base.exceptions import NotFoundException
+from backend.models.base.exceptions import (
+    ConflictException,
+    NotFoundException,
+    UnsupportedFileException,
+)
+from backend.services.cache import run_cache_maintenance
 from backend.settings import get_app_settings
 from backend.utils.api_helpers import register_routers
 from backend.utils.exceptions import ServiceException, exception_handler
@@ -34,17 +46,59 @@ load_dotenv()
 LOG = get_logger()
 app_settings = get_app_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared service graph once; the cache service also ensures the
+    # cache collection indexes at startup
+    services = get_service_container()
+    cache_service = services.cache_service
+
+    # Expired entries are removed from MongoDB by the TTL index on the cache
+    # collection; this optional task only evicts the in-memory tier
+    maintenance_task = None
+    interval = app_settings.cache_config.maintenance_interval_seconds
+    if interval:
+        maintenance_task = asyncio.create_task(
+            run_cache_maintenance(cache_service, timedelta(seconds=interval))
+        )
+
+    # Shared retrieval filters the vector search on the company, which needs the
+    # field in the search index; adding it rebuilds the index, so it is done here
+    # rather than on a request
+    try:
+        await asyncio.to_thread(
+            services.knowledge_base_service.ensure_company_filter_index
+        )
+    except Exception as e:
+        LOG.warning(f"Could not add the company filter to the vector index: {e}")
+
+    # Documents are ingested in the background, resuming jobs left by a restart
+    ingestion_service = services.ingestion_service
+    ingestion_service.start()
+
+    yield
+
+    await ingestion_service.stop()
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await maintenance_task
+    # Release the process-wide Netlify and mongo connection pools
+    await services.netlify_agent.aclose()
+    await services.files_service.aclose()
+    shutdown_render_pool()
+    close_mongo_clients()
+
+
 app = FastAPI(
     title="Virtual Insights Backend APIs",
     version="2.0.0",
     description="APIs for Virtual Insights Backend",
     docs_url="/swagger",
+    lifespan=lifespan,
 )
 
-# Setup cache service and middleware
-cache_service = get_cache_service(app_settings)
-setup_cache_cleanup_middleware(app, cache_service)
-
 routers = [
     companies_router,
     news_router,
@@ -58,9 +112,12 @@ routers = [
     regulatory_compliance_router,
     partnership_network_router,
     research_router,
+    metrics_router,
 ]
 
-unprotected_routers = [auth_router]
+# Charts are loaded by iframes, which cannot authenticate; their URLs are content
+# hashes that cannot be guessed
+unprotected_routers = [auth_router, charts_router]
 
 if app_settings.local:
     LOG.info(
@@ -95,6 +152,32 @@ async def not_found_exception_handler(request, exc):
     )
 
 
+# Add handler for ConflictException
+@app.exception_handler(ConflictException)
+async def conflict_exception_handler(request, exc):
+    LOG.error(f"{request.method} {request.url}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"error": {"code": "conflict", "message": exc.message, "details": {}}},
+    )
+
+
+# Add handler for UnsupportedFileException
+@app.exception_handler(UnsupportedFileException)
+async def unsupported_file_exception_handler(request, exc):
+    LOG.error(f"{request.method} {request.url}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        content={
+            "error": {
+                "code": "unsupported_file",
+                "message": exc.message,
+                "details": {},
+            }
+        },
+    )
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Or specify ["http://localhost:5173"] for more security
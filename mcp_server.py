@@ -1,20 +1,8 @@
 from fastmcp import FastMCP
 
-from backend.dependencies import (
-    get_finance_service,
-    get_linkedin_team_service,
-    get_market_analysis_service,
-    get_risk_analysis_service,
-    get_customer_sentiment_service,
-    get_regulatory_compliance_service,
-    get_partnership_network_service,
-    get_search_service,
-)
-from backend.services.cache import CacheService
-from backend.services.knowledge import KnowledgeBaseService
+from backend.dependencies import get_service_container
 from backend.settings import get_app_settings
 from dotenv import load_dotenv
-from backend.agents.netlify import NetlifyAgent
 from backend.utils.logger import get_logger
 
 # Apply OpenAI client patch to fix AttributeError during garbage collection
@@ -28,46 +16,16 @@ mcp = FastMCP("Venture Insights MCP Server")
 
 # Get app settings
 app_settings = get_app_settings()
-knowledge_base_service = KnowledgeBaseService(
-    db_config=app_settings.db_config,
-    vector_store_config=app_settings.vector_store_config,
-)
-netlify_agent = NetlifyAgent(app_settings.netlify_config)
-# Instantiate services
-finance_service = get_finance_service(
-    app_settings=app_settings,
-    knowledge_base_service=knowledge_base_service,
-    netlify_agent=netlify_agent,
-    cache_service=CacheService(app_settings.db_config),
-)
-linkedin_team_service = get_linkedin_team_service(
-    app_settings=app_settings,
-    netlify_agent=netlify_agent,
-    cache_service=CacheService(app_settings.db_config),
-)
-market_analysis_service = get_market_analysis_service(
-    app_settings=app_settings,
-    netlify_agent=netlify_agent,
-    cache_service=CacheService(app_settings.db_config),
-)
-risk_analysis_service = get_risk_analysis_service(
-    netlify_agent=netlify_agent, cache_service=CacheService(app_settings.db_config)
-)
-customer_sentiment_service = get_customer_sentiment_service(
-    app_settings=app_settings, cache_service=CacheService(app_settings.db_config)
-)
-regulatory_compliance_service = get_regulatory_compliance_service(
-    netlify_agent=netlify_agent, cache_service=CacheService(app_settings.db_config)
-)
-partnership_network_service = get_partnership_network_service(
-    netlify_agent=netlify_agent, cache_service=CacheService(app_settings.db_config)
-)
-search_service = get_search_service(
-    app_settings=app_settings,
-    netlify_agent=netlify_agent,
-    knowledge_base_service=knowledge_base_service,
-    cache_service=CacheService(app_settings.db_config),
-)
+# Instantiate services, shared for the lifetime of the server
+services = get_service_container()
+finance_service = services.finance_service
+linkedin_team_service = services.linkedin_team_service
+market_analysis_service = services.market_analysis_service
+risk_analysis_service = services.risk_analysis_service
+customer_sentiment_service = services.customer_sentiment_service
+regulatory_compliance_service = services.regulatory_compliance_service
+partnership_network_service = services.partnership_network_service
+search_service = services.search_service
 
 
 # --- Finance ---